@@ -40,6 +40,10 @@ if ! command -v dpkg-buildpackage &> /dev/null; then
     sudo apt-get install -y build-essential devscripts debhelper
 fi
 
+# Empaquetar la biblioteca incluida en un único archivo de solo lectura
+echo "Empaquetando cheatsheets incluidas..."
+python3 src/packed_library.py build data/cheatsheets data/cheatsheets.pack
+
 # Construir el paquete
 echo "Construyendo paquete..."
 dpkg-buildpackage -us -uc -b
@@ -3,6 +3,7 @@
 Script para migrar cheatsheets existentes y agregar el campo de idioma
 """
 
+import argparse
 import sys
 from pathlib import Path
 
@@ -10,42 +11,49 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent / 'src'))
 
 from cheatsheet_manager import CheatSheetManager
+from language_migration import (MigrationCheckpoint, MigrationError,
+                                default_checkpoint_file)
+from languages_config import split_languages_file
 
 
-def migrate_existing_cheatsheets():
+def migrate_existing_cheatsheets(data_path=None, dry_run=False, workers=None,
+                                 restart=False):
     """Migrar cheatsheets existentes para agregar campo de idioma"""
-    manager = CheatSheetManager()
-    
-    print("🔄 Iniciando migración de cheatsheets existentes...")
-    
-    # Obtener todas las cheatsheets
-    all_sheets = manager.get_all_cheatsheets()
-    updated_count = 0
-    
-    for sheet in all_sheets:
-        # Si la cheatsheet no tiene campo de idioma, agregarlo
-        if 'language' not in sheet or not sheet['language']:
-            print(f"📝 Actualizando: {sheet['title']}")
-            
-            # Determinar idioma basado en contenido (heurística simple)
-            language = detect_language_from_content(sheet)
-            
-            # Actualizar la cheatsheet
-            success = manager.update_cheatsheet(
-                sheet['filename'],
-                sheet['title'],
-                sheet['tags'],
-                sheet['items'],
-                language
-            )
-            
-            if success:
-                updated_count += 1
-                print(f"  ✅ Actualizada a idioma: {language}")
-            else:
-                print(f"  ❌ Error al actualizar")
-    
-    print(f"\n✨ Migración completada: {updated_count} cheatsheets actualizadas")
+    manager = CheatSheetManager(data_path)
+    checkpoint_file = default_checkpoint_file(manager.data_path)
+
+    # Una migración interrumpida continúa con su plan desde el checkpoint
+    checkpoint = MigrationCheckpoint(checkpoint_file)
+    saved = None if restart or dry_run else checkpoint.load()
+    if saved is not None:
+        plan, done = saved
+        print(f"⏯️  Reanudando migración: {len(done)} de {len(plan)} "
+              f"cheatsheets ya migradas")
+    else:
+        print("🔄 Planificando migración de cheatsheets existentes...")
+        # Las cheatsheets sin campo de idioma, con el idioma detectado por
+        # el clasificador de n-gramas
+        plan = manager.plan_language_migration()
+
+    for entry in plan:
+        print(f"📝 {entry['filename']}: {entry['from'] or '-'} → {entry['to']}")
+    if dry_run:
+        print(f"\n🔍 Simulación: {len(plan)} cheatsheets cambiarían, "
+              f"no se escribió nada")
+        return
+
+    def show_progress(finished, total):
+        print(f"\r  {finished}/{total} ({finished * 100 // max(1, total)}%)",
+              end='', flush=True)
+
+    report = manager.apply_language_migration(
+        plan, checkpoint_file, workers, show_progress)
+    print()
+    for skipped in report['skipped']:
+        print(f"  ❌ {skipped['filename']}: {skipped['reason']}")
+
+    print(f"\n✨ Migración completada: {len(report['migrated'])} cheatsheets "
+          f"actualizadas en {report['seconds']:.2f}s")
     
     # Mostrar estadísticas finales
     stats = manager.get_language_statistics()
@@ -55,26 +63,6 @@ def migrate_existing_cheatsheets():
             print(f"  {info['name']} {info.get('flag', '')}: {info['count']} cheatsheets")
 
 
-def detect_language_from_content(sheet):
-    """Detectar idioma basado en el contenido de la cheatsheet"""
-    title = sheet.get('title', '').lower()
-    
-    # Palabras clave en español
-    spanish_words = ['básico', 'avanzado', 'comandos', 'fórmulas', 'intermedio']
-    
-    # Buscar en título
-    for word in spanish_words:
-        if word in title:
-            return 'es'
-    
-    # Si contiene caracteres especiales del español
-    if any(char in title for char in 'ñáéíóúü'):
-        return 'es'
-    
-    # Por defecto, inglés
-    return 'en'
-
-
 def show_language_management_examples():
     """Mostrar ejemplos de gestión de idiomas"""
     manager = CheatSheetManager()
@@ -134,7 +122,47 @@ def validate_configuration():
     print(f"🌐 Idioma predeterminado: {manager.default_language}")
 
 
+def split_languages(source, target_dir):
+    """Convertir languages.json al formato de un archivo por idioma"""
+    print(f"\n✂️  Separando {source} en {target_dir}...")
+
+    index_file = split_languages_file(source, target_dir)
+
+    print(f"✅ Índice creado: {index_file}")
+    for path in sorted(Path(target_dir).glob('*.json')):
+        if path.name != Path(index_file).name:
+            print(f"   • {path.name}")
+    print(f"ℹ️  Ya puede eliminar {source}; se usará el nuevo formato")
+
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Migración y gestión de idiomas")
+    parser.add_argument(
+        '--split-languages', nargs='?', metavar='DIRECTORIO',
+        const=str(Path(__file__).parent / 'data' / 'languages'),
+        help="Separar languages.json en un archivo por idioma")
+    parser.add_argument(
+        '--source', default=str(Path(__file__).parent / 'data' / 'languages.json'),
+        help="languages.json a separar (con --split-languages)")
+    parser.add_argument(
+        '--data-path', default=None,
+        help="Directorio de cheatsheets a migrar (por defecto, el incluido)")
+    parser.add_argument(
+        '--dry-run', action='store_true',
+        help="Mostrar el plan de migración sin escribir nada")
+    parser.add_argument(
+        '--workers', type=int, default=None,
+        help="Hilos de escritura (por defecto, hasta 8)")
+    parser.add_argument(
+        '--restart', action='store_true',
+        help="Planificar de nuevo aunque haya una migración interrumpida")
+    args = parser.parse_args()
+
+    if args.split_languages:
+        split_languages(args.source, args.split_languages)
+        sys.exit(0)
+
     print("🚀 Script de migración y gestión de idiomas")
     print("=" * 50)
     
@@ -142,7 +170,14 @@ if __name__ == "__main__":
     validate_configuration()
     
     # Migrar cheatsheets existentes
-    migrate_existing_cheatsheets()
+    try:
+        migrate_existing_cheatsheets(args.data_path, args.dry_run,
+                                     args.workers, args.restart)
+    except MigrationError as e:
+        print(f"❌ {e}; use --restart para planificar de nuevo")
+        sys.exit(1)
+    if args.dry_run:
+        sys.exit(0)
     
     # Mostrar ejemplos de uso
     show_language_management_examples()
@@ -43,15 +43,18 @@ chmod +x /usr/share/floating-cheatsheets/main.py
 
 # Copiar datos del sistema (archivos de idioma y configuración)
 echo "Copiando archivos de datos y idiomas..."
-cp -r data/* /usr/share/floating-cheatsheets/
-chmod -R 644 /usr/share/floating-cheatsheets/data/ >/dev/null 2>&1 || true
+python3 src/packed_library.py build data/cheatsheets data/cheatsheets.pack >/dev/null 2>&1 || true
+cp -r data /usr/share/floating-cheatsheets/
+chmod -R a+rX /usr/share/floating-cheatsheets/data/ >/dev/null 2>&1 || true
 
 # Crear script ejecutable en /usr/bin
 echo "Creando script ejecutable..."
 tee /usr/bin/floating-cheatsheets > /dev/null << 'EOF'
 #!/bin/bash
+# Con argumentos: consultas por terminal (search, show, tags, stats, export)
+if [ $# -gt 0 ]; then exec python3 /usr/share/floating-cheatsheets/cli.py "$@"; fi
 cd /usr/share/floating-cheatsheets
-python3 main.py "$@"
+python3 main.py
 EOF
 
 chmod +x /usr/bin/floating-cheatsheets
@@ -99,14 +102,11 @@ for home_dir in /home/*; do
             sudo -u "$user_name" cp data/config.json "$home_dir/.local/share/floating-cheatsheets/" 2>/dev/null || true
         fi
         
-        if [ ! -f "$home_dir/.local/share/floating-cheatsheets/languages.json" ]; then
-            sudo -u "$user_name" cp data/languages.json "$home_dir/.local/share/floating-cheatsheets/" 2>/dev/null || true
+        if [ ! -d "$home_dir/.local/share/floating-cheatsheets/languages" ]; then
+            sudo -u "$user_name" cp -r data/languages "$home_dir/.local/share/floating-cheatsheets/" 2>/dev/null || true
         fi
         
-        # Copiar cheatsheets de ejemplo si el directorio está vacío
-        if [ -z "$(ls -A "$home_dir/.local/share/floating-cheatsheets/cheatsheets/" 2>/dev/null)" ]; then
-            sudo -u "$user_name" cp data/cheatsheets/*.json "$home_dir/.local/share/floating-cheatsheets/cheatsheets/" 2>/dev/null || true
-        fi
+        # Las cheatsheets incluidas se leen desde /usr/share, sin copiarlas
         
         # Ajustar permisos
         chown -R "$user_name":"$user_name" "$home_dir/.local/share/floating-cheatsheets" 2>/dev/null || true
@@ -136,12 +136,8 @@ if [ -n "$SUDO_USER" ] && [ "$SUDO_USER" != "root" ]; then
         sudo -u "$SUDO_USER" cp data/config.json "$CURRENT_USER_HOME/.local/share/floating-cheatsheets/" 2>/dev/null || true
     fi
     
-    if [ ! -f "$CURRENT_USER_HOME/.local/share/floating-cheatsheets/languages.json" ]; then
-        sudo -u "$SUDO_USER" cp data/languages.json "$CURRENT_USER_HOME/.local/share/floating-cheatsheets/" 2>/dev/null || true
-    fi
-    
-    if [ -z "$(ls -A "$CURRENT_USER_HOME/.local/share/floating-cheatsheets/cheatsheets/" 2>/dev/null)" ]; then
-        sudo -u "$SUDO_USER" cp data/cheatsheets/*.json "$CURRENT_USER_HOME/.local/share/floating-cheatsheets/cheatsheets/" 2>/dev/null || true
+    if [ ! -d "$CURRENT_USER_HOME/.local/share/floating-cheatsheets/languages" ]; then
+        sudo -u "$SUDO_USER" cp -r data/languages "$CURRENT_USER_HOME/.local/share/floating-cheatsheets/" 2>/dev/null || true
     fi
     
     chown -R "$SUDO_USER":"$SUDO_USER" "$CURRENT_USER_HOME/.local/share/floating-cheatsheets" 2>/dev/null || true
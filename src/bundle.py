@@ -0,0 +1,161 @@
+"""
+Cheatsheet Bundles
+Zip packages of cheatsheets for sharing libraries
+
+A bundle holds one sheets/<filename>.json entry per cheatsheet, stored as the
+original file, and a manifest.json listing them. Entries are written and
+read one at a time, so bundles of any size use little memory.
+"""
+
+import json
+import os
+import zipfile
+import zlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import BinaryIO, Dict, Iterator, List, Optional, Tuple, Union
+
+
+BUNDLE_FORMAT = 'floating-cheatsheets-bundle'
+BUNDLE_VERSION = 1
+MANIFEST_NAME = 'manifest.json'
+SHEETS_DIR = 'sheets/'
+
+# Raised reading a damaged entry: bad header or CRC, bad deflate stream,
+# data cut short
+CORRUPT_ENTRY_ERRORS = (zipfile.BadZipFile, zlib.error, EOFError)
+
+
+class BundleError(Exception):
+    """Raised when a file is not a readable cheatsheet bundle"""
+
+
+class BundleWriter:
+    """Write cheatsheet files into a bundle, the manifest goes last"""
+
+    def __init__(self, target: Union[str, BinaryIO]):
+        # Works on non-seekable streams too, entries then carry data
+        # descriptors instead of a rewritten header
+        self._zip = zipfile.ZipFile(target, 'w', zipfile.ZIP_DEFLATED,
+                                    compresslevel=6)
+        self.sheets: List[Dict] = []
+        self.bytes_written = 0
+
+    def add_file(self, filename: str, path: str, info: Dict) -> None:
+        """Add a cheatsheet file as-is, streamed from disk"""
+        self._zip.write(path, f"{SHEETS_DIR}{filename}.json")
+        size = os.path.getsize(path)
+        self.bytes_written += size
+        self.sheets.append(dict(info, filename=filename, size=size))
+
+    def add_bytes(self, filename: str, data: bytes, info: Dict) -> None:
+        """Add a cheatsheet from its encoded JSON"""
+        self._zip.writestr(f"{SHEETS_DIR}{filename}.json", data)
+        self.bytes_written += len(data)
+        self.sheets.append(dict(info, filename=filename, size=len(data)))
+
+    def close(self) -> None:
+        manifest = {
+            'format': BUNDLE_FORMAT,
+            'version': BUNDLE_VERSION,
+            'created': datetime.now().isoformat(timespec='seconds'),
+            'count': len(self.sheets),
+            'sheets': self.sheets
+        }
+        self._zip.writestr(MANIFEST_NAME, json.dumps(
+            manifest, indent=2, ensure_ascii=False))
+        self._zip.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self._zip.close()
+
+
+class BundleReader:
+    """Read and parse the cheatsheets of a bundle"""
+
+    def __init__(self, source: Union[str, BinaryIO]):
+        try:
+            self._zip = zipfile.ZipFile(source, 'r')
+        except zipfile.BadZipFile as e:
+            # The central directory at the end is missing or damaged, e.g.
+            # a truncated download: no entry can be located
+            raise BundleError(f"Corrupt or not a zip file, its directory "
+                              f"can't be read: {e}")
+        except OSError as e:
+            raise BundleError(f"Not a cheatsheet bundle: {e}")
+
+        self.manifest = self._read_manifest()
+        self.entries = [
+            name for name in self._zip.namelist()
+            if name.startswith(SHEETS_DIR) and name.endswith('.json')
+        ]
+
+    def _read_manifest(self) -> Dict:
+        try:
+            manifest = json.loads(self._zip.read(MANIFEST_NAME))
+        except KeyError:
+            raise BundleError(f"Missing {MANIFEST_NAME}")
+        except CORRUPT_ENTRY_ERRORS as e:
+            raise BundleError(f"Corrupt {MANIFEST_NAME}: {e}")
+        except (json.JSONDecodeError, UnicodeDecodeError) as e:
+            raise BundleError(f"Invalid {MANIFEST_NAME}: {e}")
+
+        if manifest.get('format') != BUNDLE_FORMAT:
+            raise BundleError("Not a cheatsheet bundle")
+        if manifest.get('version', 0) > BUNDLE_VERSION:
+            raise BundleError(
+                f"Unsupported bundle version {manifest.get('version')}")
+        return manifest
+
+    def _load_entry(self, name: str) -> Tuple[str, bytes, Optional[Dict],
+                                             Optional[str]]:
+        """Decompress and parse one entry (runs in a worker thread)"""
+        filename = os.path.basename(name)[:-len('.json')]
+        try:
+            raw = self._zip.read(name)
+        except CORRUPT_ENTRY_ERRORS as e:
+            return filename, b'', None, f"Corrupt entry: {e}"
+        try:
+            data = json.loads(raw.decode('utf-8'))
+        except (json.JSONDecodeError, UnicodeDecodeError) as e:
+            return filename, raw, None, str(e)
+        if not isinstance(data, dict):
+            return filename, raw, None, "Not a cheatsheet object"
+        return filename, raw, data, None
+
+    def iter_sheets(self, workers: Optional[int] = None
+                    ) -> Iterator[Tuple[str, bytes, Optional[Dict],
+                                        Optional[str]]]:
+        """
+        Iterate over (filename, raw bytes, data, error) in bundle order
+
+        Entries are decompressed and parsed by a thread pool with a bounded
+        number in flight, so memory stays flat however large the bundle is.
+        """
+        workers = workers or min(8, os.cpu_count() or 1)
+        window = workers * 4
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            pending = deque()
+            for name in self.entries:
+                pending.append(pool.submit(self._load_entry, name))
+                if len(pending) >= window:
+                    yield pending.popleft().result()
+            for future in pending:
+                yield future.result()
+
+    def close(self) -> None:
+        self._zip.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
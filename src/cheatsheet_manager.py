@@ -4,9 +4,57 @@ Handles CRUD operations for cheatsheets
 """
 
 import json
+import os
+import time
 from pathlib import Path
 from datetime import datetime
-from typing import List, Dict, Optional
+from typing import (TYPE_CHECKING, BinaryIO, Callable, Iterable, Iterator,
+                    List, Dict, Mapping, Optional, Set, Tuple, Union)
+
+from filename_registry import FilenameRegistry
+from languages_config import default_languages_file, get_languages_config
+from library_index import (WHITEOUT_SUFFIX, LibraryIndex, assign_item_ids,
+                           is_sheet_filename, sheet_content_hash)
+from library_stack import LibraryStack
+from library_stats import LibraryStatistics
+from packed_library import PACK_SUFFIX, PackedLibrary, PackError
+from sheet_model import Item, sheet_to_dict
+
+# Bundles, duplicates, translations, language detection, migrations and
+# the columnar store are imported where they are used, every command would
+# otherwise pay for them
+if TYPE_CHECKING:
+    from item_dedup import DuplicateIndex
+    from item_store import ItemStore
+    from language_detector import LanguageDetector
+    from translation_pairs import TranslationIndex
+
+# Imported sheets without a language are detected this many at a time
+LANGUAGE_DETECTION_BATCH = 256
+
+
+def system_library_root() -> Optional[Path]:
+    """Get the bundled library, preferring its pack"""
+    src_path = Path(__file__).parent
+    # Source checkout (data/ next to src/) or installed (data/ next to code)
+    for data_path in (src_path.parent / 'data', src_path / 'data'):
+        pack_file = data_path / f"cheatsheets{PACK_SUFFIX}"
+        if pack_file.exists():
+            return pack_file
+        directory = data_path / 'cheatsheets'
+        if directory.is_dir():
+            return directory
+    return None
+
+
+def default_library_roots(config: Dict) -> List[str]:
+    """Lower library roots of the widget: system library, then shared ones"""
+    roots = []
+    system_root = system_library_root()
+    if system_root is not None:
+        roots.append(str(system_root))
+    roots.extend(config.get('shared_roots', []))
+    return roots
 
 
 class CheatSheetManager:
@@ -15,78 +63,293 @@ class CheatSheetManager:
             self,
             data_path: str = None,
             default_language: str = None,
-            languages_file: str = None
+            languages_file: str = None,
+            index_file: str = None,
+            roots: List[str] = None,
+            columnar: bool = False,
+            workers: Optional[int] = None,
+            processes: int = 0
             ):
         self.base_path = Path(__file__).parent.parent
         self.data_path = self.base_path / 'data' / 'cheatsheets' if data_path is None else Path(data_path)
-        self.data_path.mkdir(parents=True, exist_ok=True)
+
+        # A packed library is served read-only straight from the pack,
+        # a directory through a persisted manifest refreshed by stat
+        self.read_only = self.data_path.suffix == PACK_SUFFIX
+        if self.read_only:
+            top = PackedLibrary(self.data_path)
+        else:
+            self.data_path.mkdir(parents=True, exist_ok=True)
+            top = LibraryIndex(self.data_path, index_file, workers, processes)
+
+        # Read-only roots below data_path, lowest priority first; their
+        # sheets are copied to data_path only when edited
+        self.roots = []
+        layers = []
+        for root in roots or []:
+            root = Path(root)
+            if root.resolve() == self.data_path.resolve():
+                continue
+            layer = self._open_root(root, workers, processes)
+            if layer is not None:
+                self.roots.append(root)
+                layers.append(layer)
+
+        self.index = LibraryStack(layers + [top]) if layers else top
+        self._top = top
+
+        # Filenames in use, loaded on the first create and kept in sync
+        # with the changes reported by the index
+        self.filenames = FilenameRegistry()
+
+        # Serve searches from a columnar ItemStore, opened from the one
+        # saved next to the index or rebuilt on the first search after a
+        # change
+        self.columnar = columnar
+        self._item_store: Optional['ItemStore'] = None
 
         # Load languages configuration
-        self.languages_file = languages_file or str(self.base_path / 'data' / 'languages.json')
-        self._load_languages_config()
+        self.languages_file = languages_file or default_languages_file(self.base_path)
+        self.config_service = get_languages_config(self.languages_file)
 
         # Set default language
         self.default_language = default_language or self.languages_config.get('default_language', 'en')
 
-    def get_all_cheatsheets(self) -> List[Dict]:
-        """Get all cheatsheets"""
-        cheatsheets = []
+        # Counts per language and tag, built on the first read and then
+        # updated with every change the manager makes or the index finds
+        self.stats = LibraryStatistics(self.default_language)
+
+        # Language variants of each cheatsheet, paired on first use and
+        # again after a change
+        self._translations: Optional['TranslationIndex'] = None
 
-        for file_path in self.data_path.glob('*.json'):
+        # Near-duplicate item clusters, built on first use, and the sheets
+        # changed since, updated in them on the next use
+        self._duplicates: Optional['DuplicateIndex'] = None
+        self._duplicates_changed: Set[str] = set()
+
+        # Language of unlabelled sheets, profiles loaded on first use
+        self._detector: Optional['LanguageDetector'] = None
+
+        # Callbacks notified when cheatsheets are created, updated or deleted
+        self.change_callbacks = []
+        # Callbacks notified once per group of changes (a batch, a refresh)
+        self.batch_callbacks = []
+
+    @staticmethod
+    def _open_root(root: Path, workers: Optional[int] = None,
+                   processes: int = 0):
+        """Open a lower library root, None if it can't be read"""
+        if root.suffix == PACK_SUFFIX:
             try:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    data['filename'] = file_path.stem
-                    # Add default language if it doesn't exist
-                    if 'language' not in data:
-                        data['language'] = self.default_language
-                    cheatsheets.append(data)
-            except (json.JSONDecodeError, FileNotFoundError) as e:
-                print(f"Error loading {file_path}: {e}")
-                continue
+                return PackedLibrary(root)
+            except PackError as e:
+                print(f"Error opening library root: {e}")
+                return None
+        return LibraryIndex(root, workers=workers, processes=processes)
+
+    @property
+    def languages_config(self) -> Mapping:
+        """Read-only view of the shared languages configuration"""
+        return self.config_service.get_view()
+
+    def register_change_callback(self, callback):
+        """Register callback(action, filename) for library changes"""
+        if callback not in self.change_callbacks:
+            self.change_callbacks.append(callback)
+
+    def unregister_change_callback(self, callback):
+        """Unregister library change callback"""
+        if callback in self.change_callbacks:
+            self.change_callbacks.remove(callback)
+
+    def register_batch_callback(self, callback):
+        """Register callback(changes) called once per group of changes"""
+        if callback not in self.batch_callbacks:
+            self.batch_callbacks.append(callback)
+
+    def unregister_batch_callback(self, callback):
+        """Unregister batch change callback"""
+        if callback in self.batch_callbacks:
+            self.batch_callbacks.remove(callback)
+
+    def _notify_change(self, action: str, filename: str) -> None:
+        """Notify registered callbacks that a cheatsheet changed"""
+        self._notify_changes([(action, filename)])
+
+    def _notify_changes(self, changes: List[Tuple[str, str]]) -> None:
+        """Notify every change, then the group of them once"""
+        if not changes:
+            return
+
+        self._item_store = None
+        self._translations = None
+        if self._duplicates is not None:
+            self._duplicates_changed.update(
+                filename for _, filename in changes)
+        if self.stats.loaded:
+            for _, filename in changes:
+                self.stats.update(filename,
+                                  self.index.get(filename, cache=False))
+
+        for action, filename in changes:
+            if action == 'created':
+                self.filenames.add(filename)
+            # An invalid file is reported deleted but still takes its name
+            elif (action == 'deleted' and
+                  not (self.data_path / f"{filename}.json").exists()):
+                self.filenames.release(filename)
+
+        for action, filename in changes:
+            for callback in list(self.change_callbacks):
+                try:
+                    callback(action, filename)
+                except Exception as e:
+                    print(f"Error executing change callback: {e}")
+
+        for callback in list(self.batch_callbacks):
+            try:
+                callback(list(changes))
+            except Exception as e:
+                print(f"Error executing batch callback: {e}")
+
+    def _sync_index(self) -> None:
+        """Refresh the index and notify changes made outside the manager"""
+        self._notify_changes(self.index.refresh())
+
+    def refresh(self) -> None:
+        """Pick up files changed by other processes, notifying the changes"""
+        self._sync_index()
+
+    def _iter_sheets(self) -> Iterator[Tuple[str, Dict]]:
+        """Iterate over indexed (filename, data) without copying"""
+        self._sync_index()
+        return self.index.iter_sheets()
+
+    def _copy_sheet(self, filename: str, data: Dict,
+                    fields: Optional[List[str]] = None) -> Dict:
+        """Copy indexed data into a cheatsheet dict callers may modify"""
+        if fields is None:
+            sheet = dict(data)
+        else:
+            # Only the requested fields, e.g. no items for a list of titles
+            sheet = {field: data[field] for field in fields if field in data}
+        sheet['filename'] = filename
+        # Add default language if it doesn't exist
+        if 'language' not in sheet and (fields is None or 'language' in fields):
+            sheet['language'] = self.default_language
+        if isinstance(sheet.get('tags'), (list, tuple)):
+            sheet['tags'] = list(sheet['tags'])
+        if isinstance(sheet.get('items'), (list, tuple)):
+            sheet['items'] = [dict(item) if isinstance(item, (dict, Item)) else item
+                              for item in sheet['items']]
+        return sheet
+
+    def iter_cheatsheets(
+            self,
+            filter: Optional[Callable[[str, Mapping], bool]] = None,
+            fields: Optional[Iterable[str]] = None
+            ) -> Iterator[Dict]:
+        """
+        Yield cheatsheets one at a time, in filename order
 
+        Unlike get_all_cheatsheets nothing is collected or sorted first, so
+        the first sheet comes right after the index refresh and a whole
+        library pass holds one copy at a time.
+
+        Args:
+            filter: Predicate on (filename, read-only indexed data), checked
+                before anything is copied; the data has no default language
+            fields: Keys to copy, e.g. ['title', 'tags'] (default: all);
+                'filename' is always there
+        """
+        self._sync_index()
+        if fields is not None:
+            fields = list(fields)
+        for filename, data in self.index.iter_sheets(cache=False):
+            if filter is None or filter(filename, data):
+                yield self._copy_sheet(filename, data, fields)
+
+    def _collect_sheets(
+            self,
+            predicate: Optional[Callable[[str, Dict], bool]] = None
+            ) -> List[Dict]:
+        """Get copies of the cheatsheets matching a predicate"""
+        cheatsheets = [
+            self._copy_sheet(filename, data)
+            for filename, data in self._iter_sheets()
+            if predicate is None or predicate(filename, data)
+        ]
         return sorted(cheatsheets, key=lambda x: x.get('updated', ''))
 
+    def _sheet_language(self, data: Dict) -> str:
+        """Language of indexed data, with the default applied"""
+        return data.get('language', self.default_language)
+
+    def get_all_cheatsheets(self) -> List[Dict]:
+        """Get all cheatsheets"""
+        return self._collect_sheets()
+
     def get_cheatsheet_by_filename(self, filename: str) -> Optional[Dict]:
-        """Get a specific cheatsheet by filename"""
-        file_path = self.data_path / f"{filename}.json"
+        """Get a specific cheatsheet by filename, its items with their ids"""
+        # Filenames also come from the HTTP API and the query daemon
+        if not is_sheet_filename(filename):
+            return None
+        action = self.index.refresh_file(filename)
+        if action:
+            self._notify_change(action, filename)
 
-        if not file_path.exists():
+        data = self.index.get(filename)
+        if data is None:
             return None
+        sheet = self._copy_sheet(filename, data)
+        if isinstance(sheet.get('items'), list):
+            sheet['items'] = assign_item_ids(sheet['items'])
+        return sheet
 
-        try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                data['filename'] = filename
-                # Agregar idioma predeterminado si no existe
-                if 'language' not in data:
-                    data['language'] = self.default_language
-                return data
-        except (json.JSONDecodeError, FileNotFoundError):
+    def get_content_hash(self, filename: str) -> Optional[str]:
+        """
+        Get the hash of a cheatsheet's title, language, tags and items
+
+        It only changes when what the cheatsheet says changes, so it can
+        key caches and ETags.
+        """
+        if not is_sheet_filename(filename):
             return None
+        action = self.index.refresh_file(filename)
+        if action:
+            self._notify_change(action, filename)
+        return self.index.get_hash(filename)
 
     def get_cheatsheets_by_tag(self, tag: str) -> List[Dict]:
         """Get cheatsheets filtered by tag"""
         if tag == "all":
             return self.get_all_cheatsheets()
 
-        all_sheets = self.get_all_cheatsheets()
-        return [sheet for sheet in all_sheets if tag in sheet.get('tags', [])]
+        return self._collect_sheets(
+            lambda filename, data: tag in data.get('tags', []))
 
-    def get_all_tags(self) -> List[str]:
-        """Get all unique tags"""
-        all_sheets = self.get_all_cheatsheets()
-        tags = set()
+    def _statistics(self) -> LibraryStatistics:
+        """
+        The library counts, loaded on first use
 
-        for sheet in all_sheets:
-            tags.update(sheet.get('tags', []))
+        Every read refreshes the index, a stat of each file, so files
+        written by other processes are counted; the changes it finds
+        update the counts instead of rebuilding them.
+        """
+        self._sync_index()
+        if not self.stats.loaded:
+            self.stats.rebuild(self.index.iter_sheets(cache=False))
+        return self.stats
 
-        return sorted(list(tags))
+    def get_all_tags(self) -> List[str]:
+        """Get all unique tags"""
+        return self._statistics().sorted_tags()
 
     def create_cheatsheet(self, title: str, tags: List[str], items: List[Dict], language: str = None) -> str:
         """Create a new cheatsheet"""
-        # Generate filename from title
-        filename = self._generate_filename(title)
+        if self.read_only:
+            raise PermissionError(f"Read-only library: {self.data_path}")
 
         # Use default language if not specified
         if language is None:
@@ -96,108 +359,635 @@ class CheatSheetManager:
             "title": title,
             "language": language,
             "tags": tags,
-            "items": items,
+            "items": assign_item_ids(items),
             "created": datetime.now().strftime("%Y-%m-%d"),
             "updated": datetime.now().strftime("%Y-%m-%d")
         }
 
-        file_path = self.data_path / f"{filename}.json"
-
-        with open(file_path, 'w', encoding='utf-8') as f:
-            json.dump(cheatsheet_data, f, indent=2, ensure_ascii=False)
-
+        # Generate filename from title; the exclusive create skips a file
+        # another process wrote since the names were loaded
+        while True:
+            filename = self._generate_filename(title)
+            try:
+                self._write_sheet_file(filename, cheatsheet_data,
+                                       exclusive=True)
+                break
+            except FileExistsError:
+                continue
+            except OSError:
+                self.filenames.release(filename)
+                raise
+        self._clear_whiteout(filename)
+
+        self.index.store(filename, cheatsheet_data)
+        self.index.save()
+        self._notify_change('created', filename)
         return filename
 
     def update_cheatsheet(self, filename: str, title: str, tags: List[str], items: List[Dict], language: str = None) -> bool:
         """Update an existing cheatsheet"""
-        file_path = self.data_path / f"{filename}.json"
+        if self.read_only or not is_sheet_filename(filename):
+            return False
 
-        if not file_path.exists():
+        # Load existing data to preserve creation date and item ids; a
+        # sheet of a lower root is copied to data_path on write
+        self.index.refresh_file(filename)
+        existing_data = self.index.get(filename)
+        if existing_data is None:
             return False
+        existing_items = assign_item_ids(existing_data.get('items', []))
 
-        try:
-            # Load existing data to preserve creation date
-            with open(file_path, 'r', encoding='utf-8') as f:
-                existing_data = json.load(f)
-
-            # Use existing language or default if not specified
-            if language is None:
-                language = existing_data.get('language', self.default_language)
-
-            cheatsheet_data = {
-                "title": title,
-                "language": language,
-                "tags": tags,
-                "items": items,
-                "created": existing_data.get("created", datetime.now().strftime("%Y-%m-%d")),
-                "updated": datetime.now().strftime("%Y-%m-%d")
-            }
+        # Use existing language or default if not specified
+        if language is None:
+            language = existing_data.get('language', self.default_language)
 
-            with open(file_path, 'w', encoding='utf-8') as f:
-                json.dump(cheatsheet_data, f, indent=2, ensure_ascii=False)
+        cheatsheet_data = {
+            "title": title,
+            "language": language,
+            "tags": tags,
+            "items": assign_item_ids(items, existing_items),
+            "created": existing_data.get("created", datetime.now().strftime("%Y-%m-%d")),
+            "updated": datetime.now().strftime("%Y-%m-%d")
+        }
 
+        # Nothing changed: keep the file and its updated date
+        if (sheet_content_hash(cheatsheet_data) ==
+                sheet_content_hash(dict(existing_data, items=existing_items))):
             return True
 
-        except (json.JSONDecodeError, FileNotFoundError):
+        try:
+            self._write_sheet_file(filename, cheatsheet_data)
+        except OSError as e:
+            print(f"Error saving cheatsheet {filename}: {e}")
             return False
 
+        # Only the items that differ get their search text rebuilt
+        self.index.store_items(
+            filename, cheatsheet_data,
+            *self._changed_range(existing_items, cheatsheet_data['items']))
+        self.index.save()
+        self._notify_change('updated', filename)
+        return True
+
     def delete_cheatsheet(self, filename: str) -> bool:
         """Delete a cheatsheet"""
+        if self.read_only or not is_sheet_filename(filename):
+            return False
+
         file_path = self.data_path / f"{filename}.json"
 
-        if not file_path.exists():
+        try:
+            deleted = file_path.exists()
+            if deleted:
+                file_path.unlink()
+            self.index.refresh_file(filename)
+
+            # Still served by a lower root: hide it with a whiteout
+            if self.index.has(filename):
+                self._whiteout_path(filename).touch()
+                self.index.refresh_file(filename)
+                deleted = True
+        except OSError:
             return False
+        finally:
+            self.index.save()
+
+        if deleted:
+            self._notify_change('deleted', filename)
+        return deleted
+
+    def _write_sheet_file(self, filename: str, data: Dict,
+                          exclusive: bool = False) -> None:
+        """Write a cheatsheet file to data_path, exclusive fails if it exists"""
+        # One write of the whole text, dump() would write it piece by piece
+        payload = json.dumps(sheet_to_dict(data), indent=2, ensure_ascii=False)
+        with open(self.data_path / f"{filename}.json",
+                  'x' if exclusive else 'w', encoding='utf-8') as f:
+            f.write(payload)
+
+    @staticmethod
+    def _changed_range(old: List, new: List) -> Tuple[int, int, int]:
+        """
+        Smallest splice turning old items into new ones
+
+        Returns:
+            (start, removed, inserted): new[start:start + inserted] replaced
+            old[start:start + removed]
+        """
+        start = 0
+        while (start < len(old) and start < len(new) and
+               old[start] == new[start]):
+            start += 1
+        old_end, new_end = len(old), len(new)
+        while (old_end > start and new_end > start and
+               old[old_end - 1] == new[new_end - 1]):
+            old_end -= 1
+            new_end -= 1
+        return start, old_end - start, new_end - start
+
+    def _load_items(self, filename: str) -> Optional[Tuple[Dict, List]]:
+        """Indexed data of a sheet and its items with ids, None if missing"""
+        if not is_sheet_filename(filename):
+            return None
+        action = self.index.refresh_file(filename)
+        if action:
+            self._notify_change(action, filename)
+
+        data = self.index.get(filename)
+        if (data is None or
+                not isinstance(data.get('items', []), (list, tuple))):
+            return None
+        return data, assign_item_ids(data.get('items', []))
+
+    @staticmethod
+    def _find_item(items: List, item_id: str) -> Optional[int]:
+        for position, item in enumerate(items):
+            if isinstance(item, (dict, Item)) and item.get('id') == item_id:
+                return position
+        return None
+
+    def _patch_items(self, filename: str, data: Dict, items: List,
+                     start: int, removed: int, inserted: List) -> bool:
+        """
+        Replace items[start:start + removed] with inserted items
+
+        The file is rewritten once and the index entry is updated in place,
+        re-indexing only the inserted items for search.
+        """
+        sheet = dict(data)
+        sheet['items'] = items[:start] + inserted + items[start + removed:]
+        sheet['updated'] = datetime.now().strftime("%Y-%m-%d")
 
         try:
-            file_path.unlink()
+            self._write_sheet_file(filename, sheet)
+        except OSError as e:
+            print(f"Error saving cheatsheet {filename}: {e}")
+            return False
+
+        self.index.store_items(filename, sheet, start, removed, len(inserted))
+        self.index.save()
+        self._notify_change('updated', filename)
+        return True
+
+    def get_item(self, filename: str, item_id: str) -> Optional[Dict]:
+        """Get one item of a cheatsheet by id"""
+        loaded = self._load_items(filename)
+        if loaded is None:
+            return None
+        items = loaded[1]
+        position = self._find_item(items, item_id)
+        return dict(items[position]) if position is not None else None
+
+    def add_item(self, filename: str, item: Dict,
+                 position: Optional[int] = None) -> Optional[str]:
+        """
+        Add an item to a cheatsheet
+
+        Args:
+            position: Index to insert at, the end by default
+
+        Returns:
+            Id of the new item, None if it could not be added
+        """
+        if self.read_only or self.validate_item(item):
+            return None
+        loaded = self._load_items(filename)
+        if loaded is None:
+            return None
+        data, items = loaded
+
+        if position is None or position > len(items):
+            position = len(items)
+        position = max(position, 0)
+        # Every existing item has an id, so the new one gets a free id
+        new_item = {key: value for key, value in item.items() if key != 'id'}
+        new_item = assign_item_ids(items + [new_item])[-1]
+
+        if not self._patch_items(filename, data, items, position, 0,
+                                 [new_item]):
+            return None
+        return new_item['id']
+
+    def update_item(self, filename: str, item_id: str,
+                    changes: Dict) -> bool:
+        """Change fields (code, description, example) of one item"""
+        if self.read_only:
+            return False
+        loaded = self._load_items(filename)
+        if loaded is None:
+            return False
+        data, items = loaded
+
+        position = self._find_item(items, item_id)
+        if position is None:
+            return False
+        item = dict(items[position])
+        item.update((key, value) for key, value in changes.items()
+                    if key != 'id')
+        if self.validate_item(item):
+            return False
+        if item == items[position]:
             return True
-        except OSError:
+
+        return self._patch_items(filename, data, items, position, 1, [item])
+
+    def delete_item(self, filename: str, item_id: str) -> bool:
+        """Delete one item, a cheatsheet keeps at least one"""
+        if self.read_only:
+            return False
+        loaded = self._load_items(filename)
+        if loaded is None:
             return False
+        data, items = loaded
 
-    def _generate_filename(self, title: str) -> str:
-        """Generate valid filename from title"""
+        position = self._find_item(items, item_id)
+        if position is None or len(items) == 1:
+            return False
+        return self._patch_items(filename, data, items, position, 1, [])
+
+    def move_item(self, filename: str, item_id: str, position: int) -> bool:
+        """Move one item to another position of its cheatsheet"""
+        if self.read_only:
+            return False
+        loaded = self._load_items(filename)
+        if loaded is None:
+            return False
+        data, items = loaded
+
+        current = self._find_item(items, item_id)
+        if current is None:
+            return False
+        position = min(max(position, 0), len(items) - 1)
+        if position == current:
+            return True
+
+        # One splice covering the items between both positions
+        start = min(current, position)
+        end = max(current, position) + 1
+        moved = items[start:end]
+        if current < position:
+            moved = moved[1:] + moved[:1]
+        else:
+            moved = moved[-1:] + moved[:-1]
+        return self._patch_items(filename, data, items, start, end - start,
+                                 moved)
+
+    def apply_batch(self, ops: List[Dict]) -> Dict:
+        """
+        Apply create, update and delete operations as one group
+
+        Operations run in order and are dicts like:
+            {'op': 'create', 'title', 'tags', 'items', 'language'?}
+            {'op': 'update', 'filename', 'title', 'tags', 'items', 'language'?}
+            {'op': 'delete', 'filename'}
+
+        Every operation is validated before anything is written, so a
+        batch with errors changes nothing. Files are written under
+        temporary names and then renamed into place together, the index is
+        saved once and batch callbacks are notified once.
+
+        Returns:
+            'filenames' of each operation and 'errors', empty on success
+        """
+        if self.read_only:
+            raise PermissionError(f"Read-only library: {self.data_path}")
+
+        self._sync_index()
+        today = datetime.now().strftime("%Y-%m-%d")
+
+        # Filename -> data to write, None to delete
+        pending: Dict[str, Optional[Dict]] = {}
+        # Names reserved for creates, released if they end up unused
+        reserved = []
+        filenames = []
+        errors = []
+        for i, op in enumerate(ops):
+            kind = op.get('op') if isinstance(op, dict) else None
+            filename = op.get('filename') if kind else None
+            filenames.append(filename)
+            if kind not in ('create', 'update', 'delete'):
+                errors.append(f"Operation {i+1}: unknown operation {kind!r}")
+                continue
+
+            if kind != 'create':
+                current = (pending[filename] if filename in pending
+                           else self.index.get(filename))
+                if current is None:
+                    errors.append(
+                        f"Operation {i+1}: cheatsheet not found: {filename}")
+                    continue
+                if kind == 'delete':
+                    pending[filename] = None
+                    continue
+
+            try:
+                problems = self.validate_cheatsheet_data(
+                    op.get('title', ''), op.get('tags', []),
+                    op.get('items', []), op.get('language'))
+            except (AttributeError, TypeError):
+                problems = ["Invalid cheatsheet data"]
+            if problems:
+                errors.extend(f"Operation {i+1}: {problem}"
+                              for problem in problems)
+                continue
+
+            if kind == 'create':
+                filename = filenames[i] = self._generate_filename(
+                    op['title'])
+                reserved.append(filename)
+                pending[filename] = {
+                    "title": op['title'],
+                    "language": op.get('language') or self.default_language,
+                    "tags": op['tags'],
+                    "items": assign_item_ids(op['items']),
+                    "created": today,
+                    "updated": today
+                }
+                continue
+
+            existing_items = assign_item_ids(current.get('items', []))
+            sheet = {
+                "title": op['title'],
+                "language": op.get('language') or current.get(
+                    'language', self.default_language),
+                "tags": op['tags'],
+                "items": assign_item_ids(op['items'], existing_items),
+                "created": current.get("created", today),
+                "updated": today
+            }
+            if (sheet_content_hash(sheet) !=
+                    sheet_content_hash(dict(current, items=existing_items))):
+                pending[filename] = sheet
+
+        if errors:
+            for filename in reserved:
+                self.filenames.release(filename)
+            return {'filenames': filenames, 'errors': errors}
+
+        existed = {filename: self.index.has(filename) for filename in pending}
+        # Created and deleted within the batch: nothing to do
+        for filename in reserved:
+            if pending[filename] is None:
+                self.filenames.release(filename)
+                del pending[filename]
+
+        # Group commit: write everything aside, then rename into place
+        written = {}
+        try:
+            for filename, sheet in pending.items():
+                if sheet is None:
+                    continue
+                tmp_path = (self.data_path /
+                            f"{filename}.json.{os.getpid()}.tmp")
+                payload = json.dumps(sheet_to_dict(sheet), indent=2,
+                                     ensure_ascii=False)
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    f.write(payload)
+                written[filename] = tmp_path
+        except OSError as e:
+            for tmp_path in written.values():
+                tmp_path.unlink(missing_ok=True)
+            for filename in reserved:
+                self.filenames.release(filename)
+            return {'filenames': filenames,
+                    'errors': [f"Error writing batch: {e}"]}
+
+        changes = []
+        try:
+            for filename, sheet in pending.items():
+                if sheet is None:
+                    (self.data_path / f"{filename}.json").unlink(
+                        missing_ok=True)
+                    self.index.remove(filename)
+                    # Still served by a lower root: hide it with a whiteout
+                    if self.index.has(filename):
+                        self._whiteout_path(filename).touch()
+                        self.index.remove(filename)
+                    changes.append(('deleted', filename))
+                else:
+                    os.replace(written.pop(filename),
+                               self.data_path / f"{filename}.json")
+                    self._clear_whiteout(filename)
+                    self.index.store(filename, sheet)
+                    changes.append(('updated' if existed[filename]
+                                    else 'created', filename))
+        except OSError as e:
+            print(f"Error applying batch: {e}")
+            errors.append(f"Error applying batch: {e}")
+            for tmp_path in written.values():
+                tmp_path.unlink(missing_ok=True)
+        finally:
+            self.index.save()
+            self._notify_changes(changes)
+
+        return {'filenames': filenames, 'errors': errors}
+
+    def _whiteout_path(self, filename: str) -> Path:
+        """Marker hiding a cheatsheet of the lower roots"""
+        return self.data_path / f"{filename}{WHITEOUT_SUFFIX}"
+
+    def _clear_whiteout(self, filename: str) -> None:
+        """Remove the whiteout of a filename written to data_path"""
+        try:
+            self._whiteout_path(filename).unlink()
+        except FileNotFoundError:
+            pass
+
+    @staticmethod
+    def _slugify(title: str) -> str:
+        """Turn a title into a filename, without checking uniqueness"""
         # Convert to lowercase and replace spaces and special characters
         filename = title.lower()
         filename = ''.join(c if c.isalnum() or c in '-_' else '-' for c in filename)
         # Clean multiple dashes
-        filename = '-'.join(filter(None, filename.split('-')))
+        return '-'.join(filter(None, filename.split('-')))
 
-        # Ensure filename is unique
-        counter = 1
-        original_filename = filename
+    def _used_filenames(self) -> List[str]:
+        """Visible cheatsheets plus every file of data_path, even invalid"""
+        self._sync_index()
+        return self.index.filenames() + self._top.stored_filenames()
 
-        while (self.data_path / f"{filename}.json").exists():
-            filename = f"{original_filename}-{counter}"
-            counter += 1
+    def _generate_filename(self, title: str) -> str:
+        """
+        Generate a unique filename from title and reserve it
 
-        return filename
+        Release it through self.filenames if it ends up unused.
+        """
+        self.filenames.ensure_loaded(self._used_filenames)
+        return self.filenames.reserve(self._slugify(title))
+
+    def item_store(self) -> 'ItemStore':
+        """Columnar snapshot of the library, for scans over every item"""
+        self._sync_index()
+        store = self._item_store
+        if store is None:
+            store = self._item_store = self._load_item_store()
+        return store
+
+    def _load_item_store(self) -> 'ItemStore':
+        """Open the saved item store if it matches the library, else build one"""
+        from item_store import STORE_SUFFIX, ItemStore, StoreError, library_key
+        if self.index is not self._top:
+            # Packed roots hash their sheets by parsing them, checking a
+            # saved store would cost about as much as building it
+            return ItemStore.build(self.index.iter_sheets(),
+                                   self.default_language)
+
+        key = library_key(self.index, self.default_language)
+        store_file = f"{self._top.index_file}{STORE_SUFFIX}"
+        try:
+            store = ItemStore.open(store_file)
+        except StoreError:
+            store = None
+        if store is not None:
+            if store.key == key:
+                return store
+            store.close()
+
+        store = ItemStore.build(self.index.iter_sheets(),
+                                self.default_language, key)
+        try:
+            store.save(store_file)
+        except OSError as e:
+            print(f"Error saving item store {store_file}: {e}")
+        return store
 
-    def search_cheatsheets(self, query: str) -> List[Dict]:
-        """Search cheatsheets by term"""
+    def _matcher(self, query: str) -> Callable[[str], bool]:
+        """Predicate telling whether a filename matches a search term"""
         query = query.lower()
-        all_sheets = self.get_all_cheatsheets()
-        results = []
+        if self.columnar:
+            return set(self.item_store().search(query)).__contains__
+        return lambda filename: self.index.matches(filename, query)
 
-        for sheet in all_sheets:
-            # Search in title
-            if query in sheet.get('title', '').lower():
-                results.append(sheet)
-                continue
+    def search_cheatsheets(self, query: str,
+                           collapse_duplicates: bool = False) -> List[Dict]:
+        """
+        Search cheatsheets by term in titles, tags and items
+
+        With collapse_duplicates, an item with a near-duplicate in an
+        earlier result is left out (see get_duplicate_items).
+        """
+        matches = self._matcher(query)
+        results = self._collect_sheets(
+            lambda filename, data: matches(filename))
+        if collapse_duplicates:
+            results = self._collapse_duplicates(results)
+        return results
+
+    def _duplicate_index(self) -> 'DuplicateIndex':
+        """
+        Near-duplicate item clusters, built on first use
 
-            # Search in tags
-            if any(query in tag.lower() for tag in sheet.get('tags', [])):
-                results.append(sheet)
+        After changes only the items of the changed sheets are hashed
+        again, but the clusters are redone over the whole library: about a
+        fifth of the first build, 0.6s for 20000 items.
+        """
+        self._sync_index()
+        duplicates = self._duplicates
+        if duplicates is None:
+            from item_dedup import DuplicateIndex
+            duplicates = self._duplicates = DuplicateIndex.build(
+                self.index.iter_sheets(cache=False))
+            self._duplicates_changed.clear()
+        elif self._duplicates_changed:
+            changed = sorted(self._duplicates_changed)
+            self._duplicates_changed.clear()
+            duplicates.update((filename, self.index.get(filename, cache=False))
+                              for filename in changed)
+        return duplicates
+
+    def get_duplicate_items(self) -> List[List[Dict]]:
+        """
+        Get clusters of near-duplicate items across the library
+
+        Items are compared by the words of their code and example, so the
+        same command described differently, or in another language, ends
+        up in the same cluster.
+
+        Returns:
+            Clusters, largest first, of {'filename', 'id', 'code',
+            'description'}
+        """
+        return self._duplicate_index().clusters()
+
+    def _collapse_duplicates(self, sheets: List[Dict]) -> List[Dict]:
+        """
+        Drop items with a near-duplicate in an earlier sheet of a list
+
+        Each sheet gets the number of items left out as 'collapsed_items';
+        a sheet left without items is dropped.
+        """
+        duplicates = self._duplicate_index()
+        shown = set()
+        collapsed = []
+        for sheet in sheets:
+            items = sheet.get('items')
+            if not isinstance(items, list):
+                collapsed.append(sheet)
                 continue
+            kept = []
+            clusters = set()
+            for item, with_id in zip(items, assign_item_ids(items)):
+                cluster = (duplicates.cluster_of(sheet['filename'],
+                                                 with_id.get('id'))
+                           if isinstance(with_id, dict) else None)
+                if cluster is None or cluster not in shown:
+                    kept.append(item)
+                    if cluster is not None:
+                        clusters.add(cluster)
+            shown |= clusters
+            if items and not kept:
+                continue
+            sheet['collapsed_items'] = len(items) - len(kept)
+            sheet['items'] = kept
+            collapsed.append(sheet)
+        return collapsed
+
+    def _translation_index(self) -> 'TranslationIndex':
+        """Pairs of language variants, built on first use after a change"""
+        self._sync_index()
+        translations = self._translations
+        if translations is None:
+            from translation_pairs import TranslationIndex
+            translations = self._translations = TranslationIndex.build(
+                self.index.iter_sheets(cache=False),
+                self.get_supported_languages(), self.default_language)
+        return translations
+
+    def get_translations(self, filename: str) -> Dict[str, str]:
+        """
+        Get the other language variants of a cheatsheet
 
-            # Search in items
-            for item in sheet.get('items', []):
-                if (query in item.get('code', '').lower() or 
-                    query in item.get('description', '').lower() or 
-                    query in item.get('example', '').lower()):
-                    results.append(sheet)
-                    break
+        Returns:
+            Language code -> filename, e.g. {'en': 'git-commands-en'}
+        """
+        return self._translation_index().counterparts(filename)
 
-        return results
+    def get_translation_diff(self, source: str, target: str) -> Optional[Dict]:
+        """
+        Compare a cheatsheet with its translation, items matched by code
+
+        Returns:
+            Dict with the codes 'missing' from target, the 'extra' ones only
+            target has and whether target is 'outdated', None if either
+            cheatsheet doesn't exist
+        """
+        return self._translation_index().diff(source, target)
+
+    def get_translation_report(self, filename: Optional[str] = None
+                               ) -> List[Dict]:
+        """
+        Diff translations against the cheatsheet they translate
+
+        Args:
+            filename: Only the translations of this cheatsheet, up to date
+                or not (default: every translation that misses items or is
+                out of date)
+        """
+        translations = self._translation_index()
+        if filename is not None:
+            return translations.sheet_diffs(filename)
+        return translations.report()
 
     def validate_cheatsheet_data(
             self, title: str,
@@ -223,15 +1013,22 @@ class CheatSheetManager:
             errors.append("There must be at least one item")
 
         for i, item in enumerate(items):
-            if not isinstance(item, dict):
-                errors.append(f"Item {i+1}: must be an object")
-                continue
+            for error in self.validate_item(item):
+                errors.append(f"Item {i+1}: {error}")
 
-            if not item.get('code', '').strip():
-                errors.append(f"Item {i+1}: code is required")
+        return errors
 
-            if not item.get('description', '').strip():
-                errors.append(f"Item {i+1}: description is required")
+    def validate_item(self, item: Dict) -> List[str]:
+        """Validate a single item, returns list of errors"""
+        if not isinstance(item, dict):
+            return ["must be an object"]
+
+        errors = []
+        if not item.get('code', '').strip():
+            errors.append("code is required")
+
+        if not item.get('description', '').strip():
+            errors.append("description is required")
 
         return errors
 
@@ -312,29 +1109,17 @@ class CheatSheetManager:
 
     def get_tag_usage_count(self, tag_name: str) -> int:
         """Get the number of cheatsheets that use a specific tag"""
-        all_sheets = self.get_all_cheatsheets()
-        count = 0
+        return self._statistics().tag_usage(tag_name)
 
-        for sheet in all_sheets:
-            if tag_name in sheet.get('tags', []):
-                count += 1
-
-        return count
+    def get_tag_language_usage_count(self, tag_name: str,
+                                     language: str) -> int:
+        """Get the number of cheatsheets in a language that use a tag"""
+        return self._statistics().tag_language_usage(tag_name, language)
 
     def get_tags_with_usage(self) -> List[Dict[str, any]]:
-        """Get all tags with their usage count"""
-        tags = self.get_all_tags()
-        tag_info = []
-
-        for tag in tags:
-            usage_count = self.get_tag_usage_count(tag)
-            tag_info.append({
-                'name': tag,
-                'usage_count': usage_count
-            })
-
-        # Sort by descending usage
-        return sorted(tag_info, key=lambda x: x['usage_count'], reverse=True)
+        """Get all tags with their usage count, by descending usage"""
+        return [{'name': tag, 'usage_count': count}
+                for tag, count in self._statistics().tags_by_usage()]
 
     def get_supported_languages(self) -> Dict[str, str]:
         """Get supported languages"""
@@ -343,22 +1128,15 @@ class CheatSheetManager:
 
     def get_available_languages(self) -> List[str]:
         """Get list of language codes available in cheatsheets"""
-        all_sheets = self.get_all_cheatsheets()
-        languages = set()
-
-        for sheet in all_sheets:
-            languages.add(sheet.get('language', self.default_language))
-
-        return sorted(list(languages))
+        return sorted(self._statistics().languages())
 
     def get_cheatsheets_by_language(self, language: str) -> List[Dict]:
         """Get cheatsheets filtered by language"""
         if not self.validate_language(language):
             return []
 
-        all_sheets = self.get_all_cheatsheets()
-        return [sheet for sheet in all_sheets
-                if sheet.get('language', self.default_language) == language]
+        return self._collect_sheets(
+            lambda filename, data: self._sheet_language(data) == language)
 
     def get_cheatsheets_by_tag_and_language(
             self,
@@ -369,42 +1147,59 @@ class CheatSheetManager:
         if not self.validate_language(language):
             return []
 
-        sheets_by_tag = self.get_cheatsheets_by_tag(tag)
-        return [sheet for sheet in sheets_by_tag
-                if sheet.get('language', self.default_language) == language]
+        if tag == "all":
+            return self.get_cheatsheets_by_language(language)
+
+        return self._collect_sheets(
+            lambda filename, data: (
+                tag in data.get('tags', []) and
+                self._sheet_language(data) == language))
 
     def search_cheatsheets_by_language(
             self,
             query: str,
-            language: str
+            language: str,
+            collapse_duplicates: bool = False
             ) -> List[Dict]:
         """Search cheatsheets by term in a specific language"""
         if not self.validate_language(language):
             return []
 
-        all_results = self.search_cheatsheets(query)
-        return [sheet for sheet in all_results
-                if sheet.get('language', self.default_language) == language]
+        matches = self._matcher(query)
+        results = self._collect_sheets(
+            lambda filename, data: (
+                self._sheet_language(data) == language and
+                matches(filename)))
+        if collapse_duplicates:
+            results = self._collapse_duplicates(results)
+        return results
 
     def get_language_statistics(self) -> Dict[str, Dict]:
         """Get statistics per language"""
-        all_sheets = self.get_all_cheatsheets()
-        stats = {}
+        counts = self._statistics()
 
+        stats = {}
         supported_langs = self.languages_config.get('supported_languages', {})
         for lang_code, lang_info in supported_langs.items():
-            sheets_count = len([
-                s for s in all_sheets
-                if s.get('language', self.default_language) == lang_code
-            ])
             stats[lang_code] = {
                 'name': lang_info['name'],
                 'flag': lang_info.get('flag', ''),
-                'count': sheets_count
+                'count': counts.language_count(lang_code),
+                'items': counts.language_items(lang_code)
             }
 
         return stats
 
+    def get_library_statistics(self) -> Dict:
+        """Get totals of cheatsheets, items and tags, plus per-language stats"""
+        counts = self._statistics()
+        return {
+            'cheatsheets': counts.sheet_count,
+            'items': counts.item_count,
+            'tags': counts.tag_count,
+            'languages': self.get_language_statistics()
+        }
+
     def migrate_cheatsheets_language(
             self,
             from_language: str,
@@ -415,69 +1210,390 @@ class CheatSheetManager:
                 not self.validate_language(to_language)):
             return 0
 
-        modified_count = 0
-        sheets_to_migrate = self.get_cheatsheets_by_language(from_language)
-
-        for sheet in sheets_to_migrate:
-            success = self.update_cheatsheet(
-                sheet['filename'],
-                sheet['title'],
-                sheet['tags'],
-                sheet['items'],
-                to_language
-            )
-            if success:
-                modified_count += 1
+        plan = self.plan_language_migration(from_language, to_language)
+        return len(self.apply_language_migration(plan)['migrated'])
 
-        return modified_count
+    def plan_language_migration(
+            self,
+            from_language: Optional[str] = None,
+            to_language: Optional[str] = None
+            ) -> List[Dict]:
+        """
+        Plan a change of the language of many cheatsheets, writing nothing
+
+        Args:
+            from_language: Cheatsheets in this language (default: those
+                without a language field)
+            to_language: Their new language (default: detected for each)
+
+        Returns:
+            One entry per cheatsheet whose language changes, in filename
+            order: 'filename', 'from' (None if unset), 'to' and the content
+            'hash' it has now
+        """
+        self._sync_index()
+        plan = []
+        batch = []
+
+        def add_batch():
+            targets = ([to_language] * len(batch) if to_language else
+                       self.detect_languages([data for _, data in batch]))
+            for (filename, data), target in zip(batch, targets):
+                if target != self._sheet_language(data) or not data.get(
+                        'language'):
+                    plan.append({'filename': filename,
+                                 'from': data.get('language'),
+                                 'to': target,
+                                 'hash': self.index.get_hash(filename)})
+            batch.clear()
+
+        for filename, data in self.index.iter_sheets(cache=False):
+            if (self._sheet_language(data) == from_language
+                    if from_language else not data.get('language')):
+                batch.append((filename, data))
+                if len(batch) >= LANGUAGE_DETECTION_BATCH:
+                    add_batch()
+        add_batch()
+        return sorted(plan, key=lambda entry: entry['filename'])
+
+    def _migrated_sheet(self, entry: Dict) -> Tuple[str, Optional[Dict]]:
+        """
+        The new data of a planned cheatsheet, or why it is left alone
+
+        Returns ('migrate', data), ('done', None) if a previous run already
+        migrated it, or ('changed', None) / ('missing', None).
+        """
+        filename = entry['filename']
+        data = self.index.get(filename, cache=False)
+        if data is None:
+            return 'missing', None
+        if data.get('language') == entry['to']:
+            return 'done', None
+        if self.index.get_hash(filename) != entry['hash']:
+            return 'changed', None
+
+        sheet = sheet_to_dict(data)
+        sheet['language'] = entry['to']
+        sheet['items'] = assign_item_ids(sheet.get('items', []))
+        sheet['updated'] = datetime.now().strftime("%Y-%m-%d")
+        return 'migrate', sheet
+
+    def _write_migrated(self, filename: str, sheet: Dict) -> None:
+        """Replace a cheatsheet file atomically (runs in a worker)"""
+        from language_migration import write_file_atomic
+        write_file_atomic(self.data_path / f"{filename}.json",
+                          json.dumps(sheet, indent=2, ensure_ascii=False))
+
+    def apply_language_migration(
+            self,
+            plan: Optional[List[Dict]] = None,
+            checkpoint_file: Optional[Union[str, Path]] = None,
+            workers: Optional[int] = None,
+            progress: Optional[Callable[[int, int], None]] = None
+            ) -> Dict:
+        """
+        Write the new language of every cheatsheet of a plan
+
+        Files are written by a thread pool, each to a temporary file moved
+        into place, so a file is either migrated or untouched. A cheatsheet
+        changed since the plan was made is skipped.
+
+        Args:
+            plan: Entries of plan_language_migration (default: the plan of
+                the checkpoint, to resume it)
+            checkpoint_file: Where the plan and each migrated filename are
+                recorded; a migration stopped halfway resumes from it, and
+                it is deleted once the plan is done
+            workers: Writer threads (default: up to 8)
+            progress: Called with (finished, total) after each cheatsheet
+
+        Returns:
+            'migrated' filenames, 'skipped' [{'filename', 'reason'}],
+            'resumed' (files a previous run migrated), 'total' and 'seconds'
+
+        Raises:
+            MigrationError: The checkpoint can't be read or belongs to
+                another plan
+        """
+        if self.read_only:
+            raise PermissionError(f"Read-only library: {self.data_path}")
+
+        from collections import deque
+        from concurrent.futures import ThreadPoolExecutor
+        from language_migration import MigrationCheckpoint
+
+        start = time.perf_counter()
+        checkpoint = done = None
+        if checkpoint_file is not None:
+            checkpoint = MigrationCheckpoint(checkpoint_file)
+            saved = checkpoint.load()
+            if saved is not None and (plan is None or saved[0] == plan):
+                plan, done = saved
+            elif plan is not None:
+                checkpoint.start(plan)
+        plan = plan or []
+        done = done or set()
+
+        self._sync_index()
+        migrated = []
+        skipped = []
+        changes = []
+        finished = len(done)
+        workers = workers or min(8, os.cpu_count() or 1)
+
+        def finish(filename: str) -> None:
+            nonlocal finished
+            finished += 1
+            if checkpoint is not None:
+                checkpoint.record(filename)
+            if progress is not None:
+                progress(finished, len(plan))
+
+        try:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                # A bounded number of sheets in flight keeps memory flat
+                pending = deque()
+
+                def collect(filename, sheet, future) -> None:
+                    try:
+                        future.result()
+                    except OSError as e:
+                        skipped.append({'filename': filename,
+                                        'reason': str(e)})
+                        return
+                    self._clear_whiteout(filename)
+                    action = self.index.store(filename, sheet)
+                    if action:
+                        changes.append((action, filename))
+                    migrated.append(filename)
+                    finish(filename)
+
+                for entry in plan:
+                    filename = entry['filename']
+                    if filename in done:
+                        continue
+                    state, sheet = self._migrated_sheet(entry)
+                    if state == 'done':
+                        finish(filename)
+                        continue
+                    if state != 'migrate':
+                        skipped.append({'filename': filename,
+                                        'reason': state})
+                        continue
+                    pending.append((filename, sheet, pool.submit(
+                        self._write_migrated, filename, sheet)))
+                    if len(pending) >= workers * 4:
+                        collect(*pending.popleft())
+                while pending:
+                    collect(*pending.popleft())
+        finally:
+            self.index.save()
+            self._notify_changes(changes)
+            if checkpoint is not None:
+                checkpoint.close()
+
+        if checkpoint is not None and finished == len(plan):
+            checkpoint.remove()
+        return {
+            'migrated': migrated,
+            'skipped': skipped,
+            'resumed': len(done),
+            'total': len(plan),
+            'seconds': time.perf_counter() - start
+        }
+
+    def _transfer_report(self, count: int, size: int, start: float) -> Dict:
+        """Throughput of a bundle export or import"""
+        seconds = max(time.perf_counter() - start, 1e-9)
+        return {
+            'sheets': count,
+            'bytes': size,
+            'seconds': seconds,
+            'sheets_per_second': count / seconds,
+            'megabytes_per_second': size / seconds / (1024 * 1024)
+        }
+
+    def export_bundle(
+            self,
+            target: Union[str, BinaryIO],
+            filenames: Optional[List[str]] = None
+            ) -> Dict:
+        """
+        Export cheatsheets to a bundle file or binary stream
+
+        Args:
+            target: Path or writable binary file (may be non-seekable)
+            filenames: Cheatsheets to export, all of them by default
+
+        Returns:
+            Throughput report, plus 'missing' filenames that were skipped
+        """
+        start = time.perf_counter()
+        self._sync_index()
+        if filenames is None:
+            filenames = [filename for filename, _ in self.index.iter_sheets()]
+
+        from bundle import BundleWriter
+        missing = []
+        with BundleWriter(target) as writer:
+            for filename in filenames:
+                data = self.index.get(filename)
+                if data is None:
+                    missing.append(filename)
+                    continue
+                info = {'title': data.get('title', ''),
+                        'language': self._sheet_language(data)}
+                source_path = self.index.source_path(filename)
+                if source_path is not None:
+                    writer.add_file(filename, str(source_path), info)
+                else:
+                    writer.add_bytes(
+                        filename, self.index.get_bytes(filename), info)
+
+        report = self._transfer_report(
+            len(writer.sheets), writer.bytes_written, start)
+        report['missing'] = missing
+        return report
+
+    def import_bundle(
+            self,
+            source: Union[str, BinaryIO],
+            overwrite: bool = False,
+            workers: Optional[int] = None,
+            detect_language: bool = False
+            ) -> Dict:
+        """
+        Import the cheatsheets of a bundle
+
+        Entries are parsed in parallel and written as they arrive. A
+        filename already in the library gets a numbered suffix, like new
+        cheatsheets do, unless overwrite is set. With detect_language,
+        cheatsheets without a language are written with the detected one.
+
+        Returns:
+            Throughput report, plus 'imported' filenames, 'renamed'
+            {bundle filename: library filename} and 'errors'
+        """
+        if self.read_only:
+            raise PermissionError(f"Read-only library: {self.data_path}")
+
+        start = time.perf_counter()
+        self._sync_index()
+
+        imported = []
+        renamed = {}
+        errors = []
+        changes = []
+        total_bytes = 0
+
+        from bundle import BundleReader
+        try:
+            with BundleReader(source) as reader:
+                entries = reader.iter_sheets(workers)
+                if detect_language:
+                    entries = self._label_languages(entries)
+                for name, raw, data, error in entries:
+                    if error is None:
+                        try:
+                            problems = self.validate_cheatsheet_data(
+                                data.get('title', ''), data.get('tags', []),
+                                data.get('items', []), data.get('language'))
+                        except (AttributeError, TypeError):
+                            problems = ["Invalid cheatsheet data"]
+                        error = '; '.join(problems) or None
+                    if error is not None:
+                        errors.append({'filename': name, 'error': error})
+                        continue
+
+                    filename = self._slugify(name) or self._slugify(
+                        data['title'])
+                    exclusive = not (overwrite and filename)
+                    base = filename or data['title']
+                    try:
+                        while True:
+                            if exclusive:
+                                filename = self._generate_filename(base)
+                            try:
+                                with open(self.data_path / f"{filename}.json",
+                                          'xb' if exclusive else 'wb') as f:
+                                    f.write(raw)
+                                break
+                            except FileExistsError:
+                                continue
+                    except OSError as e:
+                        if exclusive:
+                            self.filenames.release(filename)
+                        errors.append({'filename': name, 'error': str(e)})
+                        continue
+                    self._clear_whiteout(filename)
+
+                    action = self.index.store(filename, data)
+                    if action:
+                        changes.append((action, filename))
+                    imported.append(filename)
+                    total_bytes += len(raw)
+                    if filename != name:
+                        renamed[name] = filename
+        finally:
+            self.index.save()
+            self._notify_changes(changes)
+
+        report = self._transfer_report(len(imported), total_bytes, start)
+        report.update(imported=imported, renamed=renamed, errors=errors)
+        return report
+
+    def detect_languages(self, sheets: List[Mapping]) -> List[str]:
+        """
+        Detect the language of cheatsheets from their title and descriptions
+
+        Returns:
+            One supported language code per cheatsheet, the default
+            language for those without any words
+        """
+        if not sheets:
+            return []
+        if self._detector is None:
+            from language_detector import LanguageDetector
+            try:
+                self._detector = LanguageDetector.load(
+                    languages=self.get_supported_languages())
+            except (OSError, ValueError, KeyError) as e:
+                print(f"Error loading language profiles: {e}")
+                return [self.default_language] * len(sheets)
+        return self._detector.detect_sheets(sheets, self.default_language)
+
+    def _label_languages(self, entries: Iterable[Tuple]) -> Iterator[Tuple]:
+        """Give bundle entries without a language the detected one"""
+        batch = []
+        for entry in entries:
+            batch.append(entry)
+            if len(batch) >= LANGUAGE_DETECTION_BATCH:
+                yield from self._label_batch(batch)
+                batch = []
+        yield from self._label_batch(batch)
+
+    def _label_batch(self, batch: List[Tuple]) -> List[Tuple]:
+        """Detect the languages missing in a batch of bundle entries"""
+        unlabelled = [position for position, (_, _, data, error)
+                      in enumerate(batch)
+                      if error is None and isinstance(data, dict) and
+                      not data.get('language')]
+        languages = self.detect_languages(
+            [batch[position][2] for position in unlabelled])
+        for position, language in zip(unlabelled, languages):
+            name, _, data, error = batch[position]
+            data = dict(data, language=language)
+            raw = json.dumps(data, indent=2, ensure_ascii=False).encode('utf-8')
+            batch[position] = (name, raw, data, error)
+        return batch
 
     def validate_language(self, language: str) -> bool:
         """Validate if a language is supported"""
         return language in self.languages_config.get('supported_languages', {})
 
-    def _load_languages_config(self) -> None:
-        """Load languages configuration from JSON file"""
-        try:
-            with open(self.languages_file, 'r', encoding='utf-8') as f:
-                self.languages_config = json.load(f)
-        except (FileNotFoundError, json.JSONDecodeError) as e:
-            error_msg = (
-                f"Error loading languages config from {self.languages_file}: {e}"
-            )
-            print(error_msg)
-            # Default configuration if loading fails
-            self.languages_config = {
-                'default_language': 'es',
-                'supported_languages': {
-                    'es': {
-                        'name': 'Español',
-                        'flag': '🇪🇸',
-                        'interface': {
-                            'error_language_unsupported': (
-                                'Idioma no soportado. Idiomas disponibles'
-                            )
-                        }
-                    },
-                    'en': {
-                        'name': 'English',
-                        'flag': '🇺🇸',
-                        'interface': {
-                            'error_language_unsupported': (
-                                'Language not supported. Available languages'
-                            )
-                        }
-                    }
-                }
-            }
-
     def reload_languages_config(self) -> bool:
         """Reload languages configuration from file"""
-        try:
-            self._load_languages_config()
-            return True
-        except Exception as e:
-            print(f"Error reloading languages config: {e}")
-            return False
+        return self.config_service.reload()
 
     def get_interface_text(
             self, key: str, language: Optional[str] = None
@@ -486,10 +1602,7 @@ class CheatSheetManager:
         if language is None:
             language = self.default_language
 
-        supported_langs = self.languages_config.get('supported_languages', {})
-        lang_config = supported_langs.get(language, {})
-        interface_texts = lang_config.get('interface', {})
-
+        interface_texts = self.config_service.get_interface(language)
         return interface_texts.get(key, key)
 
     def get_language_info(self, language: str) -> Dict:
@@ -502,64 +1615,26 @@ class CheatSheetManager:
             interface: Optional[Dict] = None
     ) -> bool:
         """Add a new language to the configuration"""
-        if interface is None:
-            interface = {}
-
-        new_language = {
-            'name': name,
-            'flag': flag,
-            'interface': interface
-        }
-
-        supported_langs = self.languages_config.setdefault('supported_languages', {})
-        supported_langs[code] = new_language
-
-        # Save changes to file
-        return self._save_languages_config()
+        return self.config_service.add_language(code, name, flag, interface)
 
     def remove_language(self, code: str) -> bool:
         """Remove a language from the configuration"""
         if code == self.default_language:
             return False  # Cannot remove default language
 
-        supported_languages = self.languages_config.get(
-            'supported_languages', {}
-        )
-        if code in supported_languages:
-            del supported_languages[code]
-            return self._save_languages_config()
-
-        return False
+        return self.config_service.remove_language(code)
 
     def update_language_interface(
             self, code: str, interface_updates: Dict
     ) -> bool:
         """Update interface texts for a language"""
-        supported_langs = self.languages_config.get('supported_languages', {})
-        lang_config = supported_langs.get(code)
-        if not lang_config:
-            return False
-
-        lang_config.setdefault('interface', {}).update(interface_updates)
-        return self._save_languages_config()
-
-    def _save_languages_config(self) -> bool:
-        """Save languages configuration to file"""
-        try:
-            with open(self.languages_file, 'w', encoding='utf-8') as f:
-                json.dump(
-                    self.languages_config, f, indent=2, ensure_ascii=False
-                )
-            return True
-        except Exception as e:
-            print(f"Error saving languages config: {e}")
-            return False
+        return self.config_service.update_interface(code, interface_updates)
 
     def validate_languages_config(self) -> List[str]:
         """Validate the structure of the languages configuration"""
         errors = []
 
-        if not isinstance(self.languages_config, dict):
+        if not isinstance(self.languages_config, Mapping):
             errors.append("Configuration must be a JSON object")
             return errors
 
@@ -567,11 +1642,11 @@ class CheatSheetManager:
             errors.append("Missing 'supported_languages' key")
         else:
             supported = self.languages_config['supported_languages']
-            if not isinstance(supported, dict):
+            if not isinstance(supported, Mapping):
                 errors.append("'supported_languages' must be an object")
             else:
                 for code, info in supported.items():
-                    if not isinstance(info, dict):
+                    if not isinstance(info, Mapping):
                         errors.append(f"Language '{code}': must be an object")
                         continue
 
@@ -581,7 +1656,7 @@ class CheatSheetManager:
                         )
 
                     if ('interface' in info and
-                            not isinstance(info['interface'], dict)):
+                            not isinstance(info['interface'], Mapping)):
                         errors.append(
                             f"Language '{code}': 'interface' must be an object"
                         )
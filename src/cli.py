@@ -0,0 +1,487 @@
+#!/usr/bin/env python3
+"""
+Command Line Interface
+Query the cheatsheet library from a terminal, without starting Tk
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, TextIO
+
+from cheatsheet_manager import CheatSheetManager, default_library_roots
+from query_daemon import connect_manager
+
+
+USER_DATA_PATH = Path.home() / '.local' / 'share' / 'floating-cheatsheets'
+
+
+def load_user_config() -> Dict:
+    """Load the widget configuration, empty if there is none"""
+    try:
+        with open(USER_DATA_PATH / 'config.json', 'r') as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return {}
+
+
+def create_manager(data_path: str = None,
+                   roots: List[str] = None,
+                   columnar: bool = False) -> CheatSheetManager:
+    """
+    Create a manager for a library
+
+    Without a data path it is the widget's library, with the system and
+    shared roots under the user directory.
+    """
+    if data_path is None:
+        config = load_user_config()
+        data_path = config.get('data_path', str(USER_DATA_PATH / 'cheatsheets'))
+        roots = default_library_roots(config) + (roots or [])
+    return CheatSheetManager(data_path, roots=roots, columnar=columnar)
+
+
+def print_json(data) -> None:
+    """Print data as JSON for piping into other tools"""
+    json.dump(data, sys.stdout, indent=2, ensure_ascii=False)
+    sys.stdout.write('\n')
+
+
+def format_sheet_line(sheet: Dict) -> str:
+    """One-line summary of a cheatsheet"""
+    tags = ', '.join(sheet.get('tags', []))
+    return (f"{sheet['filename']}\t{sheet.get('title', '')}\t"
+            f"({sheet.get('language', '')})\t[{tags}]")
+
+
+def format_sheet_text(sheet: Dict) -> str:
+    """Plain-text rendering of a cheatsheet, like the viewer window"""
+    lines = [sheet.get('title', ''), '=' * len(sheet.get('title', ''))]
+    if sheet.get('tags'):
+        lines.append("Tags: " + ", ".join(sheet['tags']))
+    lines.append('')
+
+    for item in sheet.get('items', []):
+        lines.append(f"🔹 {item.get('code', '')}")
+        lines.append(f"   {item.get('description', '')}")
+        if item.get('example'):
+            for example_line in item['example'].split('\n'):
+                lines.append(f"      {example_line}")
+        lines.append('')
+
+    return '\n'.join(lines)
+
+
+def format_sheet_markdown(sheet: Dict) -> str:
+    """Markdown rendering of a cheatsheet"""
+    lines = [f"# {sheet.get('title', '')}", '']
+    if sheet.get('tags'):
+        lines.append(' '.join(f"`{tag}`" for tag in sheet['tags']))
+        lines.append('')
+
+    for item in sheet.get('items', []):
+        lines.append(f"## `{item.get('code', '')}`")
+        lines.append('')
+        lines.append(item.get('description', ''))
+        lines.append('')
+        if item.get('example'):
+            lines.extend(['```', item['example'], '```', ''])
+
+    return '\n'.join(lines)
+
+
+def filter_sheets(sheets: List[Dict], tag: str = None,
+                  language: str = None) -> List[Dict]:
+    """Apply optional tag and language filters"""
+    if tag:
+        sheets = [s for s in sheets if tag in s.get('tags', [])]
+    if language:
+        sheets = [s for s in sheets if s.get('language') == language]
+    return sheets
+
+
+def sheet_filter(manager, tag: str = None, language: str = None
+                 ) -> Optional[Callable[[str, Dict], bool]]:
+    """filter_sheets() as a predicate for manager.iter_cheatsheets()"""
+    if not tag and not language:
+        return None
+    default_language = manager.default_language
+
+    def matches(filename: str, data: Dict) -> bool:
+        return ((not tag or tag in data.get('tags', [])) and
+                (not language or
+                 data.get('language', default_language) == language))
+    return matches
+
+
+def filtered_filenames(manager, tag: str = None,
+                       language: str = None) -> List[str]:
+    """Filenames of the cheatsheets passing the tag and language filters"""
+    return [sheet['filename'] for sheet in manager.iter_cheatsheets(
+        sheet_filter(manager, tag, language), fields=[])]
+
+
+def cmd_search(manager, args) -> int:
+    """Search cheatsheets by term"""
+    results = filter_sheets(
+        manager.search_cheatsheets(args.query, args.collapse),
+        args.tag, args.language)
+
+    if args.json:
+        print_json(results)
+    else:
+        for sheet in results:
+            print(format_sheet_line(sheet))
+
+    return 0 if results else 1
+
+
+def cmd_show(manager, args) -> int:
+    """Show one cheatsheet"""
+    sheet = manager.get_cheatsheet_by_filename(args.filename)
+    if sheet is None:
+        print(f"Cheatsheet not found: {args.filename}", file=sys.stderr)
+        return 1
+
+    if args.json:
+        print_json(sheet)
+    else:
+        print(format_sheet_text(sheet))
+
+    return 0
+
+
+def cmd_tags(manager, args) -> int:
+    """List tags with their usage count"""
+    tags_info = manager.get_tags_with_usage()
+
+    if args.json:
+        print_json(tags_info)
+    else:
+        for tag_info in tags_info:
+            print(f"{tag_info['name']}\t{tag_info['usage_count']}")
+
+    return 0
+
+
+def cmd_stats(manager, args) -> int:
+    """Show library statistics"""
+    stats = manager.get_library_statistics()
+
+    if args.json:
+        print_json(stats)
+    else:
+        print(f"Cheatsheets: {stats['cheatsheets']}")
+        print(f"Items: {stats['items']}")
+        print(f"Tags: {stats['tags']}")
+        for code, info in stats['languages'].items():
+            print(f"  {info['name']} ({code}): {info['count']}")
+
+    return 0
+
+
+def print_transfer_report(report: Dict) -> None:
+    """Print the throughput of a bundle export or import"""
+    print(f"{report['sheets']} cheatsheets, "
+          f"{report['bytes'] / 1024:.0f} KiB in {report['seconds']:.2f}s "
+          f"({report['sheets_per_second']:.0f} sheets/s, "
+          f"{report['megabytes_per_second']:.1f} MiB/s)", file=sys.stderr)
+
+
+def cmd_export(manager, args) -> int:
+    """Export cheatsheets as JSON, Markdown, TSV items or a bundle"""
+    if args.format == 'bundle':
+        return export_bundle(manager, args)
+    if args.format == 'tsv':
+        return export_items(manager, args)
+
+    if args.filenames:
+        sheets = []
+        for filename in args.filenames:
+            sheet = manager.get_cheatsheet_by_filename(filename)
+            if sheet is None:
+                print(f"Cheatsheet not found: {filename}", file=sys.stderr)
+                return 1
+            sheets.append(sheet)
+    else:
+        # Streamed in filename order, one sheet in memory at a time
+        sheets = manager.iter_cheatsheets(
+            sheet_filter(manager, args.tag, args.language))
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            write_sheets(f, sheets, args.format)
+    else:
+        write_sheets(sys.stdout, sheets, args.format)
+
+    return 0
+
+
+def write_sheets(output: TextIO, sheets: Iterable[Dict], fmt: str) -> None:
+    """Write cheatsheets as Markdown or a JSON array, as they come"""
+    if fmt == 'markdown':
+        for number, sheet in enumerate(sheets):
+            output.write(('\n' if number else '') +
+                         format_sheet_markdown(sheet))
+        return
+
+    count = 0
+    for sheet in sheets:
+        # Same text as json.dumps(list, indent=2), one element at a time
+        text = json.dumps(sheet, indent=2, ensure_ascii=False)
+        output.write((',\n  ' if count else '[\n  ') +
+                     text.replace('\n', '\n  '))
+        count += 1
+    output.write('\n]\n' if count else '[]\n')
+
+
+def export_bundle(manager, args) -> int:
+    """Export cheatsheets as a bundle to a file or a pipe"""
+    filenames = args.filenames or None
+    if filenames is None and (args.tag or args.language):
+        filenames = filtered_filenames(manager, args.tag, args.language)
+
+    if args.output:
+        report = manager.export_bundle(args.output, filenames)
+    elif sys.stdout.isatty():
+        print("Refusing to write a bundle to a terminal, use -o",
+              file=sys.stderr)
+        return 1
+    else:
+        report = manager.export_bundle(sys.stdout.buffer, filenames)
+
+    for filename in report['missing']:
+        print(f"Cheatsheet not found: {filename}", file=sys.stderr)
+    print_transfer_report(report)
+    return 1 if report['missing'] else 0
+
+
+def export_items(manager, args) -> int:
+    """Export one TSV line per item, read from the columnar item store"""
+    store = manager.item_store()
+    wanted = None
+    if args.filenames or args.tag or args.language:
+        wanted = set(args.filenames) if args.filenames else None
+        if args.tag or args.language:
+            filtered = set(filtered_filenames(manager, args.tag,
+                                              args.language))
+            wanted = filtered if wanted is None else wanted & filtered
+    sheet_ids = [sheet_id for sheet_id in range(store.sheet_count)
+                 if wanted is None or store.filename(sheet_id) in wanted]
+    found = {store.filename(sheet_id) for sheet_id in sheet_ids}
+    for filename in args.filenames:
+        if filename not in found:
+            print(f"Cheatsheet not found: {filename}", file=sys.stderr)
+            return 1
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            store.export_tsv(f, sheet_ids)
+    else:
+        store.export_tsv(sys.stdout, sheet_ids)
+    return 0
+
+
+def cmd_import(manager, args) -> int:
+    """Import the cheatsheets of a bundle"""
+    from bundle import BundleError
+    try:
+        report = manager.import_bundle(args.bundle, args.overwrite,
+                                       args.workers, args.detect_language)
+    except (BundleError, OSError) as e:
+        print(f"Error importing {args.bundle}: {e}", file=sys.stderr)
+        return 1
+
+    for original, filename in report['renamed'].items():
+        print(f"Renamed {original} -> {filename}", file=sys.stderr)
+    for error in report['errors']:
+        print(f"Skipped {error['filename']}: {error['error']}",
+              file=sys.stderr)
+    print_transfer_report(report)
+    return 1 if report['errors'] else 0
+
+
+def cmd_check(manager, args) -> int:
+    """Check every cheatsheet file of the library roots (fsck)"""
+    from library_check import check_library
+    roots = args.paths or ([str(root) for root in manager.roots] +
+                           [str(manager.data_path)])
+    languages = manager.get_supported_languages()
+    reports = [check_library(root, languages, manager.default_language,
+                             args.workers, args.processes)
+               for root in roots]
+
+    if args.json:
+        print_json({'roots': reports})
+    else:
+        for report in reports:
+            for problem in report['problems']:
+                print(f"{Path(report['root']) / problem['file']}: "
+                      f"{problem['severity']}: {problem['kind']}: "
+                      f"{problem['message']}")
+            print(f"{report['root']}: {report['files']} files, "
+                  f"{report['errors']} errors, {report['warnings']} warnings "
+                  f"({report['seconds']:.2f}s)", file=sys.stderr)
+
+    return 1 if any(report['errors'] for report in reports) else 0
+
+
+def cmd_duplicates(manager, args) -> int:
+    """List clusters of near-duplicate items"""
+    clusters = manager.get_duplicate_items()
+
+    if args.json:
+        print_json(clusters)
+    else:
+        for cluster in clusters:
+            print(f"{len(cluster)} items:")
+            for item in cluster:
+                print(f"  {item['filename']}#{item['id']}\t{item['code']}")
+
+    return 0
+
+
+def cmd_translations(manager, args) -> int:
+    """List missing and out-of-date translations"""
+    if (args.filename and
+            manager.get_cheatsheet_by_filename(args.filename) is None):
+        print(f"Cheatsheet not found: {args.filename}", file=sys.stderr)
+        return 1
+    report = manager.get_translation_report(args.filename)
+
+    if args.json:
+        print_json(report)
+    else:
+        for diff in report:
+            state = " (outdated)" if diff['outdated'] else ""
+            print(f"{diff['target']} [{diff['language']}] from "
+                  f"{diff['source']}{state}")
+            for code in diff['missing']:
+                print(f"  - {code}")
+            for code in diff['extra']:
+                print(f"  + {code}")
+
+    return 0
+
+
+def cmd_serve(manager, args) -> int:
+    """Serve the library as a JSON API over HTTP"""
+    from http_api import serve
+    return serve(manager, args.host, args.port, args.verbose)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Build the argument parser with all subcommands"""
+    parser = argparse.ArgumentParser(
+        prog='floating-cheatsheets',
+        description="Query the cheatsheet library from the terminal")
+    parser.add_argument('--data-path', default=None,
+                        help="Cheatsheet directory (default: the widget's)")
+    parser.add_argument('--root', action='append', default=None,
+                        help="Read-only library root below the data path "
+                             "(repeatable, lowest priority first)")
+    parser.add_argument('--columnar', action='store_true',
+                        help="Search over a columnar item store")
+
+    # Options shared by every subcommand
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('--json', action='store_true',
+                        help="Print JSON instead of plain text")
+
+    filters = argparse.ArgumentParser(add_help=False)
+    filters.add_argument('--tag', help="Only cheatsheets with this tag")
+    filters.add_argument('--language', help="Only cheatsheets in this language")
+
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    search = subparsers.add_parser('search', parents=[common, filters],
+                                   help="Search cheatsheets by term")
+    search.add_argument('query')
+    search.add_argument('--collapse', action='store_true',
+                        help="Leave out items with a near-duplicate in an "
+                             "earlier result")
+    search.set_defaults(func=cmd_search)
+
+    show = subparsers.add_parser('show', parents=[common],
+                                 help="Show a cheatsheet")
+    show.add_argument('filename')
+    show.set_defaults(func=cmd_show)
+
+    tags = subparsers.add_parser('tags', parents=[common],
+                                 help="List tags with usage count")
+    tags.set_defaults(func=cmd_tags)
+
+    stats = subparsers.add_parser('stats', parents=[common],
+                                  help="Show library statistics")
+    stats.set_defaults(func=cmd_stats)
+
+    export = subparsers.add_parser('export', parents=[filters],
+                                   help="Export cheatsheets")
+    export.add_argument('filenames', nargs='*',
+                        help="Cheatsheets to export (default: all)")
+    export.add_argument('--format', choices=['json', 'markdown', 'tsv', 'bundle'],
+                        default='json')
+    export.add_argument('-o', '--output', help="Write to file")
+    export.set_defaults(func=cmd_export)
+
+    import_ = subparsers.add_parser('import',
+                                    help="Import a cheatsheet bundle")
+    import_.add_argument('bundle')
+    import_.add_argument('--overwrite', action='store_true',
+                         help="Replace cheatsheets with the same filename")
+    import_.add_argument('--workers', type=int, default=None,
+                         help="Parser threads (default: up to 8)")
+    import_.add_argument('--detect-language', action='store_true',
+                         help="Detect the language of cheatsheets without one")
+    import_.set_defaults(func=cmd_import)
+
+    check = subparsers.add_parser(
+        'check', parents=[common],
+        help="Check cheatsheet files for errors and duplicates")
+    check.add_argument('paths', nargs='*',
+                       help="Directories or packs (default: every root)")
+    check.add_argument('--workers', type=int, default=None,
+                       help="Checker threads (default: up to 8)")
+    check.add_argument('--processes', type=int, default=0,
+                       help="Checker processes, faster on large libraries")
+    check.set_defaults(func=cmd_check)
+
+    duplicates = subparsers.add_parser(
+        'duplicates', parents=[common],
+        help="List clusters of near-duplicate items")
+    duplicates.set_defaults(func=cmd_duplicates)
+
+    translations = subparsers.add_parser(
+        'translations', parents=[common],
+        help="List missing and out-of-date translations")
+    translations.add_argument('filename', nargs='?',
+                              help="Compare one cheatsheet with its "
+                                   "translations (default: whole library)")
+    translations.set_defaults(func=cmd_translations)
+
+    serve = subparsers.add_parser('serve', help="Serve a JSON API over HTTP")
+    serve.add_argument('--host', default='127.0.0.1')
+    serve.add_argument('--port', type=int, default=8765)
+    serve.add_argument('--verbose', action='store_true',
+                       help="Log every request")
+    serve.set_defaults(func=cmd_serve)
+
+    return parser
+
+
+def main(argv=None) -> int:
+    """Run the command line interface"""
+    args = build_parser().parse_args(argv)
+    manager = connect_manager(create_manager(args.data_path, args.root,
+                                             args.columnar))
+
+    try:
+        return args.func(manager, args)
+    except BrokenPipeError:
+        # Output piped into a command that exited early, e.g. head
+        return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
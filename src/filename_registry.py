@@ -0,0 +1,74 @@
+"""
+Filename Registry
+In-memory set of the cheatsheet filenames in use, for unique names
+without probing the filesystem
+"""
+
+import threading
+from typing import Callable, Dict, Iterable, Set
+
+
+class FilenameRegistry:
+    """
+    Used filename stems plus a next-suffix counter per base name
+
+    Generating "docker", "docker-1", "docker-2"... for many sheets with the
+    same title costs one set lookup per name instead of one stat per
+    candidate. Reservations are atomic, so concurrent creates never get the
+    same name.
+    """
+
+    def __init__(self):
+        self._used: Set[str] = set()
+        # Base name -> first suffix that may still be free
+        self._counters: Dict[str, int] = {}
+        # Reentrant: the loader may report changes back into the registry
+        self._lock = threading.RLock()
+        self._loaded = False
+
+    def ensure_loaded(self, loader: Callable[[], Iterable[str]]) -> None:
+        """Fill the registry from loader() the first time it is needed"""
+        with self._lock:
+            if not self._loaded:
+                self.sync(loader())
+
+    def sync(self, filenames: Iterable[str]) -> None:
+        """Replace the used names, e.g. after a full directory scan"""
+        with self._lock:
+            self._used = set(filenames)
+            self._counters.clear()
+            self._loaded = True
+
+    def add(self, filename: str) -> None:
+        """Mark a name as used (a file appeared)"""
+        with self._lock:
+            self._used.add(filename)
+
+    def release(self, filename: str) -> None:
+        """Mark a name as free (a file went away or a write failed)"""
+        with self._lock:
+            self._used.discard(filename)
+            # Let base-N be handed out again
+            base, _, suffix = filename.rpartition('-')
+            if suffix.isascii() and suffix.isdigit():
+                counter = int(suffix)
+                if 0 < counter < self._counters.get(base, 1):
+                    self._counters[base] = counter
+
+    def __contains__(self, filename: str) -> bool:
+        return filename in self._used
+
+    def reserve(self, base: str) -> str:
+        """Reserve base, or else base-N with the lowest free N"""
+        with self._lock:
+            if base not in self._used:
+                self._used.add(base)
+                return base
+
+            counter = self._counters.get(base, 1)
+            while f"{base}-{counter}" in self._used:
+                counter += 1
+            filename = f"{base}-{counter}"
+            self._used.add(filename)
+            self._counters[base] = counter + 1
+            return filename
@@ -0,0 +1,447 @@
+#!/usr/bin/env python3
+"""
+HTTP API
+Read-only JSON API over the cheatsheet library, for embedding lookups in
+other tools
+
+Endpoints:
+    GET /search?q=<term>[&language=<code>][&tag=<tag>][&collapse=1]
+    GET /sheets[?language=<code>][&tag=<tag>]
+    GET /sheets/<filename>
+    GET /tags
+    GET /stats
+
+Connections are kept alive (HTTP/1.1), every response carries an ETag
+computed from its content so clients can revalidate with If-None-Match
+(for a sheet, its content hash), and large responses are gzipped when the
+client accepts it.
+"""
+
+import argparse
+import gzip
+import hashlib
+import http.client
+import json
+import random
+import sys
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from cheatsheet_manager import CheatSheetManager
+from library_index import is_sheet_filename
+
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+
+# Smaller bodies are sent as-is, gzip would barely save a packet
+MIN_GZIP_SIZE = 1024
+GZIP_CACHE_SIZE = 256
+
+
+def parse_etags(header: str) -> List[str]:
+    """Parse an If-None-Match header into opaque tags (weak prefix dropped)"""
+    tags = []
+    for tag in header.split(','):
+        tag = tag.strip()
+        if tag.startswith('W/'):
+            tag = tag[2:]
+        if tag:
+            tags.append(tag)
+    return tags
+
+
+def accepts_gzip(header: str) -> bool:
+    """Check whether an Accept-Encoding header allows gzip"""
+    for coding in header.split(','):
+        name, _, params = coding.partition(';')
+        if name.strip().lower() not in ('gzip', '*'):
+            continue
+        params = params.replace(' ', '')
+        return params not in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000')
+    return False
+
+
+class ApiServer(ThreadingHTTPServer):
+    """Threaded HTTP server holding the shared manager"""
+
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int], manager: CheatSheetManager,
+                 verbose: bool = False):
+        self.manager = manager
+        self.verbose = verbose
+        # The manager and its index are not thread-safe
+        self.manager_lock = threading.Lock()
+
+        # Compressed bodies by body hash, responses repeat a lot
+        self._gzip_cache: OrderedDict = OrderedDict()
+        self._gzip_lock = threading.Lock()
+
+        super().__init__(address, _ApiHandler)
+
+    def compress(self, body: bytes) -> bytes:
+        """Gzip a body, reusing the result for identical bodies"""
+        key = hashlib.sha1(body).digest()
+        with self._gzip_lock:
+            compressed = self._gzip_cache.get(key)
+            if compressed is not None:
+                self._gzip_cache.move_to_end(key)
+                return compressed
+
+        compressed = gzip.compress(body, compresslevel=5, mtime=0)
+
+        with self._gzip_lock:
+            self._gzip_cache[key] = compressed
+            if len(self._gzip_cache) > GZIP_CACHE_SIZE:
+                self._gzip_cache.popitem(last=False)
+        return compressed
+
+
+class _ApiHandler(BaseHTTPRequestHandler):
+    """Route GET requests to the manager and send JSON responses"""
+
+    protocol_version = 'HTTP/1.1'
+    server_version = 'FloatingCheatsheets/1.0'
+    # Close idle keep-alive connections instead of holding a thread forever
+    timeout = 30
+    # Headers and body are separate writes, don't let Nagle delay the body
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        self._handle(send_body=True)
+
+    def do_HEAD(self):
+        self._handle(send_body=False)
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _handle(self, send_body: bool) -> None:
+        url = urlsplit(self.path)
+        params = {key: values[-1]
+                  for key, values in parse_qs(url.query).items()}
+        parts = [unquote(p) for p in url.path.strip('/').split('/') if p]
+
+        try:
+            status, data, etag = self._route(parts, params)
+        except Exception as e:
+            print(f"Error handling {self.path}: {e}")
+            status, data, etag = 500, {'error': "Internal server error"}, None
+
+        self._send_json(status, data, send_body, etag)
+
+    def _not_modified(self, etag: str) -> bool:
+        return etag in parse_etags(self.headers.get('If-None-Match', ''))
+
+    def _route(self, parts: List[str], params: Dict[str, str]
+               ) -> Tuple[int, Any, Optional[str]]:
+        """
+        Run the query for a path
+
+        Returns:
+            (status, data, etag), etag None to derive it from the body
+        """
+        manager = self.server.manager
+        tag = params.get('tag')
+        language = params.get('language')
+
+        with self.server.manager_lock:
+            if parts == ['search']:
+                query = params.get('q', '').strip()
+                if not query:
+                    return 400, {'error': "Missing query parameter 'q'"}, None
+                collapse = params.get('collapse') in ('1', 'true')
+                if language:
+                    sheets = manager.search_cheatsheets_by_language(
+                        query, language, collapse)
+                else:
+                    sheets = manager.search_cheatsheets(query, collapse)
+                if tag:
+                    sheets = [s for s in sheets if tag in s.get('tags', [])]
+                return 200, sheets, None
+
+            if parts == ['sheets']:
+                if language:
+                    sheets = manager.get_cheatsheets_by_tag_and_language(
+                        tag or "all", language)
+                else:
+                    sheets = manager.get_cheatsheets_by_tag(tag or "all")
+                return 200, sheets, None
+
+            if len(parts) == 2 and parts[0] == 'sheets':
+                # Segments are unquoted after the split, %2F is a real '/'
+                if not is_sheet_filename(parts[1]):
+                    return 404, {
+                        'error': f"Cheatsheet not found: {parts[1]}"
+                    }, None
+                # The content hash is known without loading the sheet, so
+                # revalidating only costs a stat
+                content_hash = manager.get_content_hash(parts[1])
+                if content_hash is None:
+                    return 404, {
+                        'error': f"Cheatsheet not found: {parts[1]}"
+                    }, None
+                etag = f'"{content_hash}"'
+                if self._not_modified(etag):
+                    return 304, None, etag
+                sheet = manager.get_cheatsheet_by_filename(parts[1])
+                return 200, sheet, etag
+
+            if parts == ['tags']:
+                return 200, manager.get_tags_with_usage(), None
+
+            if parts == ['stats']:
+                return 200, manager.get_library_statistics(), None
+
+        return 404, {'error': f"Unknown endpoint: /{'/'.join(parts)}"}, None
+
+    def _send_json(self, status: int, data: Any, send_body: bool,
+                   etag: Optional[str] = None) -> None:
+        # Content hashes leave out dates, so tags from them are weak
+        weak = etag is not None
+
+        if status == 304:
+            body = b''
+        else:
+            body = json.dumps(data, ensure_ascii=False,
+                              separators=(',', ':')).encode('utf-8')
+            if etag is None:
+                etag = f'"{hashlib.sha1(body).hexdigest()}"'
+            if status == 200 and self._not_modified(etag):
+                status = 304
+
+        if status == 304:
+            self.send_response(304)
+            self.send_header('ETag', f'W/{etag}' if weak else etag)
+            self.send_header('Cache-Control', 'no-cache')
+            self.end_headers()
+            return
+
+        encoding = None
+        if (len(body) >= MIN_GZIP_SIZE and
+                accepts_gzip(self.headers.get('Accept-Encoding', ''))):
+            body = self.server.compress(body)
+            encoding = 'gzip'
+
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Vary', 'Accept-Encoding')
+        if status == 200:
+            # Same content for both encodings, so the tag is weak when gzipped
+            self.send_header('ETag', f'W/{etag}' if weak or encoding else etag)
+            self.send_header('Cache-Control', 'no-cache')
+        if encoding:
+            self.send_header('Content-Encoding', encoding)
+        self.end_headers()
+
+        if send_body:
+            self.wfile.write(body)
+
+
+def create_server(manager: CheatSheetManager, host: str = DEFAULT_HOST,
+                  port: int = DEFAULT_PORT, verbose: bool = False) -> ApiServer:
+    """Create the API server, port 0 picks a free port"""
+    return ApiServer((host, port), manager, verbose)
+
+
+def serve(manager: CheatSheetManager, host: str = DEFAULT_HOST,
+          port: int = DEFAULT_PORT, verbose: bool = False) -> int:
+    """Serve the API in the foreground until interrupted"""
+    try:
+        server = create_server(manager, host, port, verbose)
+    except OSError as e:
+        print(f"Error starting HTTP API on {host}:{port}: {e}")
+        return 1
+
+    manager.get_all_tags()  # Warm up the index before accepting clients
+    print(f"Serving {manager.data_path} on http://{host}:{server.server_port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+# --- Load testing -----------------------------------------------------------
+
+WORDS = [
+    'docker', 'git', 'python', 'bash', 'linux', 'network', 'deploy', 'build',
+    'commit', 'branch', 'merge', 'image', 'volume', 'port', 'process', 'file',
+    'search', 'config', 'server', 'client', 'cache', 'query', 'index', 'test',
+]
+
+
+def generate_synthetic_library(target_dir: str, count: int,
+                               items_per_sheet: int = 20,
+                               seed: int = 0) -> List[str]:
+    """
+    Write a synthetic library of cheatsheets for load testing
+
+    Returns:
+        Filenames of the generated cheatsheets
+    """
+    rng = random.Random(seed)
+    target = Path(target_dir)
+    target.mkdir(parents=True, exist_ok=True)
+    languages = ['es', 'en', 'fr', 'pt']
+
+    filenames = []
+    for i in range(count):
+        filename = f"synthetic-{i:05d}"
+        items = []
+        for j in range(items_per_sheet):
+            words = rng.sample(WORDS, 4)
+            items.append({
+                'code': f"{words[0]} {words[1]} --{words[2]}",
+                'description': f"{words[3].capitalize()} example {i}.{j}",
+                'example': f"{words[0]} {words[1]} --{words[2]} {j}"
+            })
+        sheet = {
+            'title': f"Synthetic {rng.choice(WORDS).capitalize()} {i}",
+            'tags': rng.sample(WORDS, 3),
+            'language': languages[i % len(languages)],
+            'items': items,
+            'created': '2024-01-01T00:00:00',
+            'updated': '2024-01-01T00:00:00'
+        }
+        with open(target / f"{filename}.json", 'w', encoding='utf-8') as f:
+            json.dump(sheet, f, ensure_ascii=False)
+        filenames.append(filename)
+
+    return filenames
+
+
+def run_load_test(host: str, port: int, filenames: List[str],
+                  requests: int = 2000, concurrency: int = 8,
+                  seed: int = 0) -> Dict:
+    """
+    Send a mix of requests over keep-alive connections and time them
+
+    Half of the sheet requests revalidate with the ETag of a previous
+    response, like a dashboard polling for changes.
+    """
+    latencies: List[float] = []
+    statuses: Dict[int, int] = {}
+    results_lock = threading.Lock()
+    per_worker = max(1, requests // concurrency)
+
+    def worker(worker_id: int):
+        rng = random.Random(seed + worker_id)
+        conn = http.client.HTTPConnection(host, port)
+        etags: Dict[str, str] = {}
+        local_latencies = []
+        local_statuses: Dict[int, int] = {}
+
+        for _ in range(per_worker):
+            roll = rng.random()
+            if roll < 0.5:
+                path = f"/sheets/{rng.choice(filenames)}"
+            elif roll < 0.85:
+                path = f"/search?q={rng.choice(WORDS)}&language=en"
+            elif roll < 0.95:
+                path = "/tags"
+            else:
+                path = "/stats"
+
+            headers = {'Accept-Encoding': 'gzip'}
+            if path in etags and rng.random() < 0.5:
+                headers['If-None-Match'] = etags[path]
+
+            start = time.perf_counter()
+            conn.request('GET', path, headers=headers)
+            response = conn.getresponse()
+            response.read()
+            local_latencies.append(time.perf_counter() - start)
+
+            local_statuses[response.status] = (
+                local_statuses.get(response.status, 0) + 1)
+            if response.getheader('ETag'):
+                etags[path] = response.getheader('ETag')
+
+        conn.close()
+        with results_lock:
+            latencies.extend(local_latencies)
+            for status, count in local_statuses.items():
+                statuses[status] = statuses.get(status, 0) + count
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=worker, args=(i,))
+               for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        'requests': len(latencies),
+        'seconds': elapsed,
+        'requests_per_second': len(latencies) / elapsed,
+        'p50_ms': latencies[len(latencies) // 2] * 1000,
+        'p95_ms': latencies[int(len(latencies) * 0.95)] * 1000,
+        'statuses': statuses
+    }
+
+
+def main(argv=None) -> int:
+    """Serve the API, or load test it against a synthetic library"""
+    parser = argparse.ArgumentParser(
+        description="Serve the cheatsheet library as a JSON API")
+    parser.add_argument('--data-path', default=None,
+                        help="Cheatsheet directory (default: the widget's)")
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--verbose', action='store_true',
+                        help="Log every request")
+    parser.add_argument('--load-test', type=int, metavar='SHEETS',
+                        help="Load test against this many synthetic sheets")
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=8)
+    args = parser.parse_args(argv)
+
+    if args.load_test is None:
+        from cli import create_manager
+        manager = create_manager(args.data_path)
+        return serve(manager, args.host, args.port, args.verbose)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        data_path = Path(tmp) / 'cheatsheets'
+        filenames = generate_synthetic_library(str(data_path), args.load_test)
+        manager = CheatSheetManager(str(data_path),
+                                    index_file=str(Path(tmp) / 'index.json'))
+
+        server = create_server(manager, args.host, 0)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            manager.get_all_tags()
+            result = run_load_test(args.host, server.server_port, filenames,
+                                   args.requests, args.concurrency)
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    print(f"{result['requests']} requests in {result['seconds']:.2f}s "
+          f"({result['requests_per_second']:.0f} req/s)")
+    print(f"Latency p50 {result['p50_ms']:.2f}ms, "
+          f"p95 {result['p95_ms']:.2f}ms")
+    print("Statuses: " + ", ".join(
+        f"{status}: {count}"
+        for status, count in sorted(result['statuses'].items())))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,9 +3,65 @@ Internationalization (i18n) Module
 Translation system for the user interface
 """
 
-import json
 from pathlib import Path
-from typing import Dict, Optional
+from string import Formatter
+from typing import Callable, Dict, FrozenSet, List, Optional, Tuple
+
+from languages_config import default_languages_file, get_languages_config
+
+
+# Parsed template: (literal text, argument index or None, conversion, spec)
+Template = Tuple[Tuple[str, Optional[int], Optional[str], str], ...]
+
+_CONVERSIONS = {'s': str, 'r': repr, 'a': ascii}
+
+
+def parse_template(text: str) -> Optional[Template]:
+    """
+    Split a template into literals and positional fields
+
+    None for a text without braces. Raises ValueError for a malformed
+    template or fields format_text can't fill: named, with attributes or
+    indexes, or nested in a format spec.
+    """
+    if '{' not in text and '}' not in text:
+        return None
+    parts = []
+    auto = 0
+    manual = False
+    for literal, field, spec, conversion in Formatter().parse(text):
+        if field is None:
+            parts.append((literal, None, None, ''))
+            continue
+        if field == '':
+            if manual:
+                raise ValueError("Mixed automatic and manual field numbers")
+            index = auto
+            auto += 1
+        elif field.isdigit():
+            if auto:
+                raise ValueError("Mixed automatic and manual field numbers")
+            index = int(field)
+            manual = True
+        else:
+            raise ValueError(f"Unsupported field: {field}")
+        if '{' in spec:
+            raise ValueError("Nested fields are not supported")
+        parts.append((literal, index, conversion, spec))
+    return tuple(parts)
+
+
+def render_template(template: Template, args: Tuple) -> str:
+    """Fill a parsed template, raises IndexError or ValueError"""
+    pieces: List[str] = []
+    for literal, index, conversion, spec in template:
+        pieces.append(literal)
+        if index is not None:
+            value = args[index]
+            if conversion:
+                value = _CONVERSIONS[conversion](value)
+            pieces.append(format(value, spec))
+    return ''.join(pieces)
 
 
 class I18n:
@@ -15,7 +71,8 @@ class I18n:
                  default_language: Optional[str] = None):
         self.base_path = Path(__file__).parent.parent
         self.languages_file = (languages_file or
-                               str(self.base_path / 'data' / 'languages.json'))
+                               default_languages_file(self.base_path))
+        self.config_service = get_languages_config(self.languages_file)
         self.languages_config = {}
         self.current_language = None
         self.default_language = default_language or 'es'
@@ -23,36 +80,82 @@ class I18n:
         # Callbacks for dynamic UI updates
         self.update_callbacks = []
 
+        # Batched UI updates: optional scheduler (e.g. Tk after_idle), and
+        # the language/table the UI was last refreshed with
+        self._scheduler: Optional[Callable] = None
+        self._update_pending = False
+        self._rendered_language = None
+        self._rendered_table: Dict[str, str] = {}
+        self._changed_keys: FrozenSet[str] = frozenset()
+
+        # Compiled translation tables: language -> {key: text} with the
+        # default language already merged in, plus the parsed texts that
+        # contain format fields
+        self._tables: Dict[str, Dict[str, str]] = {}
+        self._templates: Dict[str, Dict[str, Template]] = {}
+        self._active_table: Dict[str, str] = {}
+        self._active_templates: Dict[str, Template] = {}
+
         self._load_languages_config()
         self.set_language(self.default_language)
 
+        # Reload translations when the shared configuration changes
+        self.config_service.register_listener(self._on_config_changed)
+
     def _load_languages_config(self) -> None:
-        """Load languages configuration from JSON file"""
-        try:
-            with open(self.languages_file, 'r', encoding='utf-8') as f:
-                self.languages_config = json.load(f)
-
-            self.default_language = self.languages_config.get(
-                'default_language', 'es')
-        except (FileNotFoundError, json.JSONDecodeError) as e:
-            print(f"Error loading languages config from "
-                  f"{self.languages_file}: {e}")
-            # Default configuration if loading fails
-            self.languages_config = {
-                'default_language': 'es',
-                'supported_languages': {
-                    'es': {
-                        'name': 'Español',
-                        'flag': '🇪🇸',
-                        'interface': {}
-                    },
-                    'en': {
-                        'name': 'English',
-                        'flag': '🇺🇸',
-                        'interface': {}
-                    }
-                }
-            }
+        """Take the current view of the shared languages configuration"""
+        self.languages_config = self.config_service.get_view()
+        self.default_language = self.languages_config.get(
+            'default_language', 'es')
+
+    def _on_config_changed(self) -> None:
+        """Recompile translations and refresh the UI after a config change"""
+        self._load_languages_config()
+        self._tables.clear()
+        self._templates.clear()
+
+        # Check that current language is still valid
+        if (self.current_language and
+                not self.is_language_supported(self.current_language)):
+            self.set_language(self.default_language)
+        else:
+            self._activate_language(self.get_current_language())
+            self._notify_update_callbacks()
+
+    def _compile_table(self, language: str) -> None:
+        """Build the flattened lookup table for a language"""
+        default_texts = self.config_service.get_interface(
+            self.default_language)
+        lang_texts = self.config_service.get_interface(language)
+
+        table = dict(default_texts)
+        table.update(lang_texts)
+
+        templates = {}
+        for key, text in table.items():
+            try:
+                template = parse_template(text)
+            except ValueError:
+                # Malformed template, it is returned unformatted
+                continue
+            if template is not None:
+                templates[key] = template
+
+        self._tables[language] = table
+        self._templates[language] = templates
+
+    def _get_table(self, language: str) -> Dict[str, str]:
+        """Get the compiled table for a language, compiling it if needed"""
+        table = self._tables.get(language)
+        if table is None:
+            self._compile_table(language)
+            table = self._tables[language]
+        return table
+
+    def _activate_language(self, language: str) -> None:
+        """Point the fast lookup path at the table of a language"""
+        self._active_table = self._get_table(language)
+        self._active_templates = self._templates[language]
 
     def set_language(self, language_code: str) -> bool:
         """Change the current language"""
@@ -60,15 +163,63 @@ class I18n:
             return False
 
         self.current_language = language_code
+        self._activate_language(language_code)
+        self._notify_update_callbacks()
+
+        return True
+
+    def set_scheduler(self, scheduler: Optional[Callable]) -> None:
+        """
+        Batch UI updates through a scheduler instead of running them inline
 
-        # Notify all registered callbacks
-        for callback in self.update_callbacks:
+        Args:
+            scheduler: Function taking a callback to run later, such as
+                       Tk's after_idle. None restores synchronous updates.
+        """
+        self._scheduler = scheduler
+
+    def _notify_update_callbacks(self) -> None:
+        """Queue a single UI refresh for all registered callbacks"""
+        if self._scheduler is None:
+            self._flush_updates()
+            return
+
+        if self._update_pending:
+            return
+        self._update_pending = True
+        self._scheduler(self._flush_updates)
+
+    def _flush_updates(self) -> None:
+        """Notify all registered callbacks of the accumulated changes"""
+        self._update_pending = False
+
+        previous = self._rendered_table
+        current = self._active_table
+        self._changed_keys = frozenset(
+            key for key in previous.keys() | current.keys()
+            if previous.get(key) != current.get(key)
+        )
+
+        language = self.get_current_language()
+        if not self._changed_keys and language == self._rendered_language:
+            return
+
+        self._rendered_table = current
+        self._rendered_language = language
+
+        for callback in list(self.update_callbacks):
             try:
                 callback()
             except Exception as e:
                 print(f"Error executing update callback: {e}")
 
-        return True
+    def get_changed_keys(self) -> FrozenSet[str]:
+        """Keys whose text changed in the UI refresh being delivered"""
+        return self._changed_keys
+
+    def text_changed(self, key: str) -> bool:
+        """Check whether a key needs re-rendering in the current refresh"""
+        return key in self._changed_keys
 
     def get_current_language(self) -> str:
         """Get the current language"""
@@ -107,22 +258,9 @@ class I18n:
             Translated text or key if not found
         """
         if language is None:
-            language = self.get_current_language()
-
-        # Get language configuration
-        supported_langs = self.languages_config.get('supported_languages', {})
-        lang_config = supported_langs.get(language, {})
-        interface_texts = lang_config.get('interface', {})
-
-        # Search for the text
-        text = interface_texts.get(key)
-
-        # If not found, try with default language
-        if text is None and language != self.default_language:
-            default_lang_config = supported_langs.get(
-                self.default_language, {})
-            default_interface_texts = default_lang_config.get('interface', {})
-            text = default_interface_texts.get(key)
+            text = self._active_table.get(key)
+        else:
+            text = self._get_table(language).get(key)
 
         # Usar fallback si se proporciona, sino usar la clave
         if text is None:
@@ -146,9 +284,28 @@ class I18n:
         """
         text = self.get_text(key, language, fallback)
 
+        if language is None:
+            templates = self._active_templates
+        else:
+            self._get_table(language)
+            templates = self._templates[language]
+
+        template = templates.get(key)
+        if template is None:
+            if text is not fallback:
+                # Plain text, or a malformed template
+                return text
+            # Fallbacks come from the caller, they are parsed on use
+            try:
+                template = parse_template(text)
+            except ValueError:
+                return text
+            if template is None:
+                return text
+
         try:
-            return text.format(*args)
-        except (IndexError, KeyError, ValueError):
+            return render_template(template, args)
+        except (IndexError, ValueError, TypeError):
             # If there's a format error, return unformatted text
             return text
 
@@ -164,16 +321,7 @@ class I18n:
 
     def reload_config(self) -> bool:
         """Reload languages configuration from file"""
-        try:
-            self._load_languages_config()
-            # Check that current language is still valid
-            if (self.current_language and
-                    not self.is_language_supported(self.current_language)):
-                self.set_language(self.default_language)
-            return True
-        except Exception as e:
-            print(f"Error reloading languages config: {e}")
-            return False
+        return self.config_service.reload()
 
 
 # Instancia global de I18n para uso en toda la aplicación
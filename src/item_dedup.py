@@ -0,0 +1,316 @@
+#!/usr/bin/env python3
+"""
+Item Deduplication
+Clusters of near-duplicate items across a library, found with MinHash
+
+Each item is reduced to the set of word shingles of its code and example,
+the command text that rewordings and translations keep; descriptions are
+prose that changes with the language and the author. A MinHash signature
+estimates the Jaccard similarity of two such sets, and LSH banding puts
+items whose signatures agree on a whole band in the same bucket, so only
+items sharing a bucket are ever compared instead of every pair.
+"""
+
+import argparse
+import json
+import operator
+import re
+import sys
+import time
+from array import array
+from hashlib import shake_128
+from pathlib import Path
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple
+
+from library_index import assign_item_ids
+
+
+# 20 bands of 3 rows: pairs at the threshold share a band 99% of the time
+BANDS = 20
+ROWS = 3
+NUM_PERM = BANDS * ROWS
+# Estimated Jaccard similarity of a near-duplicate
+THRESHOLD = 0.6
+# Buckets up to this size are compared pairwise, larger ones to their first
+PAIRWISE_BUCKET = 16
+# Copies of the code shingles, the code weighs more than the example
+CODE_WEIGHT = 3
+TOKEN = re.compile(r'\S+')
+
+# Item of a library: (filename, item id)
+ItemKey = Tuple[str, str]
+
+
+def _text_shingles(text: str) -> List[str]:
+    """Words and word pairs of a text, the whole text too"""
+    tokens = TOKEN.findall(text.lower())
+    return tokens + [f"{first} {second}"
+                     for first, second in zip(tokens, tokens[1:])]
+
+
+def item_shingles(item: Mapping) -> List[str]:
+    """
+    Shingles of the code and example of an item
+
+    The code says which command an item is about, so its shingles are
+    added CODE_WEIGHT times, tagged apart, along with the whole code; the
+    examples of one command vary much more.
+    """
+    shingles = set()
+    code = item.get('code', '')
+    if isinstance(code, str) and code.strip():
+        code_shingles = _text_shingles(code)
+        code_shingles.append('=' + ' '.join(code.lower().split()))
+        for copy in range(CODE_WEIGHT):
+            shingles.update(f"{copy}:{shingle}" for shingle in code_shingles)
+    example = item.get('example', '')
+    if isinstance(example, str):
+        shingles.update(_text_shingles(example))
+    return sorted(shingles)
+
+
+class MinHasher:
+    """
+    MinHash signatures of shingle sets
+
+    NUM_PERM 32-bit hashes of a shingle are read from one SHAKE-128
+    digest, then the signature is their element-wise minimum over the set.
+    Digests are cached, shingles repeat a lot across a library.
+    """
+
+    def __init__(self):
+        self._hashes: Dict[str, array] = {}
+
+    def _shingle_hashes(self, shingle: str) -> array:
+        hashes = self._hashes.get(shingle)
+        if hashes is None:
+            hashes = self._hashes[shingle] = array(
+                'I', shake_128(shingle.encode('utf-8')).digest(NUM_PERM * 4))
+        return hashes
+
+    def signature(self, shingles: Iterable[str]) -> Optional[Tuple[int, ...]]:
+        """Signature of a set, None if it is empty"""
+        hashes = [self._shingle_hashes(shingle) for shingle in shingles]
+        if not hashes:
+            return None
+        if len(hashes) == 1:
+            return tuple(hashes[0])
+        return tuple(map(min, *hashes))
+
+
+def similarity(first: Tuple[int, ...], second: Tuple[int, ...]) -> float:
+    """Jaccard similarity estimated from two signatures"""
+    return sum(map(operator.eq, first, second)) / NUM_PERM
+
+
+class DuplicateIndex:
+    """
+    Near-duplicate clusters of the items of a library
+
+    Signatures are kept per sheet, so an update only hashes the items of
+    the sheets that changed; the clusters are then redone over every
+    signature, which costs a fraction of the hashing.
+    """
+
+    def __init__(self, threshold: float = THRESHOLD):
+        self.threshold = threshold
+        # Filename -> (item id, item, signature) of its items
+        self._sheets: Dict[str, List[Tuple[str, Mapping,
+                                           Tuple[int, ...]]]] = {}
+        self._keys: List[ItemKey] = []
+        self._items: List[Mapping] = []
+        self._signatures: List[Tuple[int, ...]] = []
+        self._parent: List[int] = []
+        # Item key -> cluster number, only for items with duplicates
+        self._cluster_of: Dict[ItemKey, int] = {}
+        self._clusters: List[List[int]] = []
+
+    @classmethod
+    def build(cls, sheets: Iterable[Tuple[str, Mapping]],
+              threshold: float = THRESHOLD) -> 'DuplicateIndex':
+        """Cluster the items of every (filename, sheet)"""
+        index = cls(threshold)
+        hasher = MinHasher()
+        for filename, sheet in sheets:
+            index._sign_sheet(filename, sheet, hasher)
+        index._cluster()
+        return index
+
+    def update(self, sheets: Iterable[Tuple[str, Optional[Mapping]]]
+               ) -> None:
+        """Replace the items of changed (filename, sheet), None if removed"""
+        hasher = MinHasher()
+        for filename, sheet in sheets:
+            self._sign_sheet(filename, sheet, hasher)
+        self._cluster()
+
+    def _sign_sheet(self, filename: str, sheet: Optional[Mapping],
+                    hasher: MinHasher) -> None:
+        """Keep the signatures of the items of a sheet"""
+        self._sheets.pop(filename, None)
+        # Invalid files parse to anything JSON, e.g. a list
+        if not isinstance(sheet, Mapping):
+            return
+        items = sheet.get('items', [])
+        if not isinstance(items, (list, tuple)):
+            return
+        signed = []
+        for item in assign_item_ids(list(items)):
+            if not isinstance(item, Mapping):
+                continue
+            signature = hasher.signature(item_shingles(item))
+            if signature is not None:
+                signed.append((item['id'], item, signature))
+        if signed:
+            self._sheets[filename] = signed
+
+    def _find(self, number: int) -> int:
+        parent = self._parent
+        while parent[number] != number:
+            parent[number] = parent[parent[number]]
+            number = parent[number]
+        return number
+
+    def _union(self, first: int, second: int) -> None:
+        first, second = self._find(first), self._find(second)
+        if first != second:
+            self._parent[max(first, second)] = min(first, second)
+
+    def _cluster(self) -> None:
+        """Join the items of each bucket that are similar enough"""
+        self._keys = []
+        self._items = []
+        self._signatures = signatures = []
+        for filename in sorted(self._sheets):
+            for item_id, item, signature in self._sheets[filename]:
+                self._keys.append((filename, item_id))
+                self._items.append(item)
+                signatures.append(signature)
+        self._parent = list(range(len(signatures)))
+        self._cluster_of = {}
+        threshold = self.threshold
+        # Pairs found too different, they may share several bands
+        different = set()
+        for band in range(BANDS):
+            start = band * ROWS
+            buckets: Dict[Tuple[int, ...], List[int]] = {}
+            for number, signature in enumerate(signatures):
+                buckets.setdefault(signature[start:start + ROWS],
+                                   []).append(number)
+            for bucket in buckets.values():
+                if len(bucket) < 2:
+                    continue
+                firsts = (bucket if len(bucket) <= PAIRWISE_BUCKET
+                          else bucket[:1])
+                for position, first in enumerate(firsts):
+                    for second in bucket[position + 1:]:
+                        if (self._find(first) == self._find(second) or
+                                (first, second) in different):
+                            continue
+                        if similarity(signatures[first],
+                                      signatures[second]) >= threshold:
+                            self._union(first, second)
+                        else:
+                            different.add((first, second))
+
+        members: Dict[int, List[int]] = {}
+        for number in range(len(signatures)):
+            members.setdefault(self._find(number), []).append(number)
+        self._clusters = sorted(
+            (cluster for cluster in members.values() if len(cluster) > 1),
+            key=lambda cluster: (-len(cluster), self._keys[cluster[0]]))
+        for position, cluster in enumerate(self._clusters):
+            for number in cluster:
+                self._cluster_of[self._keys[number]] = position
+
+    # Reads
+
+    @property
+    def item_count(self) -> int:
+        return len(self._keys)
+
+    def cluster_of(self, filename: str, item_id: str) -> Optional[int]:
+        """Cluster number of an item, None if it has no near-duplicate"""
+        return self._cluster_of.get((filename, item_id))
+
+    def clusters(self) -> List[List[Dict]]:
+        """Every cluster, largest first: filename, id, code, description"""
+        return [[{'filename': self._keys[number][0],
+                  'id': self._keys[number][1],
+                  'code': self._items[number].get('code', ''),
+                  'description': self._items[number].get('description', '')}
+                 for number in cluster]
+                for cluster in self._clusters]
+
+
+def _pairwise_clusters(sheets: List[Tuple[str, Dict]],
+                       threshold: float) -> int:
+    """Items with a near-duplicate, comparing every pair (for reference)"""
+    hasher = MinHasher()
+    signatures = []
+    for _, sheet in sheets:
+        for item in sheet.get('items', []):
+            if not isinstance(item, Mapping):
+                continue
+            signature = hasher.signature(item_shingles(item))
+            if signature is not None:
+                signatures.append(signature)
+    found = set()
+    for first in range(len(signatures)):
+        for second in range(first + 1, len(signatures)):
+            if similarity(signatures[first], signatures[second]) >= threshold:
+                found.update((first, second))
+    return len(found)
+
+
+def main(argv=None) -> int:
+    """Report the near-duplicate items of a directory"""
+    parser = argparse.ArgumentParser(
+        description="Find near-duplicate items across a library")
+    parser.add_argument('directory')
+    parser.add_argument('--threshold', type=float, default=THRESHOLD)
+    parser.add_argument('--compare', action='store_true',
+                        help="Also compare every pair, to check the recall")
+    parser.add_argument('--json', action='store_true')
+    args = parser.parse_args(argv)
+
+    sheets = []
+    for path in sorted(Path(args.directory).glob('*.json')):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                sheet = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Error loading {path.name}: {e}")
+            continue
+        if not isinstance(sheet, dict) or not isinstance(
+                sheet.get('items', []), list):
+            print(f"Skipped {path.name}: not a cheatsheet object")
+            continue
+        sheets.append((path.stem, sheet))
+
+    start = time.perf_counter()
+    index = DuplicateIndex.build(sheets, args.threshold)
+    elapsed = time.perf_counter() - start
+    clusters = index.clusters()
+
+    if args.json:
+        print(json.dumps(clusters, indent=2, ensure_ascii=False))
+    else:
+        for cluster in clusters:
+            print(f"{len(cluster)} items:")
+            for member in cluster:
+                print(f"  {member['filename']}: {member['code']}")
+    duplicated = sum(len(cluster) for cluster in clusters)
+    print(f"{index.item_count} items, {len(clusters)} clusters of "
+          f"{duplicated} items in {elapsed:.2f}s", file=sys.stderr)
+
+    if args.compare:
+        start = time.perf_counter()
+        reference = _pairwise_clusters(sheets, args.threshold)
+        print(f"Every pair: {reference} items with a near-duplicate in "
+              f"{time.perf_counter() - start:.2f}s", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
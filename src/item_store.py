@@ -0,0 +1,427 @@
+#!/usr/bin/env python3
+"""
+Item Store
+Columnar store of every item of the library, for bulk scans
+
+Each text column (item code, description and example; sheet filename,
+title, language, tags and search text) is one contiguous UTF-8 buffer plus
+an array of offsets, so a scan is a bytes.find() over one buffer instead of
+a walk over dicts. item_sheet maps every item to its sheet and sheet_items
+gives the first item of every sheet.
+
+Layout of a saved store (header big-endian, arrays in the byte order named
+by the header):
+    header   magic, version, byte order, sheet count, item count
+    table    (offset, length) of every section, in SECTIONS order
+    sections arrays and buffers, each aligned to 8 bytes, then the key
+             of the library the store was built from
+
+Opening a saved store maps the file and reads the arrays in place; its key
+tells whether it still matches the library (see library_key()).
+"""
+
+import argparse
+import bisect
+import hashlib
+import mmap
+import struct
+import sys
+import time
+from array import array
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, TextIO, Tuple
+
+from library_index import LibraryIndex, build_search_text
+from sheet_model import Item
+
+
+STORE_MAGIC = b'FCIS'
+STORE_VERSION = 1
+STORE_SUFFIX = '.items'
+
+HEADER = struct.Struct('>4sHBxII')
+SECTION = struct.Struct('>QQ')
+
+# Offsets into the text buffers, 64-bit so a buffer may exceed 4 GiB
+OFFSET_TYPE = 'Q'
+# Sheet and item numbers
+INDEX_TYPE = 'I'
+
+SHEET_COLUMNS = ('filename', 'title', 'language', 'tags', 'search')
+ITEM_COLUMNS = ('code', 'description', 'example')
+
+SECTIONS = ([f"{name}.offsets" for name in SHEET_COLUMNS + ITEM_COLUMNS] +
+            [f"{name}.data" for name in SHEET_COLUMNS + ITEM_COLUMNS] +
+            ['sheet_items', 'item_sheet', 'key'])
+
+
+class StoreError(Exception):
+    """Raised when a file is not a readable item store"""
+
+
+class TextColumn:
+    """Strings kept as one UTF-8 buffer and the offsets between them"""
+
+    def __init__(self, data, offsets, base: int = 0):
+        # data: bytes or a mapped file holding the buffer at base;
+        # offsets: len + 1 positions relative to base, offsets[0] == 0
+        self.data = data
+        self.offsets = offsets
+        self.base = base
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def raw(self, position: int) -> bytes:
+        return self.data[self.base + self.offsets[position]:
+                         self.base + self.offsets[position + 1]]
+
+    def __getitem__(self, position: int) -> str:
+        return self.raw(position).decode('utf-8')
+
+    def raw_buffer(self) -> bytes:
+        """The whole buffer of the column"""
+        return self.data[self.base:self.base + self.offsets[len(self)]]
+
+    def find(self, needle: bytes) -> Iterator[int]:
+        """Positions of the strings containing needle, in order"""
+        data, offsets, base = self.data, self.offsets, self.base
+        count = len(offsets) - 1
+        if not needle:
+            yield from range(count)
+            return
+        limit = base + offsets[count]
+        position = 0
+        start = data.find(needle, base, limit)
+        while start != -1:
+            start -= base
+            position = bisect.bisect_right(offsets, start, lo=position) - 1
+            end = offsets[position + 1]
+            if start + len(needle) <= end:
+                yield position
+            # Go on from the next string: the rest of this one can't add
+            # anything, and a match across two strings doesn't count
+            start = data.find(needle, base + end, limit)
+
+
+class _ColumnBuilder:
+    """Appends strings to a buffer and an offset array"""
+
+    def __init__(self):
+        self.data = bytearray()
+        self.offsets = array(OFFSET_TYPE, [0])
+
+    def add(self, text: str) -> None:
+        self.data += text.encode('utf-8')
+        self.offsets.append(len(self.data))
+
+    def column(self) -> TextColumn:
+        return TextColumn(bytes(self.data), self.offsets)
+
+
+def _text(value) -> str:
+    return value if isinstance(value, str) else ''
+
+
+def _list(value) -> list:
+    return value if isinstance(value, (list, tuple)) else []
+
+
+def library_key(index, default_language: str = '') -> bytes:
+    """Digest of the filenames and content hashes of an index's sheets"""
+    digest = hashlib.sha256(default_language.encode('utf-8'))
+    for filename in sorted(index.filenames()):
+        digest.update(f"\0{filename}\0{index.get_hash(filename)}"
+                      .encode('utf-8'))
+    return digest.digest()
+
+
+class ItemStore:
+    """
+    Columnar, read-only snapshot of a library
+
+    Built from (filename, sheet) pairs, e.g. LibraryIndex.iter_sheets(),
+    or opened from a file written by save(). Sheet numbers follow the order
+    the sheets were given in.
+    """
+
+    def __init__(self, columns: Dict[str, TextColumn], sheet_items,
+                 item_sheet, mapped: Optional[mmap.mmap] = None,
+                 key: bytes = b''):
+        self.columns = columns
+        # First item of every sheet, plus the item count at the end
+        self.sheet_items = sheet_items
+        # Sheet of every item
+        self.item_sheet = item_sheet
+        self._mm = mapped
+        self._filenames: Optional[List[str]] = None
+        # Key of the library the store was built from, b'' if not given
+        self.key = key
+
+    @classmethod
+    def build(cls, sheets: Iterable[Tuple[str, Dict]],
+              default_language: str = '', key: bytes = b'') -> 'ItemStore':
+        """Build a store from (filename, sheet) pairs"""
+        builders = {name: _ColumnBuilder()
+                    for name in SHEET_COLUMNS + ITEM_COLUMNS}
+        sheet_items = array(INDEX_TYPE, [0])
+        item_sheet = array(INDEX_TYPE)
+
+        add_code = builders['code'].add
+        add_description = builders['description'].add
+        add_example = builders['example'].add
+        for sheet_id, (filename, sheet) in enumerate(sheets):
+            builders['filename'].add(filename)
+            builders['title'].add(_text(sheet.get('title')))
+            builders['language'].add(
+                _text(sheet.get('language', default_language)))
+            builders['tags'].add('\0'.join(
+                tag for tag in _list(sheet.get('tags')) if isinstance(tag, str)))
+            builders['search'].add(build_search_text(sheet))
+
+            items = _list(sheet.get('items'))
+            for item in items:
+                if not isinstance(item, (dict, Item)):
+                    item = {}
+                add_code(_text(item.get('code')))
+                add_description(_text(item.get('description')))
+                add_example(_text(item.get('example')))
+            item_sheet.extend([sheet_id] * len(items))
+            sheet_items.append(len(item_sheet))
+
+        columns = {name: builder.column()
+                   for name, builder in builders.items()}
+        return cls(columns, sheet_items, item_sheet, key=key)
+
+    @property
+    def sheet_count(self) -> int:
+        return len(self.sheet_items) - 1
+
+    @property
+    def item_count(self) -> int:
+        return len(self.item_sheet)
+
+    def filenames(self) -> List[str]:
+        """Filenames of all sheets, by sheet number"""
+        if self._filenames is None:
+            column = self.columns['filename']
+            self._filenames = [column[i] for i in range(len(column))]
+        return self._filenames
+
+    def filename(self, sheet_id: int) -> str:
+        return self.filenames()[sheet_id]
+
+    def item_range(self, sheet_id: int) -> range:
+        """Item numbers of one sheet"""
+        return range(self.sheet_items[sheet_id],
+                     self.sheet_items[sheet_id + 1])
+
+    def search(self, query: str) -> List[str]:
+        """Filenames of the sheets whose search text has a lowercased query"""
+        filenames = self.filenames()
+        return [filenames[sheet_id] for sheet_id
+                in self.columns['search'].find(query.encode('utf-8'))]
+
+    def iter_items(self, sheet_ids: Optional[Iterable[int]] = None
+                   ) -> Iterator[Tuple[int, str, str, str]]:
+        """Iterate over (sheet id, code, description, example)"""
+        code = self.columns['code']
+        description = self.columns['description']
+        example = self.columns['example']
+        if sheet_ids is None:
+            sheet_ids = range(self.sheet_count)
+        for sheet_id in sheet_ids:
+            for position in self.item_range(sheet_id):
+                yield (sheet_id, code[position], description[position],
+                       example[position])
+
+    def export_tsv(self, output: TextIO,
+                   sheet_ids: Optional[Iterable[int]] = None) -> int:
+        """
+        Write one line per item: filename, code, description, example
+
+        Tabs, newlines and backslashes in fields are escaped as \\t, \\n
+        and \\\\. Returns the number of items written.
+        """
+        escape = str.maketrans({'\\': '\\\\', '\t': '\\t', '\n': '\\n',
+                                '\r': '\\r'})
+        filenames = self.filenames()
+        count = 0
+        output.write("filename\tcode\tdescription\texample\n")
+        for sheet_id, code, description, example in self.iter_items(
+                sheet_ids):
+            output.write('\t'.join([
+                filenames[sheet_id], code.translate(escape),
+                description.translate(escape), example.translate(escape)
+            ]) + '\n')
+            count += 1
+        return count
+
+    # Persistence
+
+    def _sections(self) -> List[bytes]:
+        names = SHEET_COLUMNS + ITEM_COLUMNS
+        return ([memoryview(self.columns[name].offsets).cast('B')
+                 for name in names] +
+                [self.columns[name].raw_buffer() for name in names] +
+                [memoryview(self.sheet_items).cast('B'),
+                 memoryview(self.item_sheet).cast('B'), self.key])
+
+    def save(self, target_file: str) -> int:
+        """Write the store to a file, returns its size"""
+        sections = self._sections()
+        position = HEADER.size + SECTION.size * len(sections)
+        table = []
+        for section in sections:
+            position += -position % 8
+            table.append((position, len(section)))
+            position += len(section)
+
+        tmp_path = f"{target_file}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(HEADER.pack(STORE_MAGIC, STORE_VERSION,
+                                sys.byteorder == 'little',
+                                self.sheet_count, self.item_count))
+            for entry in table:
+                f.write(SECTION.pack(*entry))
+            for (offset, _), section in zip(table, sections):
+                f.write(b'\0' * (offset - f.tell()))
+                f.write(section)
+        Path(tmp_path).replace(target_file)
+        return position
+
+    @classmethod
+    def open(cls, store_file: str) -> 'ItemStore':
+        """Map a saved store; arrays are read in place when possible"""
+        try:
+            with open(store_file, 'rb') as f:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError) as e:
+            raise StoreError(f"Cannot open item store {store_file}: {e}")
+
+        try:
+            table_end = HEADER.size + SECTION.size * len(SECTIONS)
+            if len(mapped) < table_end:
+                raise StoreError(f"Not an item store: {store_file}")
+            magic, version, little, _, _ = HEADER.unpack_from(mapped, 0)
+            if magic != STORE_MAGIC:
+                raise StoreError(f"Not an item store: {store_file}")
+            if version > STORE_VERSION:
+                raise StoreError(f"Unsupported item store version {version}")
+
+            view = memoryview(mapped)
+            swap = bool(little) != (sys.byteorder == 'little')
+            sections = {}
+            bases = {}
+            for number, name in enumerate(SECTIONS):
+                offset, length = SECTION.unpack_from(
+                    mapped, HEADER.size + number * SECTION.size)
+                if offset + length > len(mapped):
+                    raise StoreError(f"Truncated item store: {store_file}")
+                sections[name] = view[offset:offset + length]
+                bases[name] = offset
+        except StoreError:
+            mapped.close()
+            raise
+
+        def numbers(name: str, typecode: str):
+            if not swap:
+                return sections[name].cast(typecode)
+            # Written on a machine of the other byte order: copy and swap
+            values = array(typecode, sections[name].tobytes())
+            values.byteswap()
+            return values
+
+        columns = {
+            name: TextColumn(mapped, numbers(f"{name}.offsets", OFFSET_TYPE),
+                             bases[f"{name}.data"])
+            for name in SHEET_COLUMNS + ITEM_COLUMNS
+        }
+        return cls(columns, numbers('sheet_items', INDEX_TYPE),
+                   numbers('item_sheet', INDEX_TYPE), mapped,
+                   sections['key'].tobytes())
+
+    def close(self) -> None:
+        """Release the mapped file of an opened store"""
+        if self._mm is not None:
+            # Views into the map must go before it can be closed
+            self.columns = {}
+            self.sheet_items = self.item_sheet = array(INDEX_TYPE, [0])
+            self._filenames = None
+            self._mm.close()
+            self._mm = None
+
+
+def main(argv=None) -> int:
+    """Build an item store, or compare its scans with the index"""
+    parser = argparse.ArgumentParser(
+        description="Build and time columnar item stores")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    build = subparsers.add_parser(
+        'build', help="Write the item store of a cheatsheet directory")
+    build.add_argument('source_dir')
+    build.add_argument('target_file')
+
+    bench = subparsers.add_parser(
+        'bench', help="Time searches over the index against the store")
+    bench.add_argument('source_dir')
+    bench.add_argument('--query', default='git')
+
+    args = parser.parse_args(argv)
+
+    index = LibraryIndex(Path(args.source_dir))
+    index.refresh()
+    index.save()
+    # Warm start from the saved manifest, for comparison with open()
+    start = time.perf_counter()
+    index = LibraryIndex(Path(args.source_dir))
+    index.refresh()
+    load_ms = (time.perf_counter() - start) * 1000
+
+    if args.command == 'build':
+        store = ItemStore.build(index.iter_sheets())
+        size = store.save(args.target_file)
+        print(f"Stored {store.item_count} items of {store.sheet_count} "
+              f"cheatsheets in {args.target_file} ({size / 1024:.0f} KiB)")
+        return 0
+
+    query = args.query.lower()
+
+    start = time.perf_counter()
+    store = ItemStore.build(index.iter_sheets())
+    build_ms = (time.perf_counter() - start) * 1000
+
+    # Warm the index's lazily built search texts first
+    for filename in index.filenames():
+        index.matches(filename, query)
+    start = time.perf_counter()
+    found = [filename for filename in index.filenames()
+             if index.matches(filename, query)]
+    index_ms = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    store_found = store.search(query)
+    store_ms = (time.perf_counter() - start) * 1000
+
+    store_file = f"{index.index_file}{STORE_SUFFIX}"
+    store.save(store_file)
+    start = time.perf_counter()
+    opened = ItemStore.open(store_file)
+    opened_found = opened.search(query)
+    open_ms = (time.perf_counter() - start) * 1000
+    opened.close()
+    Path(store_file).unlink()
+
+    assert sorted(found) == sorted(store_found) == sorted(opened_found)
+    print(f"{store.sheet_count} cheatsheets, {store.item_count} items, "
+          f"store built in {build_ms:.1f}ms")
+    print(f"Index: load {load_ms:.1f}ms, search '{query}' {index_ms:.2f}ms "
+          f"({len(found)} matches)")
+    print(f"Store search '{query}': {store_ms:.2f}ms, "
+          f"mmap open + search {open_ms:.2f}ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
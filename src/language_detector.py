@@ -0,0 +1,340 @@
+#!/usr/bin/env python3
+"""
+Language Detector
+Character n-gram classifier telling which language a cheatsheet is written in
+
+Each language has a compact profile: the log-probabilities of its most
+frequent 1 to 3 letter n-grams, words padded with spaces (' de', 'de ').
+A text scores the sum of the weights of its n-grams and takes the best
+scoring language (multinomial naive Bayes). Words repeat a lot across a
+library, so each distinct word is scored once per batch; with NumPy the
+batch is then reduced with array operations, without it in plain Python.
+"""
+
+import argparse
+import json
+import math
+import random
+import re
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+# N-grams kept per language profile
+PROFILE_SIZE = 400
+MAX_NGRAM = 3
+WORD = re.compile(r'[^\W\d_]+')
+
+
+def default_profiles_file() -> Path:
+    """Profiles bundled with the source checkout or the installation"""
+    src_path = Path(__file__).parent
+    for data_path in (src_path.parent / 'data', src_path / 'data'):
+        path = data_path / 'language_profiles.json'
+        if path.exists():
+            return path
+    return src_path.parent / 'data' / 'language_profiles.json'
+
+
+def sheet_text(sheet: Mapping) -> str:
+    """Words of a cheatsheet written in its language: title, descriptions"""
+    parts = [sheet.get('title', '')]
+    items = sheet.get('items', [])
+    for item in items if isinstance(items, (list, tuple)) else []:
+        if isinstance(item, Mapping):
+            parts.append(item.get('description', ''))
+    return ' '.join(part for part in parts if isinstance(part, str))
+
+
+def word_ngrams(word: str) -> List[str]:
+    """1 to MAX_NGRAM letter n-grams of a word padded with spaces"""
+    padded = f" {word} "
+    return [padded[start:start + size]
+            for size in range(1, MAX_NGRAM + 1)
+            for start in range(len(padded) - size + 1)
+            if padded[start:start + size] != ' ']
+
+
+def text_words(text: str) -> Counter:
+    """Lowercase words of a text with their counts"""
+    return Counter(WORD.findall(text.lower()))
+
+
+class LanguageDetector:
+    """
+    Naive Bayes over character n-grams, one profile per language
+
+    N-grams a language's profile lacks weigh that language's floor, a
+    log-probability below its rarest kept n-gram.
+    """
+
+    def __init__(self, profiles: Mapping[str, Mapping[str, float]],
+                 floors: Mapping[str, float]):
+        self.languages = sorted(profiles)
+        self.profiles = {language: dict(profiles[language])
+                         for language in self.languages}
+        self.floors = [floors[language] for language in self.languages]
+        # Every n-gram of some profile, with its weight in each language
+        self._weights: Dict[str, Tuple[float, ...]] = {}
+        for ngram in sorted(set().union(*self.profiles.values())):
+            self._weights[ngram] = tuple(
+                self.profiles[language].get(ngram, floor)
+                for language, floor in zip(self.languages, self.floors))
+
+    @classmethod
+    def load(cls, path=None, languages: Optional[Iterable[str]] = None
+             ) -> 'LanguageDetector':
+        """Load profiles, only those of the given languages if any"""
+        with open(path or default_profiles_file(), 'r',
+                  encoding='utf-8') as f:
+            data = json.load(f)
+        profiles = data['profiles']
+        if languages is not None:
+            profiles = {language: profile
+                        for language, profile in profiles.items()
+                        if language in set(languages)}
+        return cls(profiles, data['floors'])
+
+    @classmethod
+    def train(cls, texts: Mapping[str, Iterable[str]],
+              size: int = PROFILE_SIZE) -> 'LanguageDetector':
+        """Build the profiles of {language: texts written in it}"""
+        profiles = {}
+        floors = {}
+        for language, language_texts in texts.items():
+            counts = Counter()
+            for text in language_texts:
+                for word, count in text_words(text).items():
+                    for ngram in word_ngrams(word):
+                        counts[ngram] += count
+            total = sum(counts.values()) or 1
+            kept = counts.most_common(size)
+            profiles[language] = {ngram: round(math.log(count / total), 2)
+                                  for ngram, count in kept}
+            rarest = kept[-1][1] if kept else 1
+            floors[language] = round(math.log(rarest / total / 2), 2)
+        return cls(profiles, floors)
+
+    def save(self, path) -> None:
+        """Write the profiles as JSON"""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'ngram_sizes': [1, MAX_NGRAM],
+                       'profiles': self.profiles,
+                       'floors': dict(zip(self.languages, self.floors))},
+                      f, ensure_ascii=False, separators=(',', ':'),
+                      sort_keys=True)
+            f.write('\n')
+
+    def _word_scores(self, word: str) -> Tuple[float, ...]:
+        """Score of one word in every language"""
+        scores = [0.0] * len(self.languages)
+        for ngram in word_ngrams(word):
+            weights = self._weights.get(ngram)
+            if weights is not None:
+                for position, weight in enumerate(weights):
+                    scores[position] += weight
+        return tuple(scores)
+
+    def scores(self, texts: Sequence[str]) -> List[Optional[List[float]]]:
+        """Score of every text in every language, None without words"""
+        word_counts = [text_words(text) for text in texts]
+        words: Dict[str, int] = {}
+        for counts in word_counts:
+            for word in counts:
+                words.setdefault(word, len(words))
+        word_scores = [self._word_scores(word) for word in words]
+
+        if np is not None:
+            return self._reduce_numpy(word_counts, words, word_scores)
+
+        results = []
+        for counts in word_counts:
+            if not counts:
+                results.append(None)
+                continue
+            totals = [0.0] * len(self.languages)
+            for word, count in counts.items():
+                for position, score in enumerate(word_scores[words[word]]):
+                    totals[position] += count * score
+            results.append(totals)
+        return results
+
+    def _reduce_numpy(self, word_counts: List[Counter],
+                      words: Dict[str, int],
+                      word_scores: List[Tuple[float, ...]]
+                      ) -> List[Optional[List[float]]]:
+        """Sum the word scores of every text with one bincount per language"""
+        text_ids = np.repeat(np.arange(len(word_counts)),
+                             [len(counts) for counts in word_counts])
+        word_ids = np.fromiter(
+            (words[word] for counts in word_counts for word in counts),
+            dtype=np.int64, count=len(text_ids))
+        counts = np.fromiter(
+            (count for text_counts in word_counts
+             for count in text_counts.values()),
+            dtype=np.float64, count=len(text_ids))
+        matrix = np.asarray(word_scores, dtype=np.float64).reshape(
+            len(words), len(self.languages))
+        weighted = matrix[word_ids] * counts[:, None]
+        totals = np.stack([np.bincount(text_ids, weights=weighted[:, column],
+                                       minlength=len(word_counts))
+                           for column in range(len(self.languages))], axis=1)
+        return [totals[row].tolist() if text_counts else None
+                for row, text_counts in enumerate(word_counts)]
+
+    def detect_batch(self, texts: Sequence[str],
+                     default: Optional[str] = None) -> List[Optional[str]]:
+        """Language of every text, default for those without words"""
+        return [default if scores is None else
+                self.languages[max(range(len(scores)), key=scores.__getitem__)]
+                for scores in self.scores(texts)]
+
+    def detect(self, text: str, default: Optional[str] = None
+               ) -> Optional[str]:
+        """Language of one text, default if it has no words"""
+        return self.detect_batch([text], default)[0]
+
+    def detect_sheets(self, sheets: Sequence[Mapping],
+                      default: Optional[str] = None) -> List[Optional[str]]:
+        """Language of every cheatsheet, from its title and descriptions"""
+        return self.detect_batch([sheet_text(sheet) for sheet in sheets],
+                                 default)
+
+
+def interface_texts(languages_dir: Path) -> Dict[str, List[str]]:
+    """Interface strings of every language file, {language: strings}"""
+    texts = {}
+    for path in sorted(languages_dir.glob('*.json')):
+        if path.name == 'index.json':
+            continue
+        with open(path, 'r', encoding='utf-8') as f:
+            strings = json.load(f)
+        texts[path.stem] = [value for value in strings.values()
+                            if isinstance(value, str)]
+    return texts
+
+
+def labelled_sheets(directories: Iterable[str]) -> List[Tuple[str, Dict]]:
+    """(language, sheet) of every cheatsheet with a language field"""
+    sheets = []
+    for directory in directories:
+        for path in sorted(Path(directory).glob('*.json')):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    sheet = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"Error loading {path.name}: {e}")
+                continue
+            if isinstance(sheet, dict) and isinstance(sheet.get('language'),
+                                                      str):
+                sheets.append((sheet['language'], sheet))
+    return sheets
+
+
+def _train_texts(languages_dir: Path, sheets: Iterable[Tuple[str, Dict]]
+                 ) -> Dict[str, List[str]]:
+    texts = interface_texts(languages_dir)
+    for language, sheet in sheets:
+        texts.setdefault(language, []).append(sheet_text(sheet))
+    return texts
+
+
+def main(argv=None) -> int:
+    """Train profiles, measure their accuracy or time a batch"""
+    base_path = Path(__file__).parent.parent
+    parser = argparse.ArgumentParser(description=__doc__.strip().split('\n')[1])
+    parser.add_argument('--languages-dir',
+                        default=str(base_path / 'data' / 'languages'))
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    train = subparsers.add_parser(
+        'train', help="Build profiles from the interface strings and "
+                      "labelled cheatsheets")
+    train.add_argument('directories', nargs='*',
+                       default=[str(base_path / 'data' / 'cheatsheets')])
+    train.add_argument('-o', '--output', default=str(default_profiles_file()))
+    train.add_argument('--size', type=int, default=PROFILE_SIZE)
+
+    evaluate = subparsers.add_parser(
+        'evaluate', help="Cross-validated accuracy on labelled cheatsheets")
+    evaluate.add_argument('directories', nargs='*',
+                          default=[str(base_path / 'data' / 'cheatsheets')])
+    evaluate.add_argument('--folds', type=int, default=5)
+
+    bench = subparsers.add_parser(
+        'bench', help="Time the bundled profiles on many sheets made of "
+                      "labelled items")
+    bench.add_argument('directories', nargs='*',
+                       default=[str(base_path / 'data' / 'cheatsheets')])
+    bench.add_argument('--count', type=int, default=10000)
+    args = parser.parse_args(argv)
+
+    languages_dir = Path(args.languages_dir)
+    sheets = labelled_sheets(args.directories)
+
+    if args.command == 'train':
+        detector = LanguageDetector.train(
+            _train_texts(languages_dir, sheets), args.size)
+        detector.save(args.output)
+        print(f"Profiles of {', '.join(detector.languages)} written to "
+              f"{args.output}")
+        return 0
+
+    if args.command == 'evaluate':
+        # Each fold is detected by profiles trained without it
+        random.Random(0).shuffle(sheets)
+        correct = 0
+        confusion = Counter()
+        for fold in range(args.folds):
+            test = sheets[fold::args.folds]
+            rest = [entry for position, entry in enumerate(sheets)
+                    if position % args.folds != fold]
+            detector = LanguageDetector.train(
+                _train_texts(languages_dir, rest))
+            detected = detector.detect_sheets([sheet for _, sheet in test])
+            for (language, _), guess in zip(test, detected):
+                correct += language == guess
+                confusion[(language, guess)] += 1
+        print(f"Accuracy: {correct}/{len(sheets)} "
+              f"({correct / max(1, len(sheets)):.1%}), "
+              f"{args.folds}-fold cross-validation")
+        for (language, guess), count in sorted(confusion.items()):
+            if language != guess:
+                print(f"  {language} detected as {guess}: {count}")
+        return 0
+
+    # Sheets of 20 random items of one language, like an imported library
+    rng = random.Random(0)
+    items: Dict[str, List[Dict]] = {}
+    for language, sheet in sheets:
+        items.setdefault(language, []).extend(sheet.get('items', []))
+    pools = sorted(items)
+    batch = []
+    for number in range(args.count):
+        language = pools[number % len(pools)]
+        batch.append((language, {
+            'title': '', 'items': rng.sample(items[language],
+                                             min(20, len(items[language])))}))
+    detector = LanguageDetector.load()
+    start = time.perf_counter()
+    detected = detector.detect_sheets([sheet for _, sheet in batch])
+    elapsed = time.perf_counter() - start
+    correct = sum(language == guess
+                  for (language, _), guess in zip(batch, detected))
+    print(f"{len(batch)} sheets in {elapsed:.2f}s "
+          f"({len(batch) / elapsed:.0f} sheets/s, "
+          f"{'numpy' if np is not None else 'pure Python'}), "
+          f"accuracy {correct / len(batch):.1%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
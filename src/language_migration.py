@@ -0,0 +1,130 @@
+"""
+Language Migration
+Checkpoints and atomic writes for changing the language of many cheatsheets
+
+A migration is a plan, one entry per cheatsheet: its filename, its current
+and new language, and the content hash it had when planned. The plan is
+written to a checkpoint file before anything changes, then each migrated
+filename is appended to it, so a migration stopped halfway starts again
+where it was, with the same plan.
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple, Union
+
+from library_index import default_cache_dir
+
+
+CHECKPOINT_FORMAT = 'floating-cheatsheets-migration'
+
+
+class MigrationError(Exception):
+    """Raised when a checkpoint file can't be used"""
+
+
+def migration_id(plan: List[Dict]) -> str:
+    """Identity of a plan, the same however often it is planned"""
+    canonical = json.dumps([[entry['filename'], entry['to'], entry['hash']]
+                            for entry in plan], separators=(',', ':'))
+    return hashlib.sha1(canonical.encode('utf-8')).hexdigest()
+
+
+def default_checkpoint_file(data_path: Path) -> Path:
+    """Checkpoint of the language migration of a cheatsheet directory"""
+    key = hashlib.sha1(str(data_path.resolve()).encode('utf-8')).hexdigest()
+    return default_cache_dir() / f"migration-{key[:16]}.jsonl"
+
+
+def write_file_atomic(path: Path, payload: str) -> None:
+    """
+    Replace a file with new text, all or nothing
+
+    The text is synced to a temporary file next to it, which then takes
+    its name, so an interrupted write leaves the old file in place.
+    """
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            tmp_path.unlink()
+        except OSError:
+            pass
+        raise
+
+
+class MigrationCheckpoint:
+    """
+    JSON lines file: a header with the plan, then one migrated filename
+    per line
+
+    Lines are flushed as they are written; a line cut short by a crash is
+    ignored, its file is found already migrated when the plan runs again.
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self._file = None
+
+    def load(self) -> Optional[Tuple[List[Dict], Set[str]]]:
+        """Plan and migrated filenames, None if there is no checkpoint"""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                lines = f.read().split('\n')
+        except FileNotFoundError:
+            return None
+        except OSError as e:
+            raise MigrationError(f"Cannot read checkpoint: {e}")
+
+        try:
+            header = json.loads(lines[0])
+            plan = header['plan']
+            valid = (header.get('format') == CHECKPOINT_FORMAT and
+                     header.get('migration') == migration_id(plan))
+        except (ValueError, KeyError, TypeError):
+            valid = False
+        if not valid:
+            raise MigrationError(f"Not a migration checkpoint: {self.path}")
+
+        done = set()
+        for line in lines[1:]:
+            try:
+                done.add(json.loads(line))
+            except ValueError:
+                continue
+        return plan, done
+
+    def start(self, plan: List[Dict]) -> None:
+        """Write the header of a new migration, replacing any checkpoint"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        header = json.dumps({'format': CHECKPOINT_FORMAT,
+                             'migration': migration_id(plan),
+                             'plan': plan}, ensure_ascii=False)
+        write_file_atomic(self.path, header + '\n')
+
+    def record(self, filename: str) -> None:
+        """Add a migrated filename"""
+        if self._file is None:
+            self._file = open(self.path, 'a', encoding='utf-8')
+        self._file.write(json.dumps(filename, ensure_ascii=False) + '\n')
+        self._file.flush()
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def remove(self) -> None:
+        """Delete the checkpoint of a finished migration"""
+        self.close()
+        try:
+            self.path.unlink()
+        except FileNotFoundError:
+            pass
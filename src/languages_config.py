@@ -0,0 +1,380 @@
+"""
+Languages Configuration
+Shared, hot-reloadable loader for the languages configuration
+
+Two layouts are supported:
+- a single languages.json holding every language and its interface texts
+- a languages/ directory with a small index.json (names, flags and file
+  names) plus one <code>.json file of interface texts per language, loaded
+  only when that language is first used
+"""
+
+import copy
+import json
+import os
+import threading
+from pathlib import Path
+from types import MappingProxyType
+from typing import Any, Callable, Dict, Mapping, Optional
+
+
+INDEX_FILENAME = 'index.json'
+
+# Default configuration if loading fails
+DEFAULT_LANGUAGES_CONFIG = {
+    'default_language': 'es',
+    'supported_languages': {
+        'es': {
+            'name': 'Español',
+            'flag': '🇪🇸',
+            'interface': {
+                'error_language_unsupported': (
+                    'Idioma no soportado. Idiomas disponibles'
+                )
+            }
+        },
+        'en': {
+            'name': 'English',
+            'flag': '🇺🇸',
+            'interface': {
+                'error_language_unsupported': (
+                    'Language not supported. Available languages'
+                )
+            }
+        }
+    }
+}
+
+
+def freeze(value: Any) -> Any:
+    """Return a read-only copy of a parsed JSON value"""
+    if isinstance(value, dict):
+        return MappingProxyType({k: freeze(v) for k, v in value.items()})
+    if isinstance(value, list):
+        return tuple(freeze(v) for v in value)
+    return value
+
+
+def default_languages_file(base_path: Path) -> str:
+    """Get the languages file of an installation, preferring the split layout"""
+    index_file = base_path / 'data' / 'languages' / INDEX_FILENAME
+    if index_file.exists():
+        return str(index_file)
+    return str(base_path / 'data' / 'languages.json')
+
+
+def write_json_atomic(path, data) -> None:
+    """Write JSON to a temporary file and move it into place"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def _file_signature(path):
+    """Get (mtime, size) of a file, or None if it can't be read"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+class LanguagesConfig:
+    """Parses languages.json once and shares a read-only view of it"""
+
+    def __init__(self, languages_file: str):
+        self.languages_file = languages_file
+        self.split_layout = Path(languages_file).name == INDEX_FILENAME
+        self._data: Dict = {}
+        self._view: Mapping = MappingProxyType({})
+        self._signature = None
+        self._lock = threading.RLock()
+
+        # Split layout: interface texts loaded so far, and file signatures
+        self._interfaces: Dict[str, Mapping] = {}
+        self._interface_signatures: Dict[str, tuple] = {}
+
+        # Callbacks notified after the configuration changed
+        self.listeners = []
+
+        self._load()
+
+    def _load(self) -> None:
+        """Load configuration from the JSON file"""
+        signature = _file_signature(self.languages_file)
+        try:
+            with open(self.languages_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError) as e:
+            print(f"Error loading languages config from "
+                  f"{self.languages_file}: {e}")
+            data = copy.deepcopy(DEFAULT_LANGUAGES_CONFIG)
+
+        self._set_data(data, signature)
+
+    def _set_data(self, data: Dict, signature) -> None:
+        """Swap in new configuration data and its read-only view"""
+        self._data = data
+        self._view = freeze(data)
+        self._signature = signature
+        self._interfaces.clear()
+        self._interface_signatures.clear()
+
+    def get_view(self) -> Mapping:
+        """Get a read-only view of the current configuration"""
+        return self._view
+
+    def _language_file(self, code: str) -> Path:
+        """Path of the interface file of a language (split layout)"""
+        info = self._data.get('supported_languages', {}).get(code, {})
+        filename = info.get('file', f"{code}.json")
+        return Path(self.languages_file).parent / filename
+
+    def get_interface(self, code: str) -> Mapping:
+        """Get the interface texts of a language, loading them if needed"""
+        supported_langs = self._view.get('supported_languages', {})
+        lang_config = supported_langs.get(code, {})
+        if not self.split_layout or 'interface' in lang_config:
+            return lang_config.get('interface', {})
+
+        interface = self._interfaces.get(code)
+        if interface is not None:
+            return interface
+
+        with self._lock:
+            if code not in self._data.get('supported_languages', {}):
+                return MappingProxyType({})
+
+            language_file = self._language_file(code)
+            signature = _file_signature(language_file)
+            try:
+                with open(language_file, 'r', encoding='utf-8') as f:
+                    texts = json.load(f)
+            except (FileNotFoundError, json.JSONDecodeError) as e:
+                print(f"Error loading interface texts from "
+                      f"{language_file}: {e}")
+                texts = {}
+
+            interface = freeze(texts)
+            self._interfaces[code] = interface
+            self._interface_signatures[code] = signature
+
+        return interface
+
+    def _has_changed(self) -> bool:
+        """Check the index and every loaded interface file for changes"""
+        if _file_signature(self.languages_file) != self._signature:
+            return True
+
+        for code, signature in self._interface_signatures.items():
+            if _file_signature(self._language_file(code)) != signature:
+                return True
+
+        return False
+
+    def check_for_changes(self) -> bool:
+        """Reload the file if it changed on disk, returns True if reloaded"""
+        with self._lock:
+            if not self._has_changed():
+                return False
+            self._load()
+        self._notify()
+        return True
+
+    def reload(self) -> bool:
+        """Unconditionally reload the file and notify listeners"""
+        try:
+            with self._lock:
+                self._load()
+        except Exception as e:
+            print(f"Error reloading languages config: {e}")
+            return False
+        self._notify()
+        return True
+
+    def update(self, mutator: Callable[[Dict], Optional[bool]]) -> bool:
+        """
+        Apply a change to the configuration and save it to file
+
+        Args:
+            mutator: Function receiving a mutable copy of the configuration.
+                     Returning False cancels the update.
+
+        Returns:
+            True if the configuration was changed and saved
+        """
+        with self._lock:
+            data = copy.deepcopy(self._data)
+            if mutator(data) is False:
+                return False
+
+            try:
+                write_json_atomic(self.languages_file, data)
+            except Exception as e:
+                print(f"Error saving languages config: {e}")
+                return False
+
+            interfaces = dict(self._interfaces)
+            interface_signatures = dict(self._interface_signatures)
+            self._set_data(data, _file_signature(self.languages_file))
+
+            # Interface files are untouched, keep those already loaded
+            supported_langs = data.get('supported_languages', {})
+            for code, interface in interfaces.items():
+                if code in supported_langs:
+                    self._interfaces[code] = interface
+                    self._interface_signatures[code] = (
+                        interface_signatures[code])
+
+        self._notify()
+        return True
+
+    def _write_interface(self, code: str, texts: Dict) -> bool:
+        """Write the interface file of a language (split layout)"""
+        language_file = self._language_file(code)
+        try:
+            write_json_atomic(language_file, texts)
+        except Exception as e:
+            print(f"Error saving interface texts to {language_file}: {e}")
+            return False
+
+        self._interfaces[code] = freeze(texts)
+        self._interface_signatures[code] = _file_signature(language_file)
+        return True
+
+    def add_language(self, code: str, name: str, flag: str = '',
+                     interface: Optional[Dict] = None) -> bool:
+        """Add (or replace) a language with its interface texts"""
+        interface = dict(interface or {})
+
+        if not self.split_layout:
+            def apply(config):
+                config.setdefault('supported_languages', {})[code] = {
+                    'name': name, 'flag': flag, 'interface': interface
+                }
+            return self.update(apply)
+
+        with self._lock:
+            if not self._write_interface(code, interface):
+                return False
+
+            def apply(config):
+                config.setdefault('supported_languages', {})[code] = {
+                    'name': name, 'flag': flag, 'file': f"{code}.json"
+                }
+            return self.update(apply)
+
+    def remove_language(self, code: str) -> bool:
+        """Remove a language, and its interface file in the split layout"""
+        with self._lock:
+            if code not in self._data.get('supported_languages', {}):
+                return False
+
+            language_file = (self._language_file(code)
+                             if self.split_layout else None)
+
+            def apply(config):
+                del config['supported_languages'][code]
+
+            if not self.update(apply):
+                return False
+
+            if language_file is not None:
+                try:
+                    language_file.unlink()
+                except OSError:
+                    pass
+            return True
+
+    def update_interface(self, code: str, interface_updates: Dict) -> bool:
+        """Update some interface texts of a language"""
+        if not self.split_layout:
+            def apply(config):
+                lang_config = config['supported_languages'].get(code)
+                if not lang_config:
+                    return False
+                lang_config.setdefault('interface', {}).update(
+                    interface_updates)
+            return self.update(apply)
+
+        with self._lock:
+            if code not in self._data.get('supported_languages', {}):
+                return False
+
+            texts = dict(self.get_interface(code))
+            texts.update(interface_updates)
+            if not self._write_interface(code, texts):
+                return False
+
+        self._notify()
+        return True
+
+    def register_listener(self, callback):
+        """Register callback called once per configuration change"""
+        if callback not in self.listeners:
+            self.listeners.append(callback)
+
+    def unregister_listener(self, callback):
+        """Unregister configuration change callback"""
+        if callback in self.listeners:
+            self.listeners.remove(callback)
+
+    def _notify(self) -> None:
+        """Notify all listeners, after every view has been swapped"""
+        for callback in list(self.listeners):
+            try:
+                callback()
+            except Exception as e:
+                print(f"Error executing languages config listener: {e}")
+
+
+# Una instancia compartida por archivo de idiomas
+_instances: Dict[str, LanguagesConfig] = {}
+_instances_lock = threading.Lock()
+
+
+def split_languages_file(source_file: str, target_dir: str) -> str:
+    """
+    Convert a single languages.json into the split layout
+
+    Args:
+        source_file: Path of the existing languages.json
+        target_dir: Directory receiving index.json and one file per language
+
+    Returns:
+        Path of the generated index.json
+    """
+    with open(source_file, 'r', encoding='utf-8') as f:
+        config = json.load(f)
+
+    target = Path(target_dir)
+    target.mkdir(parents=True, exist_ok=True)
+
+    index = {key: value for key, value in config.items()
+             if key != 'supported_languages'}
+    index['supported_languages'] = {}
+
+    for code, info in config.get('supported_languages', {}).items():
+        entry = {key: value for key, value in info.items()
+                 if key != 'interface'}
+        entry['file'] = f"{code}.json"
+        index['supported_languages'][code] = entry
+        write_json_atomic(target / entry['file'], info.get('interface', {}))
+
+    index_file = target / INDEX_FILENAME
+    write_json_atomic(index_file, index)
+    return str(index_file)
+
+
+def get_languages_config(languages_file: str) -> LanguagesConfig:
+    """Get the shared LanguagesConfig for a file"""
+    key = str(Path(languages_file).resolve())
+
+    with _instances_lock:
+        instance = _instances.get(key)
+        if instance is None:
+            instance = LanguagesConfig(languages_file)
+            _instances[key] = instance
+
+    return instance
@@ -0,0 +1,375 @@
+#!/usr/bin/env python3
+"""
+Library Check
+Integrity check (fsck) of every cheatsheet of a library root
+
+Each file is decoded, parsed and validated against the rules of
+CheatSheetManager.validate_cheatsheet_data by a pool of workers. The
+results are then cross-checked for duplicated sheets, titles and items,
+tags used by a single sheet and language variants (foo.json, foo-en.json)
+whose language does not match.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+from library_index import PARALLEL_MIN_FILES, sheet_content_hash
+from packed_library import PACK_SUFFIX, PackedLibrary
+
+
+ERROR = 'error'
+WARNING = 'warning'
+
+# Kind of every problem, with its severity
+PROBLEM_KINDS = {
+    'encoding': ERROR,             # Not UTF-8
+    'json': ERROR,                 # Not valid JSON
+    'schema': ERROR,               # Breaks a validate_cheatsheet_data rule
+    'duplicate_item_id': ERROR,    # Two items of a sheet share an id
+    'language_mismatch': ERROR,    # foo-en.json is not in English
+    'duplicate_sheet': WARNING,    # Same content as another file
+    'duplicate_title': WARNING,    # Same title and language as another file
+    'duplicate_item_code': WARNING,
+    'orphaned_tag': WARNING        # Tag no other cheatsheet uses
+}
+
+# Checked source: (filename, path of the file or its bytes)
+Source = Tuple[str, Union[str, bytes]]
+
+
+def split_language_suffix(filename: str, languages: Iterable[str]
+                          ) -> Tuple[str, Optional[str]]:
+    """
+    Split a language variant filename into its base and language
+
+    'git-commands-en' -> ('git-commands', 'en'), 'bench_commands_en' ->
+    ('bench_commands', 'en'), 'git-commands' -> ('git-commands', None).
+    """
+    for separator in ('-', '_'):
+        base, found, suffix = filename.rpartition(separator)
+        if found and base and suffix in languages:
+            return base, suffix
+    return filename, None
+
+
+class SheetSchema:
+    """
+    The rules of validate_cheatsheet_data compiled into one function
+
+    The supported languages are resolved once instead of once per sheet,
+    and types are checked too, since files on disk may hold anything.
+    """
+
+    def __init__(self, languages: Iterable[str]):
+        self.languages = frozenset(languages)
+
+    def __call__(self, data) -> List[str]:
+        """Errors of a parsed file, empty if it is a valid cheatsheet"""
+        if not isinstance(data, dict):
+            return ["Not a cheatsheet object"]
+
+        errors = []
+        title = data.get('title')
+        if not isinstance(title, str) or not title.strip():
+            errors.append("Title is required")
+
+        language = data.get('language')
+        if language is not None and language not in self.languages:
+            errors.append(f"Unsupported language: {language}")
+
+        tags = data.get('tags', [])
+        if not isinstance(tags, list):
+            errors.append("Tags must be a list")
+        elif not all(isinstance(tag, str) for tag in tags):
+            errors.append("Tags must be strings")
+
+        items = data.get('items')
+        if not isinstance(items, list) or len(items) == 0:
+            errors.append("There must be at least one item")
+            return errors
+        if self._items_valid(items):
+            return errors
+
+        for number, item in enumerate(items, 1):
+            if not isinstance(item, dict):
+                errors.append(f"Item {number}: must be an object")
+                continue
+            for field in ('code', 'description'):
+                value = item.get(field)
+                if not isinstance(value, str) or not value.strip():
+                    errors.append(f"Item {number}: {field} is required")
+            for field in ('id', 'example'):
+                if not isinstance(item.get(field, ''), str):
+                    errors.append(f"Item {number}: {field} must be a string")
+        return errors
+
+    @staticmethod
+    def _items_valid(items: List) -> bool:
+        """Fast path for the common case, every item valid"""
+        try:
+            return all([
+                item['code'].strip() and item['description'].strip() and
+                type(item.get('id', '')) is str and
+                type(item.get('example', '')) is str
+                for item in items])
+        except (TypeError, KeyError, AttributeError):
+            # Not an object, or a missing or non-string code/description;
+            # the detailed pass tells which
+            return False
+
+
+def _repeated(values: List) -> List:
+    """Values found more than once, in order of their second use"""
+    seen = set()
+    repeated = []
+    for value in values:
+        if value in seen and value not in repeated:
+            repeated.append(value)
+        seen.add(value)
+    return repeated
+
+
+def check_source(schema: SheetSchema, source: Source) -> Dict:
+    """
+    Decode, parse and validate one file (runs in a worker)
+
+    Returns its problems, plus what the library-wide checks need: title,
+    language, tags and whether it is a valid sheet.
+    """
+    filename, content = source
+    result = {'filename': filename, 'problems': [], 'valid': False}
+    problems = result['problems']
+    try:
+        if isinstance(content, str):
+            with open(content, 'rb') as f:
+                content = f.read()
+        text = content.decode('utf-8')
+    except OSError as e:
+        problems.append(('json', f"Cannot read: {e}"))
+        return result
+    except UnicodeDecodeError as e:
+        problems.append(('encoding', f"Not UTF-8: {e}"))
+        return result
+
+    try:
+        data = json.loads(text)
+    except json.JSONDecodeError as e:
+        problems.append(('json', str(e)))
+        return result
+
+    for error in schema(data):
+        problems.append(('schema', error))
+    if not isinstance(data, dict):
+        return result
+
+    items = data.get('items')
+    if isinstance(items, list):
+        for field in ('id', 'code'):
+            values = [item.get(field) for item in items
+                      if isinstance(item, dict)]
+            values = [value for value in values
+                      if isinstance(value, str) and value]
+            if len(set(values)) == len(values):
+                continue
+            for value in _repeated(values):
+                problems.append((f"duplicate_item_{field}",
+                                 f"Item {field} {value!r} is used more "
+                                 f"than once"))
+
+    title = data.get('title')
+    tags = data.get('tags')
+    result.update({
+        'title': title if isinstance(title, str) else '',
+        'language': data.get('language'),
+        'tags': [tag for tag in tags if isinstance(tag, str)]
+        if isinstance(tags, list) else []
+    })
+    # Only valid sheets take part in the duplicate and language checks
+    result['valid'] = not any(kind == 'schema' for kind, _ in problems)
+    result['items'] = len(items) if isinstance(items, list) else 0
+    return result
+
+
+def _content_hash(source: Source) -> str:
+    """Content hash of a file already checked to be a valid sheet"""
+    content = source[1]
+    if isinstance(content, str):
+        with open(content, 'rb') as f:
+            content = f.read()
+    return sheet_content_hash(json.loads(content.decode('utf-8')))
+
+
+def _sources(root: Path) -> Tuple[List[Source], Optional[PackedLibrary]]:
+    """Files of a directory, or the sheets of a pack, sorted by filename"""
+    if root.suffix == PACK_SUFFIX:
+        pack = PackedLibrary(root)
+        return ([(filename, bytes(pack.get_bytes(filename)))
+                 for filename in pack.filenames()], pack)
+    sources = [(path.name[:-len('.json')], str(path))
+               for path in root.glob('*.json')]
+    return sorted(sources), None
+
+
+def _run(schema: SheetSchema, sources: List[Source],
+         workers: int, processes: int) -> List[Dict]:
+    """Check every source, in order, on the configured pool"""
+    check = partial(check_source, schema)
+    if len(sources) < PARALLEL_MIN_FILES:
+        return list(map(check, sources))
+    if processes > 0:
+        chunksize = max(1, len(sources) // (processes * 4))
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            return list(pool.map(check, sources, chunksize=chunksize))
+    if workers > 1:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(check, sources))
+    return list(map(check, sources))
+
+
+def _duplicate_sheets(valid: List[Dict], sources: List[Source]
+                      ) -> Dict[str, str]:
+    """
+    Map each file with the same content as an earlier one to that one
+
+    Only files sharing title and item count can be equal, so only those
+    are hashed, usually a tiny part of the library.
+    """
+    groups: Dict[Tuple[str, int], List[Dict]] = {}
+    for result in valid:
+        groups.setdefault((result['title'], result['items']), []).append(result)
+
+    source_of = dict(sources)
+    duplicates = {}
+    for group in groups.values():
+        if len(group) < 2:
+            continue
+        first_with_hash: Dict[str, str] = {}
+        for result in group:
+            filename = result['filename']
+            content_hash = _content_hash((filename, source_of[filename]))
+            other = first_with_hash.setdefault(content_hash, filename)
+            if other != filename:
+                duplicates[filename] = other
+    return duplicates
+
+
+def _cross_check(results: List[Dict], sources: List[Source],
+                 languages: Iterable[str], default_language: str) -> None:
+    """Add the problems found by comparing files with each other"""
+    def add(result: Dict, kind: str, message: str) -> None:
+        result['problems'].append((kind, message))
+
+    valid = [result for result in results if result['valid']]
+    by_filename = {result['filename']: result for result in valid}
+    duplicates = _duplicate_sheets(valid, sources)
+
+    first_with_title: Dict[Tuple[str, str], str] = {}
+    tag_users: Dict[str, List[Dict]] = {}
+    for result in valid:
+        language = result['language'] or default_language
+        other = duplicates.get(result['filename'])
+        if other is not None:
+            add(result, 'duplicate_sheet', f"Same content as {other}")
+        else:
+            key = (result['title'].strip().lower(), language)
+            other = first_with_title.setdefault(key, result['filename'])
+            if other != result['filename']:
+                add(result, 'duplicate_title',
+                    f"Same title and language as {other}")
+
+        base, suffix = split_language_suffix(result['filename'], languages)
+        if suffix is None:
+            continue
+        if language != suffix:
+            add(result, 'language_mismatch',
+                f"Named as the '{suffix}' variant but its language is "
+                f"'{language}'")
+        original = by_filename.get(base)
+        if (original is not None and
+                (original['language'] or default_language) == suffix):
+            add(original, 'language_mismatch',
+                f"Same language '{suffix}' as its variant "
+                f"{result['filename']}")
+
+    # Tags of every parsed sheet count, valid or not
+    for result in results:
+        for tag in set(result.get('tags', [])):
+            tag_users.setdefault(tag, []).append(result)
+    for tag, users in tag_users.items():
+        if len(users) == 1:
+            add(users[0], 'orphaned_tag',
+                f"Tag {tag!r} is used by no other cheatsheet")
+
+
+def check_library(root: Union[str, Path], languages: Iterable[str],
+                  default_language: str = 'en',
+                  workers: Optional[int] = None,
+                  processes: int = 0) -> Dict:
+    """
+    Check every cheatsheet of a directory or pack
+
+    Returns:
+        Report with the root, the number of files, the seconds taken and
+        one problem per entry: file, kind, severity and message
+    """
+    start = time.perf_counter()
+    root = Path(root)
+    languages = frozenset(languages)
+    sources, pack = _sources(root)
+    try:
+        results = _run(SheetSchema(languages), sources,
+                       workers or min(8, os.cpu_count() or 1), processes)
+    finally:
+        if pack is not None:
+            pack.close()
+    _cross_check(results, sources, languages, default_language)
+
+    problems = []
+    for result in results:
+        for kind, message in result['problems']:
+            problems.append({
+                'file': f"{result['filename']}.json",
+                'kind': kind,
+                'severity': PROBLEM_KINDS[kind],
+                'message': message
+            })
+    return {
+        'root': str(root),
+        'files': len(sources),
+        'errors': sum(1 for p in problems if p['severity'] == ERROR),
+        'warnings': sum(1 for p in problems if p['severity'] == WARNING),
+        'seconds': time.perf_counter() - start,
+        'problems': problems
+    }
+
+
+def main(argv=None) -> int:
+    """Time a check of a synthetic library of many sheets"""
+    parser = argparse.ArgumentParser(
+        description="Time the library check on a synthetic library")
+    parser.add_argument('target_dir')
+    parser.add_argument('--count', type=int, default=50000)
+    parser.add_argument('--processes', type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args(argv)
+
+    if not Path(args.target_dir).is_dir():
+        from http_api import generate_synthetic_library
+        generate_synthetic_library(args.target_dir, args.count)
+
+    report = check_library(args.target_dir, ['es', 'en', 'fr', 'pt'],
+                           processes=args.processes)
+    print(f"{report['files']} files checked in {report['seconds']:.2f}s "
+          f"with {args.processes} processes: {report['errors']} errors, "
+          f"{report['warnings']} warnings")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,688 @@
+"""
+Library Index
+Persisted manifest of a cheatsheet directory for fast startup
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from sheet_model import Item, Sheet, json_default
+
+try:
+    import fcntl
+except ImportError:
+    # Windows: saves of other processes are only noticed by the journal
+    # changing under this one
+    fcntl = None
+
+
+INDEX_VERSION = 2
+
+# Marker hiding a cheatsheet of a lower library root, e.g. foo.hidden
+WHITEOUT_SUFFIX = '.hidden'
+
+# Below this many files to parse, starting a pool costs more than it saves
+PARALLEL_MIN_FILES = 64
+
+# Entries saved since the manifest was written, next to it: index-*.json.log
+JOURNAL_SUFFIX = '.log'
+# The manifest is rewritten, folding the journal in, once the journal holds
+# more entries than this share of the library (and at least the minimum)
+JOURNAL_SHARE = 0.5
+JOURNAL_MIN_ENTRIES = 64
+
+
+def is_sheet_filename(filename) -> bool:
+    """
+    Whether a name can be a cheatsheet of a directory
+
+    Names come from URLs and sockets too; one with a separator, '..' or
+    NUL could reach a file outside the library.
+    """
+    return (isinstance(filename, str) and bool(filename) and
+            not filename.startswith('.') and '..' not in filename and
+            not any(char in filename for char in '/\\\0'))
+
+
+def default_cache_dir() -> Path:
+    """Get the per-user cache directory of the application"""
+    cache_home = os.environ.get('XDG_CACHE_HOME')
+    base = Path(cache_home) if cache_home else Path.home() / '.cache'
+    return base / 'floating-cheatsheets'
+
+
+def default_index_file(data_path: Path) -> Path:
+    """Get the manifest file used for a cheatsheet directory"""
+    key = hashlib.sha1(str(data_path.resolve()).encode('utf-8')).hexdigest()
+    return default_cache_dir() / f"index-{key[:16]}.json"
+
+
+def _search_fields(values: Iterable) -> str:
+    """Lowercased fields joined by NUL, values that aren't text are empty"""
+    # NUL keeps a query from matching across two fields
+    return '\0'.join([value if isinstance(value, str) else ''
+                      for value in values]).lower()
+
+
+def header_search_text(sheet: Dict) -> str:
+    """Lowercased searched text of a sheet's title and tags"""
+    tags = sheet.get('tags', [])
+    return _search_fields([sheet.get('title', '')] +
+                          (list(tags) if isinstance(tags, (list, tuple))
+                           else []))
+
+
+def item_search_text(item: Dict) -> str:
+    """Lowercased searched text of one item"""
+    # Malformed items still get their (empty) part, parts follow items
+    if not isinstance(item, (dict, Item)):
+        return ''
+    return _search_fields([item.get('code', ''), item.get('description', ''),
+                           item.get('example', '')])
+
+
+def search_parts(sheet: Dict) -> List[str]:
+    """Searched text of a sheet: the header, then one part per item"""
+    items = sheet.get('items', [])
+    return [header_search_text(sheet)] + [
+        item_search_text(item)
+        for item in (items if isinstance(items, (list, tuple)) else [])]
+
+
+def build_search_text(sheet: Dict) -> str:
+    """Lowercased text searched by queries: title, tags and items"""
+    return '\0'.join(search_parts(sheet))
+
+
+def sheet_content_hash(sheet: Dict) -> str:
+    """Stable hash of what a cheatsheet says: title, language, tags, items"""
+    canonical = json.dumps(
+        [sheet.get('title'), sheet.get('language'), sheet.get('tags'),
+         sheet.get('items')],
+        sort_keys=True, ensure_ascii=False, separators=(',', ':'),
+        default=json_default)
+    return hashlib.sha1(canonical.encode('utf-8')).hexdigest()
+
+
+def assign_item_ids(items: List, previous: Optional[List] = None) -> List:
+    """
+    Give every item of a sheet a stable id, returns the items with ids
+
+    Items that lost their id, e.g. re-parsed from the editor text, take the
+    id of a previous item with the same code. Others get an id derived from
+    their content, so a sheet written before ids existed shows the same ids
+    on every read until it is saved with them.
+    """
+    taken = {item['id'] for item in items
+             if isinstance(item, (dict, Item)) and item.get('id')}
+
+    carried: Dict[str, List[str]] = {}
+    for item in previous or []:
+        if (isinstance(item, (dict, Item)) and item.get('id') and
+                item['id'] not in taken):
+            carried.setdefault(item.get('code', ''), []).append(item['id'])
+    # Carried ids are reserved even if unused, derived ids must not clash
+    reserved = taken | {item_id for ids in carried.values() for item_id in ids}
+
+    result = []
+    for item in items:
+        if not isinstance(item, (dict, Item)) or item.get('id'):
+            result.append(item)
+            continue
+
+        ids = carried.get(item.get('code', ''))
+        if ids:
+            item_id = ids.pop(0)
+        else:
+            content = '\0'.join([item.get('code', ''),
+                                 item.get('description', ''),
+                                 item.get('example', '')])
+            base = hashlib.sha1(content.encode('utf-8')).hexdigest()[:10]
+            item_id = base
+            counter = 2
+            while item_id in reserved:
+                item_id = f"{base}-{counter}"
+                counter += 1
+        reserved.add(item_id)
+        result.append({'id': item_id, **item})
+    return result
+
+
+def load_sheet_file(path: str) -> Tuple[Optional[Dict], Optional[str],
+                                         Optional[str]]:
+    """
+    Read, parse and hash one cheatsheet file
+
+    Runs in worker threads or processes, so errors are returned rather than
+    printed. Returns (data, content hash, error).
+    """
+    try:
+        with open(path, 'rb') as f:
+            data = json.loads(f.read().decode('utf-8'))
+    except (json.JSONDecodeError, UnicodeDecodeError,
+            FileNotFoundError) as e:
+        return None, None, f"Error loading {path}: {e}"
+    content_hash = sheet_content_hash(data) if isinstance(data, dict) else None
+    return data, content_hash, None
+
+
+class LibraryIndex:
+    """
+    Parsed cheatsheets of a directory, persisted between runs
+
+    Each entry keeps the file's mtime and size, so a refresh only stats the
+    directory and re-parses files that changed since the manifest was saved,
+    and a content hash, so rewrites that change nothing are not reported.
+    """
+
+    def __init__(self, data_path: Path, index_file: Optional[str] = None,
+                 workers: Optional[int] = None, processes: int = 0):
+        self.data_path = Path(data_path)
+        # Pools parsing many files at once, e.g. on the first run or after
+        # the cache was wiped: threads overlap the reads, processes also
+        # spread the parsing and hashing over several cores
+        self.workers = workers or min(8, os.cpu_count() or 1)
+        self.processes = processes
+        self.index_file = (Path(index_file) if index_file
+                           else default_index_file(self.data_path))
+        self.entries: Dict[str, Dict] = {}
+        self.whiteouts: Set[str] = set()
+        self._search_texts: Dict[str, str] = {}
+        # Per-item parts of the search texts, so item patches only
+        # rebuild the text of the items they touch
+        self._search_parts: Dict[str, List[str]] = {}
+        self._loaded = False
+        self.journal_file = Path(f"{self.index_file}{JOURNAL_SUFFIX}")
+        # Filenames whose entry changed since the last save
+        self._changed: Set[str] = set()
+        # Entries in the journal, None until the manifest has been written
+        self._journal_entries: Optional[int] = None
+        # (inode, size) of the journal as this process left it, None if
+        # there was none; the widget, the CLI and the daemon share it
+        self._journal_identity: Optional[Tuple[int, int]] = None
+        self._save_lock = threading.Lock()
+
+    def _load_manifest(self) -> None:
+        """Load the persisted manifest if it matches this directory"""
+        self._loaded = True
+        try:
+            with open(self.index_file, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return
+
+        try:
+            if (manifest.get('version') != INDEX_VERSION or
+                    manifest.get('data_path') !=
+                    str(self.data_path.resolve())):
+                return
+
+            entries = manifest['entries']
+            journal = self._read_journal()
+            for filename, entry in journal:
+                if entry is None:
+                    entries.pop(filename, None)
+                else:
+                    entries[filename] = entry
+            for entry in entries.values():
+                self._decode_entry(entry)
+        except (AttributeError, KeyError, TypeError, ValueError):
+            # A damaged or hand-edited cache is dropped, the next refresh
+            # parses every file and the next save rewrites it
+            self._journal_identity = None
+            return
+        self.entries = entries
+        self._journal_entries = len(journal)
+
+    @staticmethod
+    def _decode_entry(entry: Dict) -> None:
+        """Check a loaded entry and turn its data into a Sheet"""
+        stat, sheet = entry['stat'], entry['sheet']
+        content_hash = entry['hash']
+        if (not isinstance(stat, list) or len(stat) != 2 or
+                not all(isinstance(value, int) for value in stat) or
+                not isinstance(content_hash, (str, type(None)))):
+            raise ValueError("Invalid index entry")
+        if sheet is not None:
+            entry['sheet'] = Sheet.from_dict(sheet)
+
+    def _read_journal(self) -> List[Tuple[str, Optional[Dict]]]:
+        """(filename, entry or None if removed) saved after the manifest"""
+        self._journal_identity = None
+        try:
+            with open(self.journal_file, 'r', encoding='utf-8') as f:
+                lines = f.read().split('\n')
+                self._journal_identity = self._identity(os.fstat(f.fileno()))
+        except (OSError, UnicodeDecodeError):
+            return []
+
+        journal = []
+        for line in lines:
+            # A line cut short by a crash is skipped, its file looks
+            # changed to the next refresh and is parsed again
+            try:
+                filename, entry = json.loads(line)
+            except (ValueError, TypeError):
+                continue
+            if isinstance(filename, str) and (entry is None or
+                                              isinstance(entry, dict)):
+                journal.append((filename, entry))
+        return journal
+
+    def save(self) -> bool:
+        """
+        Persist the entries that changed since the last save
+
+        They are appended to the journal, so saving an edit costs the size
+        of the sheet rather than of the library. The whole manifest is only
+        written when the journal has grown past JOURNAL_SHARE of it.
+        """
+        with self._save_lock:
+            changed, self._changed = self._changed, set()
+            if not changed:
+                return True
+
+            limit = max(JOURNAL_MIN_ENTRIES,
+                        len(self.entries) * JOURNAL_SHARE)
+            try:
+                self.index_file.parent.mkdir(parents=True, exist_ok=True)
+                with self._file_lock():
+                    # Another process compacted or appended since: its
+                    # manifest was never read here, replace it
+                    if (self._journal_entries is None or
+                            self._journal_entries + len(changed) > limit or
+                            self._journal_identity !=
+                            self._current_journal_identity()):
+                        self._write_manifest()
+                    else:
+                        self._append_journal(changed)
+            except OSError as e:
+                print(f"Error saving library index {self.index_file}: {e}")
+                self._changed |= changed
+                return False
+            return True
+
+    @contextmanager
+    def _file_lock(self) -> Iterator[None]:
+        """Keep other processes from saving the same manifest meanwhile"""
+        if fcntl is None:
+            yield
+            return
+        with open(f"{self.index_file}.lock", 'a') as lock:
+            # Released when the file is closed
+            fcntl.flock(lock.fileno(), fcntl.LOCK_EX)
+            yield
+
+    @staticmethod
+    def _identity(stat: os.stat_result) -> Tuple[int, int]:
+        return stat.st_ino, stat.st_size
+
+    def _current_journal_identity(self) -> Optional[Tuple[int, int]]:
+        try:
+            return self._identity(os.stat(self.journal_file))
+        except FileNotFoundError:
+            return None
+
+    def _write_manifest(self) -> None:
+        """Write every entry to the manifest and empty the journal"""
+        manifest = {
+            'version': INDEX_VERSION,
+            'data_path': str(self.data_path.resolve()),
+            'entries': self.entries
+        }
+        # Unique per thread too, creates may run concurrently
+        tmp_path = (f"{self.index_file}.{os.getpid()}."
+                    f"{threading.get_ident()}.tmp")
+        # dumps() uses the C encoder, dump() to a file does not
+        payload = json.dumps(manifest, ensure_ascii=False,
+                             separators=(',', ':'), default=json_default)
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(payload)
+        os.replace(tmp_path, self.index_file)
+        self.journal_file.unlink(missing_ok=True)
+        self._journal_entries = 0
+        self._journal_identity = None
+
+    def _append_journal(self, filenames: Set[str]) -> None:
+        """Append the current entry of each filename to the journal"""
+        payload = ''.join(
+            json.dumps([filename, self.entries.get(filename)],
+                       ensure_ascii=False, separators=(',', ':'),
+                       default=json_default) + '\n'
+            for filename in sorted(filenames))
+        # One write, appends of other processes don't land inside a line
+        with open(self.journal_file, 'a', encoding='utf-8') as f:
+            f.write(payload)
+            f.flush()
+            self._journal_identity = self._identity(os.fstat(f.fileno()))
+        self._journal_entries += len(filenames)
+
+    def _load_files(self, filenames: List[str]
+                    ) -> Iterator[Tuple[Optional[Dict], Optional[str]]]:
+        """
+        Parse files, in parallel when there are many
+
+        Yields (data, content hash) in the order of filenames, whatever
+        the pool, so a load always gives the same index and changes.
+        """
+        paths = [str(self.data_path / f"{filename}.json")
+                 for filename in filenames]
+        if len(paths) < PARALLEL_MIN_FILES:
+            yield from self._report(map(load_sheet_file, paths))
+            return
+
+        # Only loaded when a pool is started, most runs parse a few files
+        from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+        if self.processes > 0:
+            chunksize = max(1, len(paths) // (self.processes * 4))
+            with ProcessPoolExecutor(max_workers=self.processes) as pool:
+                yield from self._report(
+                    pool.map(load_sheet_file, paths, chunksize=chunksize))
+        elif self.workers > 1:
+            with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                yield from self._report(pool.map(load_sheet_file, paths))
+        else:
+            yield from self._report(map(load_sheet_file, paths))
+
+    @staticmethod
+    def _report(results: Iterable[Tuple]) -> Iterator[Tuple]:
+        """Print the errors of load_sheet_file results, in order"""
+        for data, content_hash, error in results:
+            if error:
+                print(error)
+            yield data, content_hash
+
+    def _needs_parse(self, filename: str, stat: os.stat_result) -> bool:
+        entry = self.entries.get(filename)
+        return entry is None or entry['stat'] != [stat.st_mtime_ns,
+                                                  stat.st_size]
+
+    def _update_entry(self, filename: str, stat: os.stat_result,
+                      parsed: Optional[Dict] = None) -> str:
+        """Re-parse a file if its stat changed, returns the change kind"""
+        # Data just written is recorded even if the stat looks the same,
+        # a same-size rewrite can land on the same mtime tick
+        if parsed is None:
+            if not self._needs_parse(filename, stat):
+                return ''
+            parsed, content_hash = next(self._load_files([filename]))
+            return self._record_entry(filename, stat, parsed, content_hash)
+        return self._record_entry(filename, stat, parsed)
+
+    def _record_entry(self, filename: str, stat: os.stat_result,
+                      sheet: Optional[Dict],
+                      content_hash: Optional[str] = None) -> str:
+        """Store the parsed data of a file, returns the change kind"""
+        entry = self.entries.get(filename)
+        signature = [stat.st_mtime_ns, stat.st_size]
+        # Held as compact Sheets, many stay in memory for the whole run
+        if isinstance(sheet, dict):
+            sheet = Sheet.from_dict(sheet)
+        elif not isinstance(sheet, Sheet):
+            # JSON that isn't an object, e.g. a list, is no cheatsheet
+            sheet = None
+        # Invalid files are kept with no data so they are not re-parsed
+        # until they change again
+        if sheet is not None and content_hash is None:
+            content_hash = sheet_content_hash(sheet)
+        self.entries[filename] = {
+            'stat': signature, 'sheet': sheet, 'hash': content_hash
+        }
+        self._forget_search_text(filename)
+        self._changed.add(filename)
+
+        had_sheet = entry is not None and entry['sheet'] is not None
+        if sheet is None:
+            return 'deleted' if had_sheet else ''
+        if not had_sheet:
+            return 'created'
+        # Rewritten or touched without changing what it says
+        return 'updated' if entry['hash'] != content_hash else ''
+
+    def _forget_search_text(self, filename: str) -> None:
+        self._search_texts.pop(filename, None)
+        self._search_parts.pop(filename, None)
+
+    def _remove_entry(self, filename: str) -> str:
+        """Forget a file, returns the change kind"""
+        entry = self.entries.pop(filename, None)
+        if entry is None:
+            return ''
+        self._forget_search_text(filename)
+        self._changed.add(filename)
+        return 'deleted' if entry['sheet'] is not None else ''
+
+    def refresh(self) -> List[Tuple[str, str]]:
+        """
+        Bring the index in sync with the directory
+
+        Returns:
+            List of (action, filename) with action 'created', 'updated' or
+            'deleted' for every file that changed since the last refresh
+        """
+        if not self._loaded:
+            self._load_manifest()
+
+        changes = []
+        seen = set()
+        whiteouts = set()
+        # Files new or changed since the manifest, parsed all at once
+        pending = []
+        try:
+            with os.scandir(self.data_path) as it:
+                for dir_entry in it:
+                    if dir_entry.name.endswith(WHITEOUT_SUFFIX):
+                        whiteouts.add(dir_entry.name[:-len(WHITEOUT_SUFFIX)])
+                        continue
+                    if not dir_entry.name.endswith('.json'):
+                        continue
+                    filename = dir_entry.name[:-len('.json')]
+                    try:
+                        stat = dir_entry.stat()
+                    except OSError:
+                        continue
+                    seen.add(filename)
+                    if self._needs_parse(filename, stat):
+                        pending.append((filename, stat))
+        except FileNotFoundError:
+            pass
+        self.whiteouts = whiteouts
+
+        # Sorted, so changes come in the same order however files are read
+        pending.sort(key=lambda entry: entry[0])
+        loaded = self._load_files([filename for filename, _ in pending])
+        for (filename, stat), (sheet, content_hash) in zip(pending, loaded):
+            action = self._record_entry(filename, stat, sheet, content_hash)
+            if action:
+                changes.append((action, filename))
+
+        for filename in [f for f in self.entries if f not in seen]:
+            action = self._remove_entry(filename)
+            if action:
+                changes.append((action, filename))
+
+        self.save()
+        return changes
+
+    def _refresh_whiteout(self, filename: str) -> None:
+        if (self.data_path / f"{filename}{WHITEOUT_SUFFIX}").exists():
+            self.whiteouts.add(filename)
+        else:
+            self.whiteouts.discard(filename)
+
+    def refresh_file(self, filename: str) -> str:
+        """
+        Bring a single file in sync, returns the change kind
+
+        Not saved, the write or refresh the caller is part of saves once.
+        """
+        if not self._loaded:
+            self._load_manifest()
+
+        self._refresh_whiteout(filename)
+        try:
+            stat = os.stat(self.data_path / f"{filename}.json")
+        except OSError:
+            action = self._remove_entry(filename)
+        else:
+            action = self._update_entry(filename, stat)
+        return action
+
+    def store(self, filename: str, sheet: Dict) -> str:
+        """
+        Record a file just written with already parsed data
+
+        Saves re-parsing files written in bulk; call save() afterwards.
+        """
+        if not self._loaded:
+            self._load_manifest()
+
+        self._refresh_whiteout(filename)
+        try:
+            stat = os.stat(self.data_path / f"{filename}.json")
+        except OSError:
+            return self._remove_entry(filename)
+        return self._update_entry(filename, stat, sheet)
+
+    def remove(self, filename: str) -> str:
+        """Record a file just deleted; call save() afterwards"""
+        if not self._loaded:
+            self._load_manifest()
+
+        self._refresh_whiteout(filename)
+        return self._remove_entry(filename)
+
+    def store_items(self, filename: str, sheet: Dict, start: int,
+                    removed: int, inserted: int) -> str:
+        """
+        Record a file just written by an item patch
+
+        items[start:start + inserted] of the sheet replaced `removed` items,
+        only their search text is rebuilt. Call save() afterwards.
+        """
+        parts = self._search_parts.get(filename)
+        action = self.store(filename, sheet)
+        sheet = self.get(filename)
+        if parts is not None and sheet is not None:
+            parts[0] = header_search_text(sheet)
+            parts[start + 1:start + 1 + removed] = [
+                item_search_text(item)
+                for item in sheet['items'][start:start + inserted]]
+            self._search_parts[filename] = parts
+            self._search_texts[filename] = '\0'.join(parts)
+        return action
+
+    def get(self, filename: str, cache: bool = True) -> Optional[Dict]:
+        """Get the parsed data of a file as a read-only Sheet"""
+        # Every sheet is in memory already, cache is for PackedLibrary
+        entry = self.entries.get(filename)
+        return entry['sheet'] if entry is not None else None
+
+    def get_hash(self, filename: str) -> Optional[str]:
+        """Get the content hash of a file"""
+        entry = self.entries.get(filename)
+        return entry['hash'] if entry is not None else None
+
+    def has(self, filename: str) -> bool:
+        """Check whether a valid cheatsheet is indexed under a filename"""
+        return self.get(filename) is not None
+
+    def filenames(self) -> List[str]:
+        """Filenames of all valid cheatsheets"""
+        return [filename for filename, entry in self.entries.items()
+                if entry['sheet'] is not None]
+
+    def stored_filenames(self) -> List[str]:
+        """Filenames of every .json file, valid cheatsheet or not"""
+        return list(self.entries)
+
+    def source_path(self, filename: str) -> Optional[Path]:
+        """File a cheatsheet is read from"""
+        return self.data_path / f"{filename}.json"
+
+    def get_bytes(self, filename: str) -> Optional[bytes]:
+        """Get the file contents of a cheatsheet"""
+        try:
+            return self.source_path(filename).read_bytes()
+        except OSError:
+            return None
+
+    def iter_sheets(self, cache: bool = True) -> Iterator[Tuple[str, Dict]]:
+        """Iterate over (filename, data) sorted by filename"""
+        for filename in sorted(self.entries):
+            entry = self.entries.get(filename)
+            if entry is None:
+                # Removed while iterating
+                continue
+            sheet = entry['sheet']
+            if sheet is not None:
+                yield filename, sheet
+
+    def matches(self, filename: str, query: str) -> bool:
+        """Check whether a lowercased query appears in a sheet"""
+        text = self._search_texts.get(filename)
+        if text is None:
+            parts = search_parts(self.entries[filename]['sheet'])
+            self._search_parts[filename] = parts
+            text = self._search_texts[filename] = '\0'.join(parts)
+        return query in text
+
+
+def main(argv=None) -> int:
+    """Time cold loads of a directory with serial, thread and process pools"""
+    import tempfile
+    parser = argparse.ArgumentParser(
+        description="Time cold loads of a cheatsheet directory")
+    parser.add_argument('data_path')
+    parser.add_argument('--workers', type=int, nargs='+', default=None,
+                        help="Thread counts to try (default: 1 2 4 8)")
+    parser.add_argument('--processes', type=int, nargs='+', default=None,
+                        help="Process counts to try (default: 2 up to the "
+                             "number of cores)")
+    args = parser.parse_args(argv)
+
+    cores = os.cpu_count() or 1
+    runs = [('threads', n, 0) for n in (args.workers or [1, 2, 4, 8])]
+    runs += [('processes', 1, n) for n in (
+        args.processes or [n for n in (2, 4, 8, 16) if n <= cores] or [2])]
+
+    print(f"{cores} cores; files are in the page cache after the first run")
+    reference = None
+    baseline = None
+    with tempfile.TemporaryDirectory() as cache_dir:
+        for kind, workers, processes in runs:
+            # No manifest: every file is read and parsed
+            index_file = os.path.join(cache_dir, f"{kind}-{workers}-"
+                                                 f"{processes}.json")
+            index = LibraryIndex(Path(args.data_path), index_file,
+                                 workers, processes)
+            start = time.perf_counter()
+            changes = index.refresh()
+            seconds = time.perf_counter() - start
+
+            # Every pool must give the same index, in the same order
+            result = (changes, {filename: entry['hash']
+                                for filename, entry in index.entries.items()})
+            if reference is None:
+                reference = result
+            elif result != reference:
+                print(f"{kind} {workers or processes}: different result!")
+                return 1
+
+            baseline = baseline or seconds
+            count = processes if processes else workers
+            print(f"{kind:9} {count:2}: {len(index.entries)} files in "
+                  f"{seconds:.2f}s ({baseline / seconds:.2f}x)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,171 @@
+"""
+Library Stack
+Several library roots seen as one library
+
+Roots are ordered from lowest to highest priority, e.g. the read-only
+system pack, a team shared directory and the user directory. A cheatsheet
+of an upper root shadows one with the same filename in lower roots, and a
+whiteout marker (foo.hidden) in a root hides foo from the roots below it.
+"""
+
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+
+class LibraryStack:
+    """
+    Merged view of LibraryIndex/PackedLibrary layers
+
+    Offers the same interface as a single LibraryIndex, so the manager
+    reads a stack exactly like one directory. Writes always go to the top
+    layer, which must be a LibraryIndex.
+    """
+
+    def __init__(self, layers: List):
+        self.layers = list(layers)
+        self.top = self.layers[-1]
+        # Filename -> position of the layer serving it
+        self._visible: Dict[str, int] = {}
+        self._whiteouts: List[frozenset] = []
+        self._synced = False
+
+    def _build_visible(self) -> Dict[str, int]:
+        visible = {}
+        for position, layer in enumerate(self.layers):
+            for filename in layer.whiteouts:
+                visible.pop(filename, None)
+            # A sheet beats a whiteout of its own layer
+            for filename in layer.filenames():
+                visible[filename] = position
+        return visible
+
+    def _resolve(self, filename: str) -> Optional[int]:
+        """Position of the layer serving a filename, None if hidden"""
+        for position in range(len(self.layers) - 1, -1, -1):
+            layer = self.layers[position]
+            if layer.has(filename):
+                return position
+            if filename in layer.whiteouts:
+                return None
+        return None
+
+    @staticmethod
+    def _change(old: Optional[int], new: Optional[int],
+                content_changed: bool) -> str:
+        if old is None:
+            return 'created' if new is not None else ''
+        if new is None:
+            return 'deleted'
+        return 'updated' if old != new or content_changed else ''
+
+    def refresh(self) -> List[Tuple[str, str]]:
+        """Refresh every layer, returns the changes of the merged view"""
+        changed = set()
+        for layer in self.layers:
+            changed.update(filename for _, filename in layer.refresh())
+
+        whiteouts = [frozenset(layer.whiteouts) for layer in self.layers]
+        if self._synced and not changed and whiteouts == self._whiteouts:
+            return []
+
+        old = self._visible
+        self._visible = self._build_visible()
+        self._whiteouts = whiteouts
+        self._synced = True
+
+        changes = []
+        for filename in sorted(set(old) | set(self._visible)):
+            action = self._change(old.get(filename),
+                                  self._visible.get(filename),
+                                  filename in changed)
+            if action:
+                changes.append((action, filename))
+        return changes
+
+    def _update_visible(self, filename: str, content_changed: bool) -> str:
+        old = self._visible.get(filename)
+        new = self._resolve(filename)
+        if new is None:
+            self._visible.pop(filename, None)
+        else:
+            self._visible[filename] = new
+        self._whiteouts = [frozenset(layer.whiteouts)
+                           for layer in self.layers]
+        return self._change(old, new, content_changed)
+
+    def refresh_file(self, filename: str) -> str:
+        """Bring one filename in sync across layers"""
+        if not self._synced:
+            self.refresh()
+
+        content_changed = False
+        for layer in self.layers:
+            if layer.refresh_file(filename):
+                content_changed = True
+        return self._update_visible(filename, content_changed)
+
+    def store(self, filename: str, sheet: Dict) -> str:
+        """Record a file just written to the top layer"""
+        if not self._synced:
+            self.refresh()
+
+        content_changed = bool(self.top.store(filename, sheet))
+        return self._update_visible(filename, content_changed)
+
+    def remove(self, filename: str) -> str:
+        """Record a file just deleted from the top layer"""
+        if not self._synced:
+            self.refresh()
+
+        content_changed = bool(self.top.remove(filename))
+        return self._update_visible(filename, content_changed)
+
+    def store_items(self, filename: str, sheet: Dict, start: int,
+                    removed: int, inserted: int) -> str:
+        """Record an item patch just written to the top layer"""
+        if not self._synced:
+            self.refresh()
+
+        content_changed = bool(self.top.store_items(
+            filename, sheet, start, removed, inserted))
+        return self._update_visible(filename, content_changed)
+
+    def save(self) -> bool:
+        return all([layer.save() for layer in self.layers])
+
+    def layer_of(self, filename: str):
+        """Layer serving a filename, None if it is not visible"""
+        position = self._visible.get(filename)
+        return self.layers[position] if position is not None else None
+
+    def get(self, filename: str, cache: bool = True) -> Optional[Dict]:
+        layer = self.layer_of(filename)
+        return layer.get(filename, cache) if layer is not None else None
+
+    def get_hash(self, filename: str) -> Optional[str]:
+        layer = self.layer_of(filename)
+        return layer.get_hash(filename) if layer is not None else None
+
+    def has(self, filename: str) -> bool:
+        return filename in self._visible
+
+    def filenames(self) -> List[str]:
+        return list(self._visible)
+
+    def source_path(self, filename: str) -> Optional[Path]:
+        layer = self.layer_of(filename)
+        return layer.source_path(filename) if layer is not None else None
+
+    def get_bytes(self, filename: str) -> Optional[bytes]:
+        layer = self.layer_of(filename)
+        return layer.get_bytes(filename) if layer is not None else None
+
+    def iter_sheets(self, cache: bool = True) -> Iterator[Tuple[str, Dict]]:
+        """Iterate over visible (filename, data) sorted by filename"""
+        for filename in sorted(self._visible):
+            sheet = self.get(filename, cache)
+            if sheet is not None:
+                yield filename, sheet
+
+    def matches(self, filename: str, query: str) -> bool:
+        return self.layers[self._visible[filename]].matches(filename, query)
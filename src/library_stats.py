@@ -0,0 +1,141 @@
+"""
+Library Statistics
+Counts of cheatsheets, items and tags kept up to date change by change
+"""
+
+import threading
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple
+
+
+class LibraryStatistics:
+    """
+    Per-language, per-tag and per-tag+language counts of a library
+
+    Built once from every sheet, then updated with the sheet of each
+    created, updated or deleted file, so reading a count never rescans the
+    library.
+    """
+
+    def __init__(self, default_language: str):
+        self.default_language = default_language
+        # Filename -> (language, tags, item count) it was counted with
+        self._sheets: Dict[str, Tuple[str, Tuple[str, ...], int]] = {}
+        self._languages: Dict[str, int] = {}
+        self._language_items: Dict[str, int] = {}
+        self._tags: Dict[str, int] = {}
+        self._tag_languages: Dict[Tuple[str, str], int] = {}
+        self._items = 0
+        # Sorted views, rebuilt on the first read after they change
+        self._sorted_tags: Optional[List[str]] = None
+        self._tag_usage: Optional[List[Tuple[str, int]]] = None
+        self._lock = threading.Lock()
+        self.loaded = False
+
+    def _summary(self, sheet: Mapping) -> Tuple[str, Tuple[str, ...], int]:
+        language = sheet.get('language', self.default_language)
+        tags = sheet.get('tags', [])
+        items = sheet.get('items', [])
+        # Files on disk may hold anything, only well-formed values count
+        return (language if isinstance(language, str) else
+                self.default_language,
+                tuple(dict.fromkeys(tag for tag in tags
+                                    if isinstance(tag, str)))
+                if isinstance(tags, (list, tuple)) else (),
+                len(items) if isinstance(items, (list, tuple)) else 0)
+
+    @staticmethod
+    def _add(counts: Dict, key, amount: int) -> bool:
+        """Add to a count, returns True if the key appeared or went away"""
+        count = counts.get(key, 0) + amount
+        if count:
+            counts[key] = count
+        else:
+            counts.pop(key, None)
+        return count == amount or count == 0
+
+    def _count(self, summary: Tuple[str, Tuple[str, ...], int],
+               sign: int) -> None:
+        language, tags, items = summary
+        self._add(self._languages, language, sign)
+        self._add(self._language_items, language, sign * items)
+        self._items += sign * items
+        tags_changed = False
+        for tag in tags:
+            tags_changed |= self._add(self._tags, tag, sign)
+            self._add(self._tag_languages, (tag, language), sign)
+        if tags_changed:
+            self._sorted_tags = None
+        if tags:
+            self._tag_usage = None
+
+    def rebuild(self, sheets: Iterable[Tuple[str, Mapping]]) -> None:
+        """Count every (filename, sheet) from scratch"""
+        with self._lock:
+            self._sheets.clear()
+            self._languages.clear()
+            self._language_items.clear()
+            self._tags.clear()
+            self._tag_languages.clear()
+            self._items = 0
+            self._sorted_tags = self._tag_usage = None
+            for filename, sheet in sheets:
+                summary = self._sheets[filename] = self._summary(sheet)
+                self._count(summary, 1)
+            self.loaded = True
+
+    def update(self, filename: str, sheet: Optional[Mapping]) -> None:
+        """Count a file again with its new sheet, None if it went away"""
+        with self._lock:
+            old = self._sheets.pop(filename, None)
+            if old is not None:
+                self._count(old, -1)
+            if sheet is not None:
+                summary = self._sheets[filename] = self._summary(sheet)
+                self._count(summary, 1)
+
+    # Reads, O(1) except for the sorted lists
+
+    @property
+    def sheet_count(self) -> int:
+        return len(self._sheets)
+
+    @property
+    def item_count(self) -> int:
+        return self._items
+
+    @property
+    def tag_count(self) -> int:
+        return len(self._tags)
+
+    def language_count(self, language: str) -> int:
+        return self._languages.get(language, 0)
+
+    def language_items(self, language: str) -> int:
+        return self._language_items.get(language, 0)
+
+    def tag_usage(self, tag: str) -> int:
+        return self._tags.get(tag, 0)
+
+    def tag_language_usage(self, tag: str, language: str) -> int:
+        return self._tag_languages.get((tag, language), 0)
+
+    def languages(self) -> Dict[str, int]:
+        """Sheet count of every language in use"""
+        with self._lock:
+            return dict(self._languages)
+
+    def sorted_tags(self) -> List[str]:
+        """Tags in use, sorted by name"""
+        with self._lock:
+            if self._sorted_tags is None:
+                self._sorted_tags = sorted(self._tags)
+            return list(self._sorted_tags)
+
+    def tags_by_usage(self) -> List[Tuple[str, int]]:
+        """(tag, usage) by descending usage, then by name"""
+        with self._lock:
+            if self._tag_usage is None:
+                self._tag_usage = sorted(self._tags.items(),
+                                         key=lambda entry: (-entry[1],
+                                                            entry[0]))
+            return list(self._tag_usage)
@@ -9,11 +9,14 @@ from tkinter import ttk
 import json
 import math
 from pathlib import Path
-from cheatsheet_manager import CheatSheetManager
+from cheatsheet_manager import (
+    CheatSheetManager, default_library_roots, system_library_root
+)
 from ui_components import (
     DialMenu, CheatSheetEditor, CheatSheetViewer, TagManager, get_tag_color
 )
 from search_components import show_search_dialog
+from query_daemon import connect_manager
 from i18n import get_i18n, _
 
 
@@ -29,8 +32,10 @@ class FloatingWidget:
         self.current_tag = "all"
         self.current_language = "es"  # Default language
 
-        # Initialize translation system
+        # Initialize translation system; UI refreshes run once per idle loop
         self.i18n = get_i18n()
+        self.i18n.set_scheduler(self.root.after_idle)
+        self._save_pending = False
 
         # Initialize manager and dial menu (after load_config)
         self.cheatsheet_manager = None
@@ -38,8 +43,13 @@ class FloatingWidget:
 
         self.bind_events()
 
-        # Initialize manager after loading config
-        self.cheatsheet_manager = CheatSheetManager(self.config['data_path'])
+        # Initialize manager after loading config; queries go through the
+        # query daemon when one is serving the same library
+        self.cheatsheet_manager = connect_manager(CheatSheetManager(
+            self.config['data_path'],
+            roots=default_library_roots(self.config),
+            workers=self.config.get('load_workers'),
+            processes=self.config.get('load_processes', 0)))
 
         # Load language from configuration and setup i18n
         self.current_language = self.config.get('current_language', 'es')
@@ -106,8 +116,10 @@ class FloatingWidget:
         cheatsheets_path = Path(self.config['data_path'])
         cheatsheets_path.mkdir(parents=True, exist_ok=True)
 
-        # Copy example cheatsheets if directory is empty
-        if not any(cheatsheets_path.glob('*.json')):
+        # The bundled library is read in place, below the user directory;
+        # only without one are example cheatsheets copied
+        if (system_library_root() is None and
+                not any(cheatsheets_path.glob('*.json'))):
             self.copy_example_cheatsheets(cheatsheets_path)
 
     def save_config(self):
@@ -284,6 +296,9 @@ class FloatingWidget:
 
     def show_context_menu(self, event):
         """Show context menu (right click)"""
+        # Pick up edits made to languages.json while the app was running
+        self.i18n.config_service.check_for_changes()
+
         context_menu = tk.Menu(self.root, tearoff=0)
 
         # Search option
@@ -323,18 +338,32 @@ class FloatingWidget:
         """Change the current language of the application"""
         if self.current_language != language_code:
             self.current_language = language_code
+            # The menu is rebuilt by update_ui_texts on the next idle loop
             self.i18n.set_language(language_code)
+            self.schedule_save_config()
+
+    def schedule_save_config(self):
+        """Save configuration once on the next idle loop"""
+        if self._save_pending:
+            return
+        self._save_pending = True
+
+        def save():
+            self._save_pending = False
             self.save_config()
 
-            # Actualizar menú si está abierto
-            if self.menu_open:
-                self.hide_dial_menu()
-                self.show_dial_menu()
+        self.root.after_idle(save)
 
     def update_ui_texts(self):
         """Update all UI texts when language changes"""
-        # Update window title
-        self.root.title(_("window_title"))
+        # Update window title only if its text changed
+        if self.i18n.text_changed("window_title"):
+            self.root.title(_("window_title"))
+
+        # Rebuild the dial menu once with the new language
+        if self.menu_open:
+            self.hide_dial_menu()
+            self.show_dial_menu()
 
         # If there are tag or configuration windows open,
         # they will be updated automatically on next opening
@@ -553,7 +582,8 @@ class FloatingWidget:
 
         cheatsheet_data = self.cheatsheet_manager.get_cheatsheet_by_filename(filename)
         if cheatsheet_data:
-            CheatSheetViewer(self.root, cheatsheet_data)
+            CheatSheetViewer(self.root, cheatsheet_data,
+                             self.cheatsheet_manager)
 
     def create_new_cheatsheet(self):
         """Create new cheatsheet"""
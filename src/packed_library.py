@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+"""
+Packed Library
+Immutable single-file cheatsheet library, opened with mmap
+
+Layout (all integers big-endian):
+    header   magic, version, sheet count, offsets of the record table and
+             of the string pool
+    records  one fixed-size record per sheet, sorted by filename, with
+             the pool offset of its filename and the file offsets of the
+             sheet body and its search text
+    pool     UTF-8 filenames
+    bodies   compact JSON of each sheet, decoded only when requested
+    search   lowercased search text of each sheet, matched in place
+
+Opening a pack reads only the header, so the bundled library is usable
+without parsing any sheet. Sheets are decoded the first time they are read.
+"""
+
+import argparse
+import json
+import mmap
+import os
+import struct
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from library_index import build_search_text, sheet_content_hash
+from sheet_model import Sheet
+
+
+PACK_MAGIC = b'FCPK'
+PACK_VERSION = 1
+PACK_SUFFIX = '.pack'
+
+HEADER = struct.Struct('>4sHHIQQQ')
+# name: (pool offset, length); body, search text: (file offset, length) each
+RECORD = struct.Struct('>IIQIQI')
+
+
+class PackError(Exception):
+    """Raised when a file is not a readable packed library"""
+
+
+class _StringPool:
+    """UTF-8 string pool used while building a pack"""
+
+    def __init__(self):
+        self.data = bytearray()
+
+    def add(self, text: str) -> Tuple[int, int]:
+        encoded = text.encode('utf-8')
+        offset = len(self.data)
+        self.data += encoded
+        return offset, len(encoded)
+
+
+def build_packed_library(source_dir: str, target_file: str) -> Dict:
+    """
+    Pack every valid cheatsheet of a directory into one file
+
+    Returns:
+        Summary with the number of sheets packed, skipped files and size
+    """
+    sheets = []
+    skipped = []
+    for path in sorted(Path(source_dir).glob('*.json')):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (json.JSONDecodeError, UnicodeDecodeError) as e:
+            print(f"Error loading {path}: {e}")
+            skipped.append(path.stem)
+            continue
+        if not isinstance(data, dict):
+            skipped.append(path.stem)
+            continue
+        sheets.append((path.stem, data))
+
+    # Records are looked up by binary search on the encoded filename
+    sheets.sort(key=lambda entry: entry[0].encode('utf-8'))
+
+    pool = _StringPool()
+    bodies = bytearray()
+    search_texts = bytearray()
+    fields = []
+    for filename, data in sheets:
+        body = json.dumps(data, ensure_ascii=False,
+                          separators=(',', ':')).encode('utf-8')
+        search_text = build_search_text(data).encode('utf-8')
+        fields.append((
+            pool.add(filename),
+            (len(bodies), len(body)),
+            (len(search_texts), len(search_text))
+        ))
+        bodies += body
+        search_texts += search_text
+
+    table_offset = HEADER.size
+    pool_offset = table_offset + RECORD.size * len(sheets)
+    bodies_offset = pool_offset + len(pool.data)
+    search_offset = bodies_offset + len(bodies)
+
+    tmp_path = f"{target_file}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(HEADER.pack(PACK_MAGIC, PACK_VERSION, 0, len(sheets),
+                            table_offset, pool_offset, len(pool.data)))
+        for name, body, search in fields:
+            f.write(RECORD.pack(
+                *name, bodies_offset + body[0], body[1],
+                search_offset + search[0], search[1]))
+        f.write(pool.data)
+        f.write(bodies)
+        f.write(search_texts)
+    os.replace(tmp_path, target_file)
+
+    return {
+        'sheets': len(sheets),
+        'skipped': skipped,
+        'size': os.path.getsize(target_file)
+    }
+
+
+class PackedLibrary:
+    """
+    Read-only view of a packed library
+
+    Offers the read side of LibraryIndex (refresh, get, iter_sheets,
+    matches) so a CheatSheetManager can serve a pack directly.
+    """
+
+    def __init__(self, pack_file: str):
+        self.pack_file = Path(pack_file)
+        try:
+            with open(self.pack_file, 'rb') as f:
+                self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError) as e:
+            raise PackError(f"Cannot open packed library {pack_file}: {e}")
+
+        if len(self._mm) < HEADER.size:
+            raise PackError(f"Not a packed library: {pack_file}")
+        (magic, version, _, self.count, self._table_offset,
+         self._pool_offset, _) = HEADER.unpack_from(self._mm, 0)
+        if magic != PACK_MAGIC:
+            raise PackError(f"Not a packed library: {pack_file}")
+        if version > PACK_VERSION:
+            raise PackError(f"Unsupported pack version {version}")
+
+        # A pack never hides sheets of other roots
+        self.whiteouts = frozenset()
+        # Decoded sheets; the pack is immutable so they never go stale
+        self._decoded: Dict[str, Dict] = {}
+        self._filenames: Optional[List[str]] = None
+        self._hashes: Dict[str, str] = {}
+
+    def _record(self, position: int) -> Tuple[int, ...]:
+        return RECORD.unpack_from(
+            self._mm, self._table_offset + position * RECORD.size)
+
+    def _pool_bytes(self, offset: int, length: int) -> bytes:
+        start = self._pool_offset + offset
+        return self._mm[start:start + length]
+
+    def _pool_string(self, offset: int, length: int) -> str:
+        return self._pool_bytes(offset, length).decode('utf-8')
+
+    def _find(self, filename: str) -> Optional[Tuple[int, ...]]:
+        """Binary search the record of a filename"""
+        key = filename.encode('utf-8')
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            record = self._record(middle)
+            name = self._pool_bytes(record[0], record[1])
+            if name < key:
+                low = middle + 1
+            elif name > key:
+                high = middle
+            else:
+                return record
+        return None
+
+    def _decode(self, record: Tuple[int, ...]) -> Sheet:
+        start, length = record[2], record[3]
+        return Sheet.from_dict(
+            json.loads(self._mm[start:start + length].decode('utf-8')))
+
+    # Read side of LibraryIndex; a pack never changes once built
+
+    def refresh(self) -> List[Tuple[str, str]]:
+        return []
+
+    def refresh_file(self, filename: str) -> str:
+        return ''
+
+    def save(self) -> bool:
+        return True
+
+    def get(self, filename: str, cache: bool = True) -> Optional[Dict]:
+        """Decode one sheet, None if it is not in the pack"""
+        data = self._decoded.get(filename)
+        if data is None:
+            record = self._find(filename)
+            if record is None:
+                return None
+            data = self._decode(record)
+            if cache:
+                self._decoded[filename] = data
+        return data
+
+    def get_hash(self, filename: str) -> Optional[str]:
+        """Get the content hash of a sheet"""
+        content_hash = self._hashes.get(filename)
+        if content_hash is None:
+            data = self.get(filename)
+            if data is None:
+                return None
+            content_hash = self._hashes[filename] = sheet_content_hash(data)
+        return content_hash
+
+    def has(self, filename: str) -> bool:
+        return self._find(filename) is not None
+
+    def source_path(self, filename: str) -> Optional[Path]:
+        """Sheets of a pack have no file of their own"""
+        return None
+
+    def get_bytes(self, filename: str) -> Optional[bytes]:
+        """Get the JSON body of one sheet without decoding it"""
+        record = self._find(filename)
+        if record is None:
+            return None
+        return self._mm[record[2]:record[2] + record[3]]
+
+    def filenames(self) -> List[str]:
+        """All filenames, in pack order (sorted)"""
+        if self._filenames is None:
+            self._filenames = [self._pool_string(*self._record(i)[0:2])
+                               for i in range(self.count)]
+        return self._filenames
+
+    def iter_sheets(self, cache: bool = True) -> Iterator[Tuple[str, Dict]]:
+        """
+        Iterate over (filename, data) sorted by filename
+
+        Without cache, sheets not decoded yet are decoded and dropped, so a
+        single pass over the pack runs in constant memory.
+        """
+        for i in range(self.count):
+            record = self._record(i)
+            filename = self._pool_string(record[0], record[1])
+            data = self._decoded.get(filename)
+            if data is None:
+                data = self._decode(record)
+                if cache:
+                    self._decoded[filename] = data
+            yield filename, data
+
+    def matches(self, filename: str, query: str) -> bool:
+        """Check whether a lowercased query appears in a sheet"""
+        record = self._find(filename)
+        if record is None:
+            return False
+        start = record[4]
+        return self._mm.find(query.encode('utf-8'), start,
+                             start + record[5]) != -1
+
+    def close(self) -> None:
+        self._mm.close()
+
+
+def main(argv=None) -> int:
+    """Build a pack, or compare it with loading the directory"""
+    parser = argparse.ArgumentParser(
+        description="Build and inspect packed cheatsheet libraries")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    build = subparsers.add_parser('build', help="Pack a cheatsheet directory")
+    build.add_argument('source_dir')
+    build.add_argument('target_file')
+
+    bench = subparsers.add_parser(
+        'bench', help="Time a cold directory load against the pack")
+    bench.add_argument('source_dir')
+    bench.add_argument('pack_file')
+    bench.add_argument('--query', default='git')
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'build':
+        summary = build_packed_library(args.source_dir, args.target_file)
+        for filename in summary['skipped']:
+            print(f"Skipped {filename}")
+        print(f"Packed {summary['sheets']} cheatsheets into "
+              f"{args.target_file} ({summary['size'] / 1024:.0f} KiB)")
+        return 0
+
+    query = args.query.lower()
+
+    start = time.perf_counter()
+    found = 0
+    for path in sorted(Path(args.source_dir).glob('*.json')):
+        with open(path, 'r', encoding='utf-8') as f:
+            if query in build_search_text(json.load(f)):
+                found += 1
+    directory_ms = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    pack = PackedLibrary(args.pack_file)
+    open_ms = (time.perf_counter() - start) * 1000
+    packed_found = sum(1 for filename in pack.filenames()
+                       if pack.matches(filename, query))
+    pack_ms = (time.perf_counter() - start) * 1000
+    pack.close()
+
+    print(f"Directory: parse + search '{query}' {directory_ms:.2f}ms "
+          f"({found} matches)")
+    print(f"Pack: open {open_ms:.3f}ms, open + search {pack_ms:.2f}ms "
+          f"({packed_found} matches)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
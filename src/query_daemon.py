@@ -0,0 +1,403 @@
+#!/usr/bin/env python3
+"""
+Query Daemon
+Background process sharing one warm CheatSheetManager over a Unix socket
+
+Protocol: every message is a 4-byte big-endian length followed by that many
+bytes of UTF-8 JSON. Requests are {"method": ..., "params": {...}} and
+responses are {"result": ...} or {"error": "..."}. A connection may send any
+number of requests.
+"""
+
+import argparse
+import json
+import os
+import socket
+import socketserver
+import struct
+import sys
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from cheatsheet_manager import CheatSheetManager
+from library_index import default_cache_dir
+
+
+HEADER = struct.Struct('>I')
+MAX_MESSAGE_SIZE = 64 * 1024 * 1024
+
+
+def default_socket_path() -> str:
+    """Get the per-user socket path of the daemon"""
+    runtime_dir = os.environ.get('XDG_RUNTIME_DIR')
+    base = Path(runtime_dir) if runtime_dir else default_cache_dir()
+    return str(base / 'floating-cheatsheets.sock')
+
+
+def send_message(sock: socket.socket, data: Any) -> None:
+    """Send one length-prefixed JSON message"""
+    payload = json.dumps(data, ensure_ascii=False,
+                         separators=(',', ':')).encode('utf-8')
+    sock.sendall(HEADER.pack(len(payload)) + payload)
+
+
+def _recv_exactly(sock: socket.socket, size: int) -> Optional[bytes]:
+    """Read exactly size bytes, None if the peer closed the connection"""
+    chunks = []
+    while size:
+        chunk = sock.recv(min(size, 1024 * 1024))
+        if not chunk:
+            return None
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b''.join(chunks)
+
+
+def recv_message(sock: socket.socket) -> Optional[Any]:
+    """Receive one length-prefixed JSON message, None on EOF"""
+    header = _recv_exactly(sock, HEADER.size)
+    if header is None:
+        return None
+
+    (size,) = HEADER.unpack(header)
+    if size > MAX_MESSAGE_SIZE:
+        raise ValueError(f"Message too large: {size} bytes")
+
+    payload = _recv_exactly(sock, size)
+    if payload is None:
+        return None
+    return json.loads(payload.decode('utf-8'))
+
+
+def library_identity(manager: CheatSheetManager) -> Dict:
+    """Data path and roots of a manager, to tell libraries apart"""
+    return {
+        'data_path': str(manager.data_path.resolve()),
+        'roots': [str(root.resolve()) for root in manager.roots]
+    }
+
+
+class QueryService:
+    """Read-only queries served by the daemon"""
+
+    def __init__(self, manager: CheatSheetManager):
+        self.manager = manager
+        # The manager and its index are not thread-safe
+        self._lock = threading.Lock()
+        # Counts the groups of changes the manager found, sent with every
+        # answer so clients can tell their own index is stale
+        self.generation = 0
+        manager.register_batch_callback(self._changed)
+        self.methods = {
+            'ping': self.ping,
+            'search': self.search,
+            'get': self.get,
+            'list': self.list,
+            'tags': self.tags,
+        }
+
+    def _changed(self, changes) -> None:
+        self.generation += 1
+
+    def ping(self) -> Dict:
+        """Identify the library served by this daemon"""
+        return library_identity(self.manager)
+
+    def search(self, query: str, language: Optional[str] = None,
+               collapse: bool = False):
+        """Search cheatsheets, optionally in one language"""
+        if language:
+            return self.manager.search_cheatsheets_by_language(
+                query, language, collapse)
+        return self.manager.search_cheatsheets(query, collapse)
+
+    def get(self, filename: str):
+        """Get one cheatsheet by filename, None for a name outside the library"""
+        return self.manager.get_cheatsheet_by_filename(filename)
+
+    def list(self, tag: str = "all", language: Optional[str] = None):
+        """List cheatsheets filtered by tag and language"""
+        if language:
+            return self.manager.get_cheatsheets_by_tag_and_language(
+                tag, language)
+        return self.manager.get_cheatsheets_by_tag(tag)
+
+    def tags(self):
+        """List all tags"""
+        return self.manager.get_all_tags()
+
+    def handle(self, request: Dict) -> Dict:
+        """Run one request and build its response"""
+        method = self.methods.get(request.get('method'))
+        if method is None:
+            return {'error': f"Unknown method: {request.get('method')}"}
+
+        try:
+            with self._lock:
+                return {'result': method(**request.get('params', {})),
+                        'generation': self.generation}
+        except Exception as e:
+            return {'error': str(e)}
+
+
+class _RequestHandler(socketserver.BaseRequestHandler):
+    """Serve requests of one client connection until it closes"""
+
+    def handle(self):
+        while True:
+            try:
+                request = recv_message(self.request)
+            except (OSError, ValueError) as e:
+                print(f"Error reading request: {e}")
+                return
+            if request is None:
+                return
+            try:
+                send_message(self.request, self.server.service.handle(request))
+            except OSError:
+                return
+
+
+class QueryDaemon(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Threaded Unix socket server around a QueryService"""
+
+    daemon_threads = True
+
+    def __init__(self, socket_path: str, manager: CheatSheetManager):
+        self.socket_path = socket_path
+        self.service = QueryService(manager)
+
+        Path(socket_path).parent.mkdir(parents=True, exist_ok=True)
+        if os.path.exists(socket_path):
+            # Only replace a stale socket, never a running daemon
+            if QueryClient(socket_path).ping() is not None:
+                raise RuntimeError(f"Daemon already running on {socket_path}")
+            os.unlink(socket_path)
+
+        super().__init__(socket_path, _RequestHandler)
+        os.chmod(socket_path, 0o600)
+
+    def server_close(self):
+        super().server_close()
+        try:
+            os.unlink(self.socket_path)
+        except OSError:
+            pass
+
+
+class QueryError(RuntimeError):
+    """Raised when the daemon answers a request with an error"""
+
+
+class QueryTimeout(QueryError):
+    """Raised when the daemon doesn't answer a request in time"""
+
+
+class QueryClient:
+    """Client side of the daemon protocol, keeps one connection open"""
+
+    def __init__(self, socket_path: Optional[str] = None,
+                 timeout: float = 2.0):
+        self.socket_path = socket_path or default_socket_path()
+        self.timeout = timeout
+        self._sock = None
+        # Generation of the daemon's library in the last answer
+        self.generation: Optional[int] = None
+
+    def _connect(self) -> socket.socket:
+        if self._sock is None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            try:
+                sock.connect(self.socket_path)
+            except OSError:
+                sock.close()
+                raise
+            self._sock = sock
+        return self._sock
+
+    def call(self, method: str, **params) -> Any:
+        """
+        Run a request
+
+        Raises ConnectionError if the daemon is unreachable, QueryTimeout
+        if it is too slow to answer and QueryError if it could not run the
+        request.
+        """
+        try:
+            sock = self._connect()
+            send_message(sock, {'method': method, 'params': params})
+            response = recv_message(sock)
+        except socket.timeout:
+            # A late answer would be read as the next one: start over
+            self.close()
+            raise QueryTimeout(f"No answer to {method} in {self.timeout}s")
+        except (OSError, ValueError):
+            self.close()
+            raise ConnectionError(f"Daemon unavailable on {self.socket_path}")
+
+        if response is None:
+            self.close()
+            raise ConnectionError("Daemon closed the connection")
+        if 'error' in response:
+            raise QueryError(response['error'])
+        self.generation = response.get('generation')
+        return response['result']
+
+    def ping(self) -> Optional[Dict]:
+        """Get daemon info, None if no daemon is listening"""
+        if not hasattr(socket, 'AF_UNIX'):
+            return None
+        try:
+            return self.call('ping')
+        except (OSError, QueryError):
+            return None
+
+    def close(self) -> None:
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+
+
+class RemoteCheatSheetManager:
+    """
+    CheatSheetManager stand-in that sends read queries to the daemon
+
+    Writes and everything else go to the local manager. When an answer
+    shows the daemon found changes, the local index is refreshed too, so
+    its change callbacks fire and its statistics follow.
+
+    If the daemon goes away, queries fall back to the local manager for
+    good. A query the daemon is too slow for is answered locally, one it
+    answers with an error raises QueryError; both keep the daemon.
+    """
+
+    def __init__(self, local_manager: CheatSheetManager, client: QueryClient):
+        self._local = local_manager
+        self._client = client
+        self._generation = client.generation
+
+    @classmethod
+    def connect(cls, local_manager: CheatSheetManager,
+                socket_path: Optional[str] = None):
+        """Use the daemon if it serves the same library, else the local one"""
+        client = QueryClient(socket_path)
+        info = client.ping()
+        if info is None or info != library_identity(local_manager):
+            client.close()
+            return local_manager
+        return cls(local_manager, client)
+
+    def _query(self, method: str, local_call, **params):
+        if self._client is not None:
+            try:
+                result = self._client.call(method, **params)
+            except QueryTimeout as e:
+                print(f"Query daemon too slow, using local library: {e}")
+                return local_call()
+            except OSError as e:
+                print(f"Query daemon unavailable, using local library: {e}")
+                self._client.close()
+                self._client = None
+            else:
+                self._follow_changes()
+                return result
+        return local_call()
+
+    def _follow_changes(self) -> None:
+        """Refresh the local index if the daemon found changes since"""
+        generation = self._client.generation
+        if generation != self._generation:
+            self._generation = generation
+            self._local.refresh()
+
+    def search_cheatsheets(self, query, collapse_duplicates=False):
+        return self._query('search', lambda: self._local.search_cheatsheets(
+            query, collapse_duplicates), query=query,
+            collapse=collapse_duplicates)
+
+    def search_cheatsheets_by_language(self, query, language,
+                                       collapse_duplicates=False):
+        return self._query(
+            'search',
+            lambda: self._local.search_cheatsheets_by_language(
+                query, language, collapse_duplicates),
+            query=query, language=language, collapse=collapse_duplicates)
+
+    def get_cheatsheet_by_filename(self, filename):
+        return self._query(
+            'get', lambda: self._local.get_cheatsheet_by_filename(filename),
+            filename=filename)
+
+    def get_all_cheatsheets(self):
+        return self._query('list', self._local.get_all_cheatsheets)
+
+    def get_cheatsheets_by_tag(self, tag):
+        return self._query(
+            'list', lambda: self._local.get_cheatsheets_by_tag(tag), tag=tag)
+
+    def get_cheatsheets_by_tag_and_language(self, tag, language):
+        if not self._local.validate_language(language):
+            return []
+        return self._query(
+            'list',
+            lambda: self._local.get_cheatsheets_by_tag_and_language(
+                tag, language),
+            tag=tag, language=language)
+
+    def get_cheatsheets_by_language(self, language):
+        return self.get_cheatsheets_by_tag_and_language("all", language)
+
+    def get_all_tags(self):
+        return self._query('tags', self._local.get_all_tags)
+
+    def __getattr__(self, name):
+        return getattr(self._local, name)
+
+
+def connect_manager(local_manager: CheatSheetManager):
+    """Get a manager backed by the daemon when one is running"""
+    if not hasattr(socket, 'AF_UNIX'):
+        return local_manager
+    return RemoteCheatSheetManager.connect(local_manager)
+
+
+def main(argv=None) -> int:
+    """Run the daemon in the foreground"""
+    parser = argparse.ArgumentParser(
+        description="Serve cheatsheet queries over a Unix socket")
+    parser.add_argument('--data-path', default=None,
+                        help="Cheatsheet directory (default: the widget's)")
+    parser.add_argument('--socket', default=None,
+                        help="Socket path (default: "
+                             "$XDG_RUNTIME_DIR/floating-cheatsheets.sock)")
+    args = parser.parse_args(argv)
+
+    if not hasattr(socket, 'AF_UNIX'):
+        print("Unix sockets are not available on this platform")
+        return 1
+
+    from cli import create_manager
+    manager = create_manager(args.data_path)
+    manager.get_all_tags()  # Warm up the index before accepting clients
+
+    socket_path = args.socket or default_socket_path()
+    try:
+        server = QueryDaemon(socket_path, manager)
+    except RuntimeError as e:
+        print(e)
+        return 1
+
+    print(f"Serving {manager.data_path} on {socket_path}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -396,7 +396,8 @@ class SearchDialog:
         selected_sheet = self.get_selected_cheatsheet()
         if selected_sheet:
             from ui_components import CheatSheetViewer
-            viewer = CheatSheetViewer(self.window, selected_sheet)
+            viewer = CheatSheetViewer(self.window, selected_sheet,
+                                      self.cheatsheet_manager)
     
     def close(self):
         """Close dialog"""
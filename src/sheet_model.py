@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""
+Sheet Model
+Compact read-only cheatsheets for the data held in memory by the library
+
+A parsed cheatsheet is a dict per sheet plus a dict per item, each with its
+own hash table, and every sheet has its own copy of its tag and language
+strings. Sheet and Item keep the known fields in __slots__ and intern tags
+and languages, while still reading like the dicts they replace (get, [],
+in, keys, items, dict(...)). Fields that were not in the JSON stay absent,
+and unknown keys and the key order are kept, so converting back gives the
+same JSON.
+"""
+
+import argparse
+import json
+import sys
+import time
+from collections.abc import ItemsView, KeysView, Mapping, ValuesView
+from operator import attrgetter
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+
+# Marks a known field that the JSON did not have
+_MISSING = object()
+
+# Key orders seen so far; a handful of tuples shared by every record
+_ORDERS: Dict[Tuple[str, ...], Tuple[str, ...]] = {}
+
+
+def _shared_order(data: Mapping) -> Tuple[str, ...]:
+    """Keys of data in order, as a tuple shared with equal orders"""
+    order = tuple(data)
+    return _ORDERS.setdefault(order, order)
+
+
+class _Record:
+    """
+    Read-only mapping over __slots__ fields plus rarely used extra keys
+
+    Registered as a Mapping rather than inheriting it: isinstance() checks
+    against an ABC run Python code, and they happen once per item.
+    """
+
+    __slots__ = ()
+    _fields: Tuple[str, ...] = ()
+    # Key -> slot; slots are prefixed so 'items' does not hide items()
+    _slot_of: Dict[str, str] = {}
+    # Key order -> attrgetter of its slots, filled by to_dict()
+    _getters: Dict[Tuple[str, ...], Any] = {}
+
+    def __getitem__(self, key: str) -> Any:
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def get(self, key: str, default: Any = None) -> Any:
+        slot = self._slot_of.get(key)
+        if slot is not None:
+            value = getattr(self, slot)
+            return default if value is _MISSING else value
+        if self._extra is not None:
+            return self._extra.get(key, default)
+        return default
+
+    def __contains__(self, key: object) -> bool:
+        return self.get(key, _MISSING) is not _MISSING
+
+    def __iter__(self) -> Iterator[str]:
+        # Original key order, so converting back gives the same JSON text
+        return iter(self._order)
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+    def keys(self) -> KeysView:
+        return KeysView(self)
+
+    def items(self) -> ItemsView:
+        return ItemsView(self)
+
+    def values(self) -> ValuesView:
+        return ValuesView(self)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, (dict, _Record)):
+            return NotImplemented
+        return self.to_dict() == dict(other)
+
+    __hash__ = None
+
+    def to_dict(self) -> Dict:
+        """Shallow dict copy with the original keys"""
+        if self._extra is not None or not self._order:
+            return {key: self.get(key) for key in self._order}
+        # Common case: every key has a slot, read them all in one call
+        getter = self._getters.get(self._order)
+        if getter is None:
+            getter = attrgetter(*[self._slot_of[key] for key in self._order])
+            self._getters[self._order] = getter
+        values = getter(self)
+        if len(self._order) == 1:
+            values = (values,)
+        return dict(zip(self._order, values))
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+    @classmethod
+    def _extra_of(cls, data: Mapping) -> Optional[Dict]:
+        """Keys of data that have no slot, None when there are none"""
+        if data.keys() <= cls._slot_of.keys():
+            return None
+        return {key: value for key, value in data.items()
+                if key not in cls._slot_of}
+
+
+class Item(_Record):
+    """One item of a cheatsheet: id, code, description, example"""
+
+    _fields = ('id', 'code', 'description', 'example')
+    _slot_of = {field: f"_{field}" for field in _fields}
+    __slots__ = tuple(_slot_of.values()) + ('_extra', '_order')
+    _getters = {}
+
+    @classmethod
+    def from_dict(cls, data: Mapping) -> 'Item':
+        if isinstance(data, Item):
+            return data
+        get = data.get
+        item = cls.__new__(cls)
+        item._id = get('id', _MISSING)
+        item._code = get('code', _MISSING)
+        item._description = get('description', _MISSING)
+        item._example = get('example', _MISSING)
+        item._extra = cls._extra_of(data)
+        item._order = _shared_order(data)
+        return item
+
+
+Mapping.register(_Record)
+
+
+def _intern(value: Any) -> Any:
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+class Sheet(_Record):
+    """A cheatsheet with tuples of interned tags and of Items"""
+
+    _fields = ('title', 'language', 'tags', 'items', 'created', 'updated')
+    _slot_of = {field: f"_{field}" for field in _fields}
+    __slots__ = tuple(_slot_of.values()) + ('_extra', '_order')
+    _getters = {}
+
+    @classmethod
+    def from_dict(cls, data: Mapping) -> 'Sheet':
+        if isinstance(data, Sheet):
+            return data
+        get = data.get
+        sheet = cls.__new__(cls)
+        sheet._title = get('title', _MISSING)
+        sheet._language = _intern(get('language', _MISSING))
+        tags = get('tags', _MISSING)
+        if isinstance(tags, (list, tuple)):
+            tags = tuple([_intern(tag) for tag in tags])
+        sheet._tags = tags
+        items = get('items', _MISSING)
+        if isinstance(items, (list, tuple)):
+            from_dict = Item.from_dict
+            items = tuple([from_dict(item) if isinstance(item, (dict, Item))
+                           else item for item in items])
+        sheet._items = items
+        sheet._created = get('created', _MISSING)
+        sheet._updated = get('updated', _MISSING)
+        sheet._extra = cls._extra_of(data)
+        sheet._order = _shared_order(data)
+        return sheet
+
+
+def json_default(value: Any) -> Any:
+    """json.dump(s) default= hook encoding Sheets and Items as objects"""
+    if isinstance(value, _Record):
+        return value.to_dict()
+    raise TypeError(
+        f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def sheet_to_dict(sheet: Mapping) -> Dict:
+    """Plain dict of a sheet and its items, ready for json.dump(s)"""
+    data = dict(sheet)
+    items = data.get('items')
+    if isinstance(items, (list, tuple)):
+        data['items'] = [item.to_dict() if isinstance(item, _Record) else item
+                         for item in items]
+    if isinstance(data.get('tags'), tuple):
+        data['tags'] = list(data['tags'])
+    return data
+
+
+def _synthetic_library(item_count: int, items_per_sheet: int) -> list:
+    """JSON texts of sheets shaped like the bundled ones"""
+    languages = ['es', 'en', 'fr', 'pt']
+    tags = ['git', 'docker', 'linux', 'python', 'sql', 'network']
+    texts = []
+    for number in range(item_count // items_per_sheet):
+        texts.append(json.dumps({
+            'title': f"Sheet {number}",
+            'language': languages[number % len(languages)],
+            'tags': [tags[number % len(tags)], tags[(number + 1) % len(tags)]],
+            'items': [{
+                'code': f"command-{number}-{i} --flag",
+                'description': f"Description of item {i} of sheet {number}",
+                'example': f"command-{number}-{i} --flag value"
+            } for i in range(items_per_sheet)],
+            'created': '2024-01-01',
+            'updated': '2024-01-01'
+        }))
+    return texts
+
+
+def _measure(build) -> Tuple[Any, int, float]:
+    """Build a value, returns it with its traced allocation size and time"""
+    import tracemalloc
+    tracemalloc.start()
+    start = time.perf_counter()
+    value = build()
+    seconds = time.perf_counter() - start
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return value, size, seconds
+
+
+def main(argv=None) -> int:
+    """Compare the memory of dict and Sheet representations of a library"""
+    parser = argparse.ArgumentParser(
+        description="Measure the memory of dicts against Sheet/Item")
+    parser.add_argument('--items', type=int, default=100000)
+    parser.add_argument('--items-per-sheet', type=int, default=50)
+    args = parser.parse_args(argv)
+
+    texts = _synthetic_library(args.items, args.items_per_sheet)
+
+    dicts, dict_size, dict_seconds = _measure(
+        lambda: [json.loads(text) for text in texts])
+    sheets, sheet_size, sheet_seconds = _measure(
+        lambda: [Sheet.from_dict(json.loads(text)) for text in texts])
+
+    # Same data either way
+    assert all(json.dumps(a) == json.dumps(b, default=json_default)
+               for a, b in zip(dicts, sheets))
+
+    print(f"{len(texts)} sheets, {args.items} items")
+    print(f"dict:  {dict_size / 1024 / 1024:7.1f} MiB  "
+          f"(load {dict_seconds:.2f}s)")
+    print(f"Sheet: {sheet_size / 1024 / 1024:7.1f} MiB  "
+          f"(load {sheet_seconds:.2f}s)  "
+          f"{100 * (1 - sheet_size / dict_size):.0f}% less")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
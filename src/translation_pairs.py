@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+Translation Pairs
+Links the language variants of a cheatsheet and diffs their items
+
+Variants are paired by filename first (git-commands.json and
+git-commands-en.json), then sheets left alone are paired by the codes of
+their items (comandos-docker.json and docker-commands-en.json). Items are
+aligned across languages by the hash of their normalized code, so finding
+missing and out-of-date translations is one pass over the library.
+"""
+
+import argparse
+import json
+import re
+import sys
+import time
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple
+
+from library_check import split_language_suffix
+
+
+# Share of item codes two sheets need in common to be paired by content
+MIN_SIMILARITY = 0.5
+# Codes used by more sheets than this (e.g. 'ls') say nothing about a pair
+MAX_CODE_SHEETS = 32
+
+
+# Placeholders like [archivo-respaldo] or <file>, translated with the sheet
+PLACEHOLDER = re.compile(r'\[[^\]\s]*\]|<[^>\s]*>')
+
+
+def code_key(code: str) -> int:
+    """Hashed key of an item code, the same for every language"""
+    return hash(' '.join(PLACEHOLDER.sub('<>', code).split()).lower())
+
+
+class _Variant:
+    """What the pair index keeps of one sheet"""
+
+    __slots__ = ('filename', 'language', 'updated', 'items')
+
+    def __init__(self, filename: str, sheet: Mapping, default_language: str):
+        language = sheet.get('language', default_language)
+        updated = sheet.get('updated', '')
+        self.filename = filename
+        self.language = (language if isinstance(language, str) else
+                         default_language)
+        self.updated = updated if isinstance(updated, str) else ''
+        # Code key -> code, in item order
+        self.items: Dict[int, str] = {}
+        items = sheet.get('items', [])
+        for item in items if isinstance(items, (list, tuple)) else []:
+            code = item.get('code') if isinstance(item, Mapping) else None
+            if isinstance(code, str) and code.strip():
+                self.items.setdefault(code_key(code), code)
+
+
+class TranslationIndex:
+    """
+    Groups of sheets that are translations of each other
+
+    Each group has one variant per language. Its source is the variant
+    without a language suffix, or else the one in the default language,
+    and the other variants are diffed against it.
+    """
+
+    def __init__(self, languages: Iterable[str], default_language: str):
+        self.languages = frozenset(languages)
+        self.default_language = default_language
+        self._variants: Dict[str, _Variant] = {}
+        # Group id -> language -> filename, and filename -> group id
+        self._groups: Dict[str, Dict[str, str]] = {}
+        self._group_of: Dict[str, str] = {}
+
+    @classmethod
+    def build(cls, sheets: Iterable[Tuple[str, Mapping]],
+              languages: Iterable[str],
+              default_language: str) -> 'TranslationIndex':
+        """Pair every (filename, sheet) of a library"""
+        index = cls(languages, default_language)
+        by_base: Dict[str, List[_Variant]] = {}
+        for filename, sheet in sheets:
+            variant = _Variant(filename, sheet, default_language)
+            index._variants[filename] = variant
+            base, _ = split_language_suffix(filename, index.languages)
+            by_base.setdefault(base, []).append(variant)
+
+        alone = []
+        for base, variants in sorted(by_base.items()):
+            if not index._add_group(base, variants):
+                alone.extend(variants)
+        index._pair_by_content(alone)
+        return index
+
+    def _add_group(self, group: str, variants: List[_Variant]) -> bool:
+        """Add a group of variants, False if they aren't translations"""
+        members: Dict[str, str] = {}
+        # The unsuffixed file comes first and wins a language it shares
+        for variant in sorted(variants, key=lambda v: (
+                split_language_suffix(v.filename, self.languages)[1]
+                is not None, v.filename)):
+            members.setdefault(variant.language, variant.filename)
+        if len(members) < 2:
+            return False
+        self._groups[group] = members
+        for filename in members.values():
+            self._group_of[filename] = group
+        return True
+
+    def _pair_by_content(self, variants: List[_Variant]) -> None:
+        """Pair sheets in different languages sharing most item codes"""
+        sheets_with: Dict[int, List[_Variant]] = {}
+        for variant in variants:
+            for key in variant.items:
+                sheets_with.setdefault(key, []).append(variant)
+
+        paired = set()
+        for variant in variants:
+            if variant.filename in paired or not variant.items:
+                continue
+            shared: Dict[str, int] = {}
+            for key in variant.items:
+                others = sheets_with[key]
+                if len(others) > MAX_CODE_SHEETS:
+                    continue
+                for other in others:
+                    if (other.language != variant.language and
+                            other.filename not in paired):
+                        shared[other.filename] = (
+                            shared.get(other.filename, 0) + 1)
+
+            best, best_similarity = None, MIN_SIMILARITY
+            for filename, count in sorted(shared.items()):
+                other = self._variants[filename]
+                similarity = count / (len(variant.items) +
+                                      len(other.items) - count)
+                if similarity >= best_similarity:
+                    best, best_similarity = other, similarity
+            if best is not None:
+                self._add_group(variant.filename, [variant, best])
+                paired.update((variant.filename, best.filename))
+
+    # Reads
+
+    def counterparts(self, filename: str) -> Dict[str, str]:
+        """Language -> filename of the other variants of a sheet"""
+        group = self._group_of.get(filename)
+        if group is None:
+            return {}
+        return {language: other
+                for language, other in self._groups[group].items()
+                if other != filename}
+
+    def groups(self) -> List[Dict[str, str]]:
+        """Language -> filename of every group, by group id"""
+        return [dict(self._groups[group]) for group in sorted(self._groups)]
+
+    def source_of(self, group: str) -> str:
+        """Filename every other variant of a group translates"""
+        members = self._groups[group]
+        for filename in sorted(members.values()):
+            if split_language_suffix(filename, self.languages)[1] is None:
+                return filename
+        return members.get(self.default_language,
+                           members[min(members)])
+
+    def diff(self, source: str, target: str) -> Optional[Dict]:
+        """
+        Items of source missing from target, and items only target has
+
+        Items are matched by code, which translations keep while the
+        description and example change. The target is outdated if the
+        source was updated later. None if either sheet isn't indexed.
+        """
+        source_variant = self._variants.get(source)
+        target_variant = self._variants.get(target)
+        if source_variant is None or target_variant is None:
+            return None
+        source_items = source_variant.items
+        target_items = target_variant.items
+        return {
+            'source': source,
+            'target': target,
+            'language': target_variant.language,
+            'missing': [code for key, code in source_items.items()
+                        if key not in target_items],
+            'extra': [code for key, code in target_items.items()
+                      if key not in source_items],
+            'outdated': source_variant.updated > target_variant.updated
+        }
+
+    def group_diffs(self, group: str) -> List[Dict]:
+        """Diff of every variant of a group against its source"""
+        source = self.source_of(group)
+        return [self.diff(source, target)
+                for _, target in sorted(self._groups[group].items())
+                if target != source]
+
+    def sheet_diffs(self, filename: str) -> List[Dict]:
+        """Diffs of the group of a sheet, empty if it has no translation"""
+        group = self._group_of.get(filename)
+        return [] if group is None else self.group_diffs(group)
+
+    def report(self) -> List[Dict]:
+        """Diff of every variant against its source that needs work"""
+        return [diff for group in sorted(self._groups)
+                for diff in self.group_diffs(group)
+                if diff['missing'] or diff['extra'] or diff['outdated']]
+
+
+def main(argv=None) -> int:
+    """Pair the sheets of a directory and print what needs translating"""
+    parser = argparse.ArgumentParser(
+        description="Report missing and out-of-date translations")
+    parser.add_argument('directory')
+    parser.add_argument('--default-language', default='en')
+    args = parser.parse_args(argv)
+
+    from pathlib import Path
+    sheets = []
+    for path in sorted(Path(args.directory).glob('*.json')):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                sheets.append((path.stem, json.load(f)))
+        except (OSError, ValueError) as e:
+            print(f"Error loading {path.name}: {e}")
+
+    start = time.perf_counter()
+    index = TranslationIndex.build(sheets, ['es', 'en', 'fr', 'pt'],
+                                   args.default_language)
+    report = index.report()
+    elapsed = time.perf_counter() - start
+    for diff in report:
+        print(f"{diff['target']} ({diff['language']}) from {diff['source']}: "
+              f"{len(diff['missing'])} missing, {len(diff['extra'])} extra"
+              f"{', outdated' if diff['outdated'] else ''}")
+    print(f"{len(sheets)} sheets, {len(index.groups())} groups, "
+          f"{len(report)} to review in {elapsed * 1000:.1f}ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
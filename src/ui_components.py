@@ -600,13 +600,13 @@ class CheatSheetEditor:
 class CheatSheetViewer:
     """Cheatsheet viewer in popup window"""
 
-    def __init__(self, parent, cheatsheet_data):
+    def __init__(self, parent, cheatsheet_data, cheatsheet_manager=None):
         self.parent = parent
         self.cheatsheet_data = cheatsheet_data
+        # With a manager the viewer offers the translations of the sheet
+        self.cheatsheet_manager = cheatsheet_manager
 
         self.window = tk.Toplevel(parent)
-        title = cheatsheet_data.get('title', _('cheatsheet_viewer_title'))
-        self.window.title(f"{_('cheatsheet_viewer_title')}: {title}")
         self.window.geometry("500x400")
         self.window.attributes('-topmost', True)
 
@@ -620,16 +620,17 @@ class CheatSheetViewer:
         main_frame.pack(fill=tk.BOTH, expand=True)
 
         # Título
-        title_label = ttk.Label(main_frame, 
-                               text=self.cheatsheet_data.get('title', ''), 
-                               font=("Arial", 14, "bold"))
-        title_label.pack(anchor=tk.W, pady=(0, 5))
+        self.title_label = ttk.Label(main_frame,
+                                     font=("Arial", 14, "bold"))
+        self.title_label.pack(anchor=tk.W, pady=(0, 5))
 
         # Tags
-        tags = self.cheatsheet_data.get('tags', [])
-        if tags:
-            tags_text = "Tags: " + ", ".join(tags)
-            ttk.Label(main_frame, text=tags_text, foreground="blue").pack(anchor=tk.W, pady=(0, 10))
+        self.tags_label = ttk.Label(main_frame, foreground="blue")
+        self.tags_label.pack(anchor=tk.W, pady=(0, 10))
+
+        # Botones de las traducciones
+        self.translations_frame = ttk.Frame(main_frame)
+        self.translations_frame.pack(anchor=tk.W, pady=(0, 5))
 
         # Contenido con scroll
         self.content_text = scrolledtext.ScrolledText(main_frame, 
@@ -641,8 +642,45 @@ class CheatSheetViewer:
         ttk.Button(main_frame, text=_("close"),
                    command=self.window.destroy).pack()
 
+    def show_translation(self, filename: str):
+        """Replace the shown cheatsheet with one of its translations"""
+        cheatsheet_data = self.cheatsheet_manager.get_cheatsheet_by_filename(
+            filename)
+        if cheatsheet_data:
+            self.cheatsheet_data = cheatsheet_data
+            self.load_content()
+
+    def load_translations(self):
+        """Show a button per language the cheatsheet is translated to"""
+        for widget in self.translations_frame.winfo_children():
+            widget.destroy()
+        filename = self.cheatsheet_data.get('filename')
+        if self.cheatsheet_manager is None or not filename:
+            return
+
+        translations = self.cheatsheet_manager.get_translations(filename)
+        if not translations:
+            return
+        ttk.Label(self.translations_frame,
+                  text=_("translations") + ":").pack(side=tk.LEFT)
+        for language, other in sorted(translations.items()):
+            flag = self.cheatsheet_manager.get_language_info(
+                language).get('flag', '')
+            ttk.Button(self.translations_frame,
+                       text=f"{flag} {language.upper()}".strip(),
+                       command=lambda f=other: self.show_translation(f)
+                       ).pack(side=tk.LEFT, padx=(5, 0))
+
     def load_content(self):
         """Load cheatsheet content"""
+        title = self.cheatsheet_data.get('title', '')
+        self.window.title(f"{_('cheatsheet_viewer_title')}: "
+                          f"{title or _('cheatsheet_viewer_title')}")
+        self.title_label.config(text=title)
+        tags = self.cheatsheet_data.get('tags', [])
+        self.tags_label.config(text="Tags: " + ", ".join(tags) if tags else "")
+        self.load_translations()
+
         self.content_text.config(state=tk.NORMAL)
         self.content_text.delete('1.0', tk.END)
 
@@ -691,6 +729,8 @@ class TagManager:
         self.cheatsheet_manager = cheatsheet_manager
         self.on_change_callback = on_change_callback
         self.current_filtered_results = []  # Store search results
+        self.i18n = get_i18n()
+        self._refresh_pending = False
 
         self.window = tk.Toplevel(parent)
         self.window.title(_("tag_manager_title"))
@@ -699,9 +739,10 @@ class TagManager:
 
         self.setup_ui()
         self.refresh_tags()
-        
-        # Force correct language selection and refresh cheatsheets
-        self.window.after(200, self._initialize_correct_language)
+        self.refresh_cheatsheets()
+
+        # Language and library changes are pushed to us, no polling needed
+        self._subscribe_to_changes()
 
         # Hacer modal después de configurar
         self.window.update()
@@ -792,12 +833,6 @@ class TagManager:
 
         self.language_combobox.bind('<<ComboboxSelected>>', lambda e: self.refresh_cheatsheets())
 
-        # Register callback to update combobox if app language changes
-        self._register_language_update_callback()
-        
-        # Force an immediate update to ensure correct initial state
-        self.window.after(100, self._force_update_language_combobox)
-
         # Search frame
         search_frame = ttk.Frame(self.cheatsheets_frame)
         search_frame.pack(fill=tk.X, pady=(5, 5))
@@ -853,155 +888,57 @@ class TagManager:
                    command=self.view_cheatsheet).pack(side=tk.LEFT)
 
     def _set_language_combobox_to_current(self):
-        # Get current language from parent (FloatingWidget) or manager
+        """Select the current application language in the combobox"""
         lang_codes = self.language_combobox['values']
-        current_lang = None
-        
-        # Try multiple strategies to get current language
-        # Strategy 1: From i18n instance
-        i18n = self._find_i18n_instance()
-        if i18n:
-            current_lang = i18n.get_current_language()
-            print(f"DEBUG: Got language from i18n: {current_lang}")
-        
-        # Strategy 2: From parent's current_language attribute
-        if not current_lang and hasattr(self.parent, 'current_language'):
-            current_lang = getattr(self.parent, 'current_language', None)
-            print(f"DEBUG: Got language from parent: {current_lang}")
-        
-        # Strategy 3: From cheatsheet_manager default
-        if not current_lang:
-            current_lang = getattr(self.cheatsheet_manager, 'default_language', None)
-            print(f"DEBUG: Got language from manager: {current_lang}")
-        
-        # Strategy 4: Use first available language
-        if not current_lang and lang_codes:
-            current_lang = lang_codes[0]
-            print(f"DEBUG: Using first available language: {current_lang}")
-            
-        # Set combobox value
-        if current_lang and current_lang in lang_codes:
+        current_lang = self.i18n.get_current_language()
+
+        if current_lang in lang_codes:
             self.language_var.set(str(current_lang))
-            print(f"DEBUG: Set combobox to: {current_lang}")
         else:
-            fallback = str(lang_codes[0]) if lang_codes else ''
-            self.language_var.set(fallback)
-            print(f"DEBUG: Set combobox to fallback: {fallback}")
-
-    def _register_language_update_callback(self):
-        """Register callback for language updates with multiple strategies"""
-        # Strategy 1: Try to get i18n instance from parent chain
-        i18n = self._find_i18n_instance()
-        
-        if i18n and hasattr(i18n, 'register_update_callback'):
-            def update_language_combobox():
-                try:
-                    self._force_update_language_combobox()
-                except Exception as e:
-                    print(f"Error updating language combobox: {e}")
-            
-            # Store callback reference to prevent garbage collection
-            self._language_update_callback = update_language_combobox
-            i18n.register_update_callback(update_language_combobox)
-            print("DEBUG: Successfully registered language update callback")
-        else:
-            print("DEBUG: Could not register callback, will use polling method")
-            # Strategy 2: Use polling as fallback
-            self._setup_language_polling()
-
-    def _find_i18n_instance(self):
-        """Find i18n instance from various sources"""
-        # Try parent chain
-        current = self.parent
-        for level in range(3):  # Search up to 3 levels up
-            if hasattr(current, 'i18n'):
-                i18n = getattr(current, 'i18n', None)
-                if i18n:
-                    return i18n
-            if hasattr(current, 'parent'):
-                current = current.parent
-            else:
-                break
-        
-        # Try global i18n
-        try:
-            from i18n import get_i18n
-            return get_i18n()
-        except (ImportError, AttributeError):
-            pass
-        
-        return None
+            self.language_var.set(str(lang_codes[0]) if lang_codes else '')
+
+    def _subscribe_to_changes(self):
+        """Subscribe to language and library change notifications"""
+        self.i18n.register_update_callback(self._on_language_changed)
+        self.cheatsheet_manager.register_batch_callback(
+            self._on_library_changed)
+        self.window.bind('<Destroy>', self._on_window_destroy, add='+')
+
+    def _unsubscribe_from_changes(self):
+        """Remove the callbacks registered by _subscribe_to_changes"""
+        self.i18n.unregister_update_callback(self._on_language_changed)
+        self.cheatsheet_manager.unregister_batch_callback(
+            self._on_library_changed)
+
+    def _on_window_destroy(self, event):
+        """Unsubscribe when the window is destroyed by any means"""
+        if event.widget is self.window:
+            self._unsubscribe_from_changes()
+
+    def _on_language_changed(self):
+        """Follow the application language in the language combobox"""
+        current_lang = self.i18n.get_current_language()
+        if self.language_var.get() == current_lang:
+            return
 
-    def _setup_language_polling(self):
-        """Setup periodic polling to check for language changes"""
-        self._last_known_language = None
-        self._check_language_change()
+        if current_lang in self.language_combobox['values']:
+            self.language_var.set(current_lang)
+            self.refresh_cheatsheets()
 
-    def _check_language_change(self):
-        """Check if language has changed and update if needed"""
-        try:
-            if not hasattr(self, 'window') or not self.window.winfo_exists():
-                return
-            
-            i18n = self._find_i18n_instance()
-            if i18n:
-                current_lang = i18n.get_current_language()
-                if self._last_known_language != current_lang:
-                    print(f"DEBUG: Language changed from {self._last_known_language} to {current_lang}")
-                    self._last_known_language = current_lang
-                    self._force_update_language_combobox()
-            
-            # Schedule next check
-            self.window.after(1000, self._check_language_change)  # Check every second
-        except Exception as e:
-            print(f"Error in language polling: {e}")
+    def _on_library_changed(self, changes):
+        """Schedule a single refresh for a burst of library changes"""
+        if self._refresh_pending:
+            return
+        self._refresh_pending = True
+        self.window.after_idle(self._refresh_after_library_change)
 
-    def _force_update_language_combobox(self):
-        """Force update of language combobox"""
-        try:
-            # Check if the window still exists
-            if not hasattr(self, 'window') or not self.window.winfo_exists():
-                return
-            
-            # Check if we have the language combobox
-            if not hasattr(self, 'language_combobox') or not hasattr(self, 'language_var'):
-                return
-            
-            print("DEBUG: Forcing language combobox update")
-            
-            # Get current language from i18n
-            i18n = self._find_i18n_instance()
-            current_lang = None
-            if i18n:
-                current_lang = i18n.get_current_language()
-            
-            # If no i18n, try to get from parent
-            if not current_lang and hasattr(self.parent, 'current_language'):
-                current_lang = getattr(self.parent, 'current_language', None)
-            
-            # Refresh language list
-            supported_langs = self.cheatsheet_manager.get_supported_languages()
-            lang_codes = list(supported_langs.keys())
-            
-            # Update combobox values
-            self.language_combobox['values'] = lang_codes
-            
-            # Set appropriate language
-            if current_lang and current_lang in lang_codes:
-                if self.language_var.get() != current_lang:
-                    print(f"DEBUG: Updating combobox from {self.language_var.get()} to {current_lang}")
-                    self.language_var.set(current_lang)
-                    # Force refresh of cheatsheets list
-                    self.refresh_cheatsheets()
-            elif lang_codes:
-                if not self.language_var.get():
-                    self.language_var.set(lang_codes[0])
-                    self.refresh_cheatsheets()
-            else:
-                self.language_var.set("")
-            
-        except Exception as e:
-            print(f"Error in _force_update_language_combobox: {e}")
+    def _refresh_after_library_change(self):
+        """Refresh tag and cheatsheet lists after library changes"""
+        self._refresh_pending = False
+        if not self.window.winfo_exists():
+            return
+        self.refresh_tags()
+        self.refresh_cheatsheets()
 
     def refresh_tags(self):
         """Update tag list"""
@@ -1054,7 +991,6 @@ class TagManager:
 
         if self.cheatsheet_manager.rename_tag(old_tag, new_name.strip()):
             messagebox.showinfo("Éxito", f"Tag renombrado de '{old_tag}' a '{new_name.strip()}'")
-            self.refresh_tags()
             if self.on_change_callback:
                 self.on_change_callback()
         else:
@@ -1080,7 +1016,6 @@ class TagManager:
         if messagebox.askyesno("Confirmar eliminación", message):
             if self.cheatsheet_manager.delete_tag(tag_name):
                 messagebox.showinfo("Éxito", f"Tag '{tag_name}' eliminado")
-                self.refresh_tags()
                 if self.on_change_callback:
                     self.on_change_callback()
             else:
@@ -1122,8 +1057,6 @@ class TagManager:
         def on_save(title, tags, items):
             try:
                 self.cheatsheet_manager.create_cheatsheet(title, tags, items)
-                self.refresh_cheatsheets()
-                self.refresh_tags()
                 if self.on_change_callback:
                     self.on_change_callback()
                 return True
@@ -1149,8 +1082,6 @@ class TagManager:
                     selected_sheet['filename'],
                     title, tags, items
                 )
-                self.refresh_cheatsheets()
-                self.refresh_tags()
                 if self.on_change_callback:
                     self.on_change_callback()
                 return True
@@ -1174,8 +1105,6 @@ class TagManager:
         if messagebox.askyesno("Confirmar eliminación", f"¿Eliminar la cheatsheet '{title}'?"):
             if self.cheatsheet_manager.delete_cheatsheet(selected_sheet['filename']):
                 messagebox.showinfo("Éxito", f"CheatSheet '{title}' eliminada")
-                self.refresh_cheatsheets()
-                self.refresh_tags()
                 if self.on_change_callback:
                     self.on_change_callback()
             else:
@@ -1191,7 +1120,7 @@ class TagManager:
         cheatsheets = self.cheatsheet_manager.get_all_cheatsheets()
         selected_sheet = cheatsheets[selection[0]]
 
-        CheatSheetViewer(self.window, selected_sheet)
+        CheatSheetViewer(self.window, selected_sheet, self.cheatsheet_manager)
 
     def on_search_results(self, results, query):
         """Handle search results from quick search"""
@@ -1262,20 +1191,9 @@ class TagManager:
             current_tag="all"
         )
 
-    def _initialize_correct_language(self):
-        """Initialize TagManager with correct language from app"""
-        print("DEBUG: _initialize_correct_language() called")
-        
-        # Force update language combobox to current app language
-        self._force_update_language_combobox()
-        
-        # Refresh cheatsheets with correct language
-        self.refresh_cheatsheets()
-
     def update_language_display(self):
         """Update language combobox when app language changes"""
-        print("DEBUG: update_language_display() called manually")
-        self._force_update_language_combobox()
+        self._on_language_changed()
 
     def close(self):
         """Close window"""
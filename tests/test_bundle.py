@@ -0,0 +1,80 @@
+"""
+Tests of importing damaged bundles
+"""
+
+import json
+import os
+import sys
+import tempfile
+import unittest
+import zipfile
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from bundle import BundleError
+from cheatsheet_manager import CheatSheetManager
+
+
+def sheet(title: str) -> dict:
+    return {'title': title, 'language': 'en', 'tags': ['shell'],
+            'items': [{'code': f'{title.lower()} --help',
+                       'description': 'Show the help ' * 20}]}
+
+
+class DamagedBundleTest(unittest.TestCase):
+    """A damaged entry is skipped, a damaged directory stops the import"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        root = Path(self.tmp.name)
+        patcher = mock.patch.dict(os.environ,
+                                  {'XDG_CACHE_HOME': str(root / 'cache')})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        (root / 'source').mkdir()
+        (root / 'target').mkdir()
+        for title in ('Grep', 'Tar'):
+            (root / 'source' / f'{title.lower()}.json').write_text(
+                json.dumps(sheet(title)), encoding='utf-8')
+        self.bundle = root / 'library.zip'
+        CheatSheetManager(str(root / 'source')).export_bundle(
+            str(self.bundle))
+        self.target = CheatSheetManager(str(root / 'target'))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def damage(self, name: str) -> None:
+        """Overwrite the middle of the compressed data of an entry"""
+        with zipfile.ZipFile(self.bundle) as bundle:
+            info = bundle.getinfo(name)
+        data = bytearray(self.bundle.read_bytes())
+        # Local header: 30 bytes, the name and extra field sizes at 26
+        header = info.header_offset
+        name_size = int.from_bytes(data[header + 26:header + 28], 'little')
+        extra_size = int.from_bytes(data[header + 28:header + 30], 'little')
+        start = header + 30 + name_size + extra_size
+        middle = start + info.compress_size // 2
+        data[middle:middle + 8] = b'\xff' * 8
+        self.bundle.write_bytes(bytes(data))
+
+    def test_corrupt_entry_is_skipped(self):
+        self.damage('sheets/grep.json')
+        report = self.target.import_bundle(str(self.bundle))
+        self.assertEqual(report['imported'], ['tar'])
+        self.assertEqual([error['filename'] for error in report['errors']],
+                         ['grep'])
+        self.assertIn('Corrupt entry', report['errors'][0]['error'])
+
+    def test_truncated_bundle(self):
+        data = self.bundle.read_bytes()
+        self.bundle.write_bytes(data[:len(data) // 2])
+        with self.assertRaises(BundleError) as raised:
+            self.target.import_bundle(str(self.bundle))
+        self.assertIn("directory can't be read", str(raised.exception))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+"""
+Tests of the cheatsheet manager
+"""
+
+import json
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from cheatsheet_manager import CheatSheetManager
+
+
+SHEET = {'title': 'Hooks', 'language': 'en', 'tags': ['react'],
+         'items': [{'code': 'useState', 'description': 'State hook'}]}
+
+
+class StatisticsTest(unittest.TestCase):
+    """Counts follow files written by other processes"""
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        root = Path(tmp.name)
+        patcher = mock.patch.dict(os.environ,
+                                  {'XDG_CACHE_HOME': str(root / 'cache')})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.library = root / 'library'
+        self.library.mkdir()
+        (self.library / 'hooks.json').write_text(json.dumps(SHEET),
+                                                 encoding='utf-8')
+        self.manager = CheatSheetManager(str(self.library))
+
+    def test_file_written_behind_the_manager(self):
+        self.assertEqual(self.manager.get_all_tags(), ['react'])
+        self.assertEqual(
+            self.manager.get_library_statistics()['cheatsheets'], 1)
+
+        (self.library / 'x.json').write_text(
+            json.dumps(dict(SHEET, title='X', tags=['brandnew'])),
+            encoding='utf-8')
+
+        self.assertEqual(self.manager.get_all_tags(), ['brandnew', 'react'])
+        self.assertEqual(self.manager.get_tag_usage_count('brandnew'), 1)
+        statistics = self.manager.get_library_statistics()
+        self.assertEqual(statistics['cheatsheets'], 2)
+        self.assertEqual(statistics['items'], 2)
+
+
+class ItemStoreTest(unittest.TestCase):
+    """The columnar store is saved and reopened while the library holds"""
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        root = Path(tmp.name)
+        patcher = mock.patch.dict(os.environ,
+                                  {'XDG_CACHE_HOME': str(root / 'cache')})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.library = root / 'library'
+        self.library.mkdir()
+        (self.library / 'hooks.json').write_text(json.dumps(SHEET),
+                                                 encoding='utf-8')
+        (self.library / 'bad.json').write_text(json.dumps(
+            {'title': 'Bad', 'tags': [1, 'broken'],
+             'items': [{'code': None, 'description': 'Find me'}, 7]}),
+            encoding='utf-8')
+
+    def search(self, query: str) -> list:
+        manager = CheatSheetManager(str(self.library), columnar=True)
+        return sorted(sheet['filename']
+                      for sheet in manager.search_cheatsheets(query))
+
+    def test_saved_store_is_reopened_until_the_library_changes(self):
+        self.assertEqual(self.search('broken'), ['bad'])
+        self.assertEqual(self.search('find me'), ['bad'])
+
+        from item_store import ItemStore
+        with mock.patch.object(ItemStore, 'build',
+                               side_effect=AssertionError('rebuilt')):
+            self.assertEqual(self.search('usestate'), ['hooks'])
+
+        (self.library / 'x.json').write_text(
+            json.dumps(dict(SHEET, title='X')), encoding='utf-8')
+        self.assertEqual(self.search('usestate'), ['hooks', 'x'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+"""
+Tests of the HTTP API
+"""
+
+import json
+import os
+import sys
+import tempfile
+import threading
+import unittest
+import urllib.error
+import urllib.request
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from cheatsheet_manager import CheatSheetManager
+from http_api import create_server
+
+
+SHEET = {'title': 'Hooks', 'language': 'en', 'tags': ['react'],
+         'items': [{'code': 'useState', 'description': 'State hook'}]}
+
+
+class SheetPathTest(unittest.TestCase):
+    """/sheets/<filename> only serves cheatsheets of the library"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        root = Path(self.tmp.name)
+        patcher = mock.patch.dict(os.environ,
+                                  {'XDG_CACHE_HOME': str(root / 'cache')})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        (root / 'library').mkdir()
+        (root / 'secret').mkdir()
+        for path in (root / 'library' / 'hooks.json',
+                     root / 'secret' / 'creds.json'):
+            path.write_text(json.dumps(SHEET), encoding='utf-8')
+
+        self.server = create_server(CheatSheetManager(str(root / 'library')),
+                                    '127.0.0.1', 0)
+        threading.Thread(target=self.server.serve_forever,
+                         daemon=True).start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.tmp.cleanup()
+
+    def get(self, path: str) -> int:
+        url = f"http://127.0.0.1:{self.server.server_port}{path}"
+        try:
+            with urllib.request.urlopen(url) as response:
+                return response.status
+        except urllib.error.HTTPError as e:
+            return e.code
+
+    def test_sheet_of_the_library(self):
+        self.assertEqual(self.get('/sheets/hooks'), 200)
+
+    def test_encoded_slash_does_not_leave_the_library(self):
+        self.assertEqual(self.get('/sheets/..%2Fsecret%2Fcreds'), 404)
+
+    def test_encoded_separators_and_nul(self):
+        for name in ('..%5Csecret%5Ccreds', '%2E%2E', 'hooks%00',
+                     '%2Fetc%2Fpasswd'):
+            self.assertEqual(self.get(f'/sheets/{name}'), 404, name)
+
+
+if __name__ == '__main__':
+    unittest.main()
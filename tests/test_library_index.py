@@ -0,0 +1,110 @@
+"""
+Tests of the persisted library index
+"""
+
+import json
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from library_index import LibraryIndex
+
+
+SHEET = {'title': 'Hooks', 'language': 'en', 'tags': ['react'],
+         'items': [{'code': 'useState', 'description': 'State hook'}]}
+
+
+class LibraryIndexTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        root = Path(self.tmp.name)
+        self.library = root / 'library'
+        self.library.mkdir()
+        (self.library / 'hooks.json').write_text(json.dumps(SHEET),
+                                                 encoding='utf-8')
+        self.index_file = str(root / 'index.json')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def open_index(self) -> LibraryIndex:
+        index = LibraryIndex(self.library, self.index_file)
+        index.refresh()
+        return index
+
+    def test_json_that_is_not_an_object(self):
+        (self.library / 'numbers.json').write_text('[1, 2]', encoding='utf-8')
+        index = self.open_index()
+        self.assertEqual(index.filenames(), ['hooks'])
+        self.assertIn('numbers', index.stored_filenames())
+
+    def test_fields_that_are_not_text(self):
+        (self.library / 'bad.json').write_text(json.dumps(
+            {'title': 'Bad', 'tags': [1, 'ok'], 'items': [
+                {'code': None, 'description': 'Find me', 'example': 3}, 7]}),
+            encoding='utf-8')
+        index = self.open_index()
+        self.assertTrue(index.matches('bad', 'find me'))
+        self.assertTrue(index.matches('bad', 'ok'))
+        self.assertFalse(index.matches('bad', 'none'))
+        self.assertTrue(index.matches('hooks', 'usestate'))
+
+    def test_saved_edits_survive_a_restart(self):
+        index = self.open_index()
+        path = self.library / 'hooks.json'
+        path.write_text(json.dumps(dict(SHEET, title='Hooks 2')),
+                        encoding='utf-8')
+        index.refresh_file('hooks')
+        path.unlink()
+        index.remove('hooks')
+        (self.library / 'tar.json').write_text(
+            json.dumps(dict(SHEET, title='Tar')), encoding='utf-8')
+        index.store('tar', dict(SHEET, title='Tar'))
+        index.save()
+
+        reopened = LibraryIndex(self.library, self.index_file)
+        reopened._load_manifest()
+        self.assertEqual(sorted(reopened.entries), ['tar'])
+        self.assertEqual(reopened.get('tar')['title'], 'Tar')
+        self.assertEqual(reopened.refresh(), [])
+
+    def test_save_after_another_process_compacted(self):
+        first, second = self.open_index(), self.open_index()
+        for title in ('A', 'B'):
+            (self.library / f'{title}.json').write_text(
+                json.dumps(dict(SHEET, title=title)), encoding='utf-8')
+        first.store('A', dict(SHEET, title='A'))
+        first.save()
+        self.assertTrue(first.journal_file.exists())
+
+        # The first index's journal isn't the one the second one loaded
+        second.store('B', dict(SHEET, title='B'))
+        second.save()
+        self.assertFalse(second.journal_file.exists())
+
+        reopened = self.open_index()
+        self.assertEqual(sorted(reopened.filenames()), ['A', 'B', 'hooks'])
+        self.assertEqual(reopened.get('A')['title'], 'A')
+
+    def test_damaged_journal_entry(self):
+        index = self.open_index()
+        (self.library / 'tar.json').write_text(json.dumps(SHEET),
+                                               encoding='utf-8')
+        index.store('tar', SHEET)
+        index.save()
+        with open(index.journal_file, 'a', encoding='utf-8') as f:
+            f.write('["hooks", {"stat": 1}]\n["tar", {"sheet": []}]\n')
+
+        reopened = LibraryIndex(self.library, self.index_file)
+        reopened._load_manifest()
+        self.assertEqual(reopened.entries, {})
+        self.assertEqual(sorted(reopened.refresh()),
+                         [('created', 'hooks'), ('created', 'tar')])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,157 @@
+"""
+Tests of the query daemon protocol
+"""
+
+import json
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from cheatsheet_manager import CheatSheetManager
+from query_daemon import (QueryError, QueryService, QueryTimeout,
+                          RemoteCheatSheetManager)
+
+
+SHEET = {'title': 'Hooks', 'language': 'en', 'tags': ['react'],
+         'items': [{'code': 'useState', 'description': 'State hook'}]}
+
+
+def temporary_root(test: unittest.TestCase) -> Path:
+    """Directory removed after the test, with the index cache in it"""
+    tmp = tempfile.TemporaryDirectory()
+    test.addCleanup(tmp.cleanup)
+    root = Path(tmp.name)
+    patcher = mock.patch.dict(os.environ,
+                              {'XDG_CACHE_HOME': str(root / 'cache')})
+    patcher.start()
+    test.addCleanup(patcher.stop)
+    return root
+
+
+class GetTest(unittest.TestCase):
+    """'get' only reads cheatsheets of the library"""
+
+    def setUp(self):
+        root = temporary_root(self)
+        (root / 'library').mkdir()
+        (root / 'secret').mkdir()
+        for path in (root / 'library' / 'hooks.json',
+                     root / 'secret' / 'creds.json'):
+            path.write_text(json.dumps(SHEET), encoding='utf-8')
+        self.service = QueryService(
+            CheatSheetManager(str(root / 'library')))
+
+    def get(self, filename: str):
+        return self.service.handle({'method': 'get',
+                                    'params': {'filename': filename}})
+
+    def test_sheet_of_the_library(self):
+        self.assertEqual(self.get('hooks')['result']['title'], 'Hooks')
+
+    def test_path_outside_the_library(self):
+        for filename in ('../secret/creds', '..\\secret\\creds', 'hooks\0'):
+            self.assertIsNone(self.get(filename)['result'], filename)
+
+
+class _Client:
+    """QueryClient answering every call with one outcome"""
+
+    def __init__(self, outcome: Exception):
+        self.outcome = outcome
+        self.closed = False
+        self.generation = 0
+
+    def call(self, method: str, **params):
+        raise self.outcome
+
+    def close(self):
+        self.closed = True
+
+
+class FallbackTest(unittest.TestCase):
+    """Only an unreachable daemon sends queries to the local library"""
+
+    def setUp(self):
+        root = temporary_root(self)
+        (root / 'library').mkdir()
+        (root / 'library' / 'hooks.json').write_text(json.dumps(SHEET),
+                                                     encoding='utf-8')
+        self.local = CheatSheetManager(str(root / 'library'))
+
+    def test_unreachable_daemon(self):
+        client = _Client(ConnectionError("Daemon closed the connection"))
+        remote = RemoteCheatSheetManager(self.local, client)
+        self.assertEqual(remote.get_all_tags(), ['react'])
+        self.assertTrue(client.closed)
+
+    def test_error_answer_keeps_the_daemon(self):
+        client = _Client(QueryError("Invalid query"))
+        remote = RemoteCheatSheetManager(self.local, client)
+        with self.assertRaises(QueryError):
+            remote.get_all_tags()
+        self.assertFalse(client.closed)
+        self.assertIs(remote._client, client)
+
+    def test_slow_answer_keeps_the_daemon(self):
+        client = _Client(QueryTimeout("No answer to tags in 2.0s"))
+        remote = RemoteCheatSheetManager(self.local, client)
+        self.assertEqual(remote.get_all_tags(), ['react'])
+        self.assertFalse(client.closed)
+        self.assertIs(remote._client, client)
+
+
+class _ServiceClient:
+    """QueryClient calling a QueryService in this process"""
+
+    def __init__(self, service: QueryService):
+        self.service = service
+        self.generation = None
+        self.call('ping')
+
+    def call(self, method: str, **params):
+        response = self.service.handle({'method': method, 'params': params})
+        if 'error' in response:
+            raise QueryError(response['error'])
+        self.generation = response.get('generation')
+        return response['result']
+
+    def close(self):
+        pass
+
+
+class ChangeForwardingTest(unittest.TestCase):
+    """Changes the daemon finds reach the callbacks of the local manager"""
+
+    def setUp(self):
+        root = temporary_root(self)
+        self.library = root / 'library'
+        self.library.mkdir()
+        (self.library / 'hooks.json').write_text(json.dumps(SHEET),
+                                                 encoding='utf-8')
+        daemon = QueryService(CheatSheetManager(str(self.library)))
+        self.remote = RemoteCheatSheetManager(
+            CheatSheetManager(str(self.library)), _ServiceClient(daemon))
+
+    def test_file_written_behind_both(self):
+        changes = []
+        self.remote.register_change_callback(
+            lambda action, filename: changes.append((action, filename)))
+        self.remote.search_cheatsheets('hook')
+        changes.clear()
+
+        (self.library / 'x.json').write_text(
+            json.dumps(dict(SHEET, title='X', tags=['brandnew'])),
+            encoding='utf-8')
+        self.assertEqual(len(self.remote.search_cheatsheets('hook')), 2)
+        self.assertEqual(changes, [('created', 'x')])
+        self.assertEqual(self.remote.get_library_statistics()['cheatsheets'],
+                         2)
+
+
+if __name__ == '__main__':
+    unittest.main()